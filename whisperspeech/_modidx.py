@@ -8,14 +8,178 @@ d = { 'settings': { 'branch': 'master',
   'syms': { 'whisperspeech.a2wav': { 'whisperspeech.a2wav.Vocoder': ('6. quality-boosting vocoder.html#vocoder', 'whisperspeech/a2wav.py'),
                                      'whisperspeech.a2wav.Vocoder.__init__': ( '6. quality-boosting vocoder.html#vocoder.__init__',
                                                                                'whisperspeech/a2wav.py'),
+                                     'whisperspeech.a2wav.Vocoder._decode': ( '6. quality-boosting vocoder.html#vocoder._decode',
+                                                                              'whisperspeech/a2wav.py'),
+                                     'whisperspeech.a2wav.Vocoder._decode_window': ( '6. quality-boosting '
+                                                                                     'vocoder.html#vocoder._decode_window',
+                                                                                     'whisperspeech/a2wav.py'),
                                      'whisperspeech.a2wav.Vocoder.decode': ( '6. quality-boosting vocoder.html#vocoder.decode',
                                                                              'whisperspeech/a2wav.py'),
+                                     'whisperspeech.a2wav.Vocoder.decode_batch': ( '6. quality-boosting vocoder.html#vocoder.decode_batch',
+                                                                                   'whisperspeech/a2wav.py'),
+                                     'whisperspeech.a2wav.Vocoder.decode_stream': ( '6. quality-boosting '
+                                                                                    'vocoder.html#vocoder.decode_stream',
+                                                                                    'whisperspeech/a2wav.py'),
+                                     'whisperspeech.a2wav.Vocoder.decode_stream_to': ( '6. quality-boosting '
+                                                                                       'vocoder.html#vocoder.decode_stream_to',
+                                                                                       'whisperspeech/a2wav.py'),
                                      'whisperspeech.a2wav.Vocoder.decode_to_file': ( '6. quality-boosting '
                                                                                      'vocoder.html#vocoder.decode_to_file',
                                                                                      'whisperspeech/a2wav.py'),
                                      'whisperspeech.a2wav.Vocoder.decode_to_notebook': ( '6. quality-boosting '
                                                                                          'vocoder.html#vocoder.decode_to_notebook',
-                                                                                         'whisperspeech/a2wav.py')},
+                                                                                         'whisperspeech/a2wav.py'),
+                                     'whisperspeech.a2wav.Vocoder.is_notebook': ( '6. quality-boosting vocoder.html#vocoder.is_notebook',
+                                                                                  'whisperspeech/a2wav.py')},
+            'whisperspeech.audio_out': { 'whisperspeech.audio_out.AudioWriter': ( 'h. audio output.html#audiowriter',
+                                                                                  'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.AudioWriter.__enter__': ( 'h. audio output.html#audiowriter.__enter__',
+                                                                                            'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.AudioWriter.__exit__': ( 'h. audio output.html#audiowriter.__exit__',
+                                                                                           'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.AudioWriter.__init__': ( 'h. audio output.html#audiowriter.__init__',
+                                                                                           'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.AudioWriter.close': ( 'h. audio output.html#audiowriter.close',
+                                                                                        'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.AudioWriter.encode': ( 'h. audio output.html#audiowriter.encode',
+                                                                                         'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.AudioWriter.finish': ( 'h. audio output.html#audiowriter.finish',
+                                                                                         'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.AudioWriter.seconds': ( 'h. audio output.html#audiowriter.seconds',
+                                                                                          'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.AudioWriter.start': ( 'h. audio output.html#audiowriter.start',
+                                                                                        'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.AudioWriter.write': ( 'h. audio output.html#audiowriter.write',
+                                                                                        'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.PCMWriter': ( 'h. audio output.html#pcmwriter',
+                                                                                'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.PCMWriter.encode': ( 'h. audio output.html#pcmwriter.encode',
+                                                                                       'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.SoundFileWriter': ( 'h. audio output.html#soundfilewriter',
+                                                                                      'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.SoundFileWriter.__init__': ( 'h. audio '
+                                                                                               'output.html#soundfilewriter.__init__',
+                                                                                               'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.SoundFileWriter.encode': ( 'h. audio output.html#soundfilewriter.encode',
+                                                                                             'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.SoundFileWriter.finish': ( 'h. audio output.html#soundfilewriter.finish',
+                                                                                             'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.SoundFileWriter.start': ( 'h. audio output.html#soundfilewriter.start',
+                                                                                            'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.StreamingResampler': ( 'h. audio output.html#streamingresampler',
+                                                                                         'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.StreamingResampler.__call__': ( 'h. audio '
+                                                                                                  'output.html#streamingresampler.__call__',
+                                                                                                  'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.StreamingResampler.__init__': ( 'h. audio '
+                                                                                                  'output.html#streamingresampler.__init__',
+                                                                                                  'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.StreamingResampler.flush': ( 'h. audio '
+                                                                                               'output.html#streamingresampler.flush',
+                                                                                               'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.WAVWriter': ( 'h. audio output.html#wavwriter',
+                                                                                'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.WAVWriter.finish': ( 'h. audio output.html#wavwriter.finish',
+                                                                                       'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.WAVWriter.start': ( 'h. audio output.html#wavwriter.start',
+                                                                                      'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out._pcm16': ('h. audio output.html#_pcm16', 'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out._resampler': ( 'h. audio output.html#_resampler',
+                                                                                 'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out._wav_header': ( 'h. audio output.html#_wav_header',
+                                                                                  'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.can_write': ( 'h. audio output.html#can_write',
+                                                                                'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.get_resampler': ( 'h. audio output.html#get_resampler',
+                                                                                    'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.open_writer': ( 'h. audio output.html#open_writer',
+                                                                                  'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.write_stream': ( 'h. audio output.html#write_stream',
+                                                                                   'whisperspeech/audio_out.py'),
+                                         'whisperspeech.audio_out.writer_format': ( 'h. audio output.html#writer_format',
+                                                                                    'whisperspeech/audio_out.py')},
+            'whisperspeech.bench': { 'whisperspeech.bench._benchmark_models': ( 'e. benchmarks.html#_benchmark_models',
+                                                                                'whisperspeech/bench.py'),
+                                     'whisperspeech.bench._compare_logits': ( 'e. benchmarks.html#_compare_logits',
+                                                                              'whisperspeech/bench.py'),
+                                     'whisperspeech.bench._devices': ('e. benchmarks.html#_devices', 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench._first_call': ('e. benchmarks.html#_first_call', 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench._flatten': ('e. benchmarks.html#_flatten', 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench._flatten_runs': ('e. benchmarks.html#_flatten_runs', 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench._git_commit': ('e. benchmarks.html#_git_commit', 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench._isolated': ('e. benchmarks.html#_isolated', 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench._peak_memory': ('e. benchmarks.html#_peak_memory', 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench._proc_status_mb': ( 'e. benchmarks.html#_proc_status_mb',
+                                                                              'whisperspeech/bench.py'),
+                                     'whisperspeech.bench._reset_peak_memory': ( 'e. benchmarks.html#_reset_peak_memory',
+                                                                                 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench._rope_reference': ( 'e. benchmarks.html#_rope_reference',
+                                                                              'whisperspeech/bench.py'),
+                                     'whisperspeech.bench._run_config': ('e. benchmarks.html#_run_config', 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench._sampling_reference': ( 'e. benchmarks.html#_sampling_reference',
+                                                                                  'whisperspeech/bench.py'),
+                                     'whisperspeech.bench._sync': ('e. benchmarks.html#_sync', 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench._timed': ('e. benchmarks.html#_timed', 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench._unprimed': ('e. benchmarks.html#_unprimed', 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench._unstacked': ('e. benchmarks.html#_unstacked', 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench.benchmark_cross_attention': ( 'e. benchmarks.html#benchmark_cross_attention',
+                                                                                        'whisperspeech/bench.py'),
+                                     'whisperspeech.bench.benchmark_delsum': ( 'e. benchmarks.html#benchmark_delsum',
+                                                                               'whisperspeech/bench.py'),
+                                     'whisperspeech.bench.benchmark_encoder': ( 'e. benchmarks.html#benchmark_encoder',
+                                                                                'whisperspeech/bench.py'),
+                                     'whisperspeech.bench.benchmark_import': ( 'e. benchmarks.html#benchmark_import',
+                                                                               'whisperspeech/bench.py'),
+                                     'whisperspeech.bench.benchmark_rope': ('e. benchmarks.html#benchmark_rope', 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench.benchmark_s2a': ('e. benchmarks.html#benchmark_s2a', 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench.benchmark_s2a_multitoken': ( 'e. benchmarks.html#benchmark_s2a_multitoken',
+                                                                                       'whisperspeech/bench.py'),
+                                     'whisperspeech.bench.benchmark_sampling': ( 'e. benchmarks.html#benchmark_sampling',
+                                                                                 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench.benchmark_t2s': ('e. benchmarks.html#benchmark_t2s', 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench.benchmark_t2s_speculative': ( 'e. benchmarks.html#benchmark_t2s_speculative',
+                                                                                        'whisperspeech/bench.py'),
+                                     'whisperspeech.bench.benchmark_vocoder': ( 'e. benchmarks.html#benchmark_vocoder',
+                                                                                'whisperspeech/bench.py'),
+                                     'whisperspeech.bench.compare_results': ( 'e. benchmarks.html#compare_results',
+                                                                              'whisperspeech/bench.py'),
+                                     'whisperspeech.bench.main': ('e. benchmarks.html#main', 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench.make_s2a': ('e. benchmarks.html#make_s2a', 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench.make_t2s': ('e. benchmarks.html#make_t2s', 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench.model_size': ('e. benchmarks.html#model_size', 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench.s2a_quality': ('e. benchmarks.html#s2a_quality', 'whisperspeech/bench.py'),
+                                     'whisperspeech.bench.t2s_quality': ('e. benchmarks.html#t2s_quality', 'whisperspeech/bench.py')},
+            'whisperspeech.caches': { 'whisperspeech.caches.LRUCache': ('f. inference caches.html#lrucache', 'whisperspeech/caches.py'),
+                                      'whisperspeech.caches.LRUCache.__contains__': ( 'f. inference caches.html#lrucache.__contains__',
+                                                                                      'whisperspeech/caches.py'),
+                                      'whisperspeech.caches.LRUCache.__init__': ( 'f. inference caches.html#lrucache.__init__',
+                                                                                  'whisperspeech/caches.py'),
+                                      'whisperspeech.caches.LRUCache.__len__': ( 'f. inference caches.html#lrucache.__len__',
+                                                                                 'whisperspeech/caches.py'),
+                                      'whisperspeech.caches.LRUCache.clear': ( 'f. inference caches.html#lrucache.clear',
+                                                                               'whisperspeech/caches.py'),
+                                      'whisperspeech.caches.LRUCache.get': ( 'f. inference caches.html#lrucache.get',
+                                                                             'whisperspeech/caches.py'),
+                                      'whisperspeech.caches.LRUCache.put': ( 'f. inference caches.html#lrucache.put',
+                                                                             'whisperspeech/caches.py'),
+                                      'whisperspeech.caches.LRUCache.stats': ( 'f. inference caches.html#lrucache.stats',
+                                                                               'whisperspeech/caches.py'),
+                                      'whisperspeech.caches.SpeakerEmbeddingCache': ( 'f. inference caches.html#speakerembeddingcache',
+                                                                                      'whisperspeech/caches.py'),
+                                      'whisperspeech.caches.SpeakerEmbeddingCache.__init__': ( 'f. inference '
+                                                                                               'caches.html#speakerembeddingcache.__init__',
+                                                                                               'whisperspeech/caches.py'),
+                                      'whisperspeech.caches.SpeakerEmbeddingCache._disk_path': ( 'f. inference '
+                                                                                                 'caches.html#speakerembeddingcache._disk_path',
+                                                                                                 'whisperspeech/caches.py'),
+                                      'whisperspeech.caches.SpeakerEmbeddingCache.get': ( 'f. inference '
+                                                                                          'caches.html#speakerembeddingcache.get',
+                                                                                          'whisperspeech/caches.py'),
+                                      'whisperspeech.caches.SpeakerEmbeddingCache.stats': ( 'f. inference '
+                                                                                            'caches.html#speakerembeddingcache.stats',
+                                                                                            'whisperspeech/caches.py'),
+                                      'whisperspeech.caches._nbytes': ('f. inference caches.html#_nbytes', 'whisperspeech/caches.py'),
+                                      'whisperspeech.caches.file_hash': ('f. inference caches.html#file_hash', 'whisperspeech/caches.py')},
             'whisperspeech.extract_acoustic': { 'whisperspeech.extract_acoustic.extract_Atoks': ( '1. acoustic token '
                                                                                                   'extraction.html#extract_atoks',
                                                                                                   'whisperspeech/extract_acoustic.py'),
@@ -27,27 +191,101 @@ d = { 'settings': { 'branch': 'master',
                                                 'whisperspeech.extract_acoustic.load_model': ( '1. acoustic token '
                                                                                                'extraction.html#load_model',
                                                                                                'whisperspeech/extract_acoustic.py')},
-            'whisperspeech.extract_semb': { 'whisperspeech.extract_semb.encode_semantic': ( '2c. whisper semantic embedding '
-                                                                                            'extraction.html#encode_semantic',
-                                                                                            'whisperspeech/extract_semb.py'),
-                                            'whisperspeech.extract_semb.extract_semantic': ( '2c. whisper semantic embedding '
-                                                                                             'extraction.html#extract_semantic',
-                                                                                             'whisperspeech/extract_semb.py'),
-                                            'whisperspeech.extract_semb.load_model': ( '2c. whisper semantic embedding '
-                                                                                       'extraction.html#load_model',
-                                                                                       'whisperspeech/extract_semb.py')},
             'whisperspeech.fetch_models': { 'whisperspeech.fetch_models.main': ( '0. download models.html#main',
                                                                                  'whisperspeech/fetch_models.py')},
-            'whisperspeech.modules': { 'whisperspeech.modules.Decoder': ('a. neural modules.html#decoder', 'whisperspeech/modules.py'),
-                                       'whisperspeech.modules.Decoder.__init__': ( 'a. neural modules.html#decoder.__init__',
-                                                                                   'whisperspeech/modules.py'),
-                                       'whisperspeech.modules.Decoder.forward': ( 'a. neural modules.html#decoder.forward',
-                                                                                  'whisperspeech/modules.py'),
-                                       'whisperspeech.modules.Encoder': ('a. neural modules.html#encoder', 'whisperspeech/modules.py'),
-                                       'whisperspeech.modules.Encoder.__init__': ( 'a. neural modules.html#encoder.__init__',
-                                                                                   'whisperspeech/modules.py'),
-                                       'whisperspeech.modules.Encoder.forward': ( 'a. neural modules.html#encoder.forward',
-                                                                                  'whisperspeech/modules.py'),
+            'whisperspeech.metrics': { 'whisperspeech.metrics.CounterSink': ('j. metrics.html#countersink', 'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.CounterSink.__call__': ( 'j. metrics.html#countersink.__call__',
+                                                                                       'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.CounterSink.__init__': ( 'j. metrics.html#countersink.__init__',
+                                                                                       'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.CounterSink.inc': ( 'j. metrics.html#countersink.inc',
+                                                                                  'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.CounterSink.render': ( 'j. metrics.html#countersink.render',
+                                                                                     'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.CounterSink.set': ( 'j. metrics.html#countersink.set',
+                                                                                  'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.LogSink': ('j. metrics.html#logsink', 'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.LogSink.__call__': ( 'j. metrics.html#logsink.__call__',
+                                                                                   'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.LogSink.__init__': ( 'j. metrics.html#logsink.__init__',
+                                                                                   'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.Metrics': ('j. metrics.html#metrics', 'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.Metrics.__init__': ( 'j. metrics.html#metrics.__init__',
+                                                                                   'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.Metrics._profiler': ( 'j. metrics.html#metrics._profiler',
+                                                                                    'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.Metrics.add_sink': ( 'j. metrics.html#metrics.add_sink',
+                                                                                   'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.Metrics.enabled': ( 'j. metrics.html#metrics.enabled',
+                                                                                  'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.Metrics.finish': ( 'j. metrics.html#metrics.finish',
+                                                                                 'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.Metrics.request': ( 'j. metrics.html#metrics.request',
+                                                                                  'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.Metrics.start': ('j. metrics.html#metrics.start', 'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.StageTimer': ('j. metrics.html#stagetimer', 'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.StageTimer.__init__': ( 'j. metrics.html#stagetimer.__init__',
+                                                                                      'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.StageTimer._now': ( 'j. metrics.html#stagetimer._now',
+                                                                                  'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.StageTimer.mark': ( 'j. metrics.html#stagetimer.mark',
+                                                                                  'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.StageTimer.skip': ( 'j. metrics.html#stagetimer.skip',
+                                                                                  'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.StageTimer.stats': ( 'j. metrics.html#stagetimer.stats',
+                                                                                   'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics._Request': ('j. metrics.html#_request', 'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics._Request.__init__': ( 'j. metrics.html#_request.__init__',
+                                                                                    'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.add_count': ('j. metrics.html#add_count', 'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.add_stages': ('j. metrics.html#add_stages', 'whisperspeech/metrics.py'),
+                                       'whisperspeech.metrics.add_time': ('j. metrics.html#add_time', 'whisperspeech/metrics.py')},
+            'whisperspeech.modules': { 'whisperspeech.modules.BaseDecoder': ( 'a. neural modules.html#basedecoder',
+                                                                              'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.BaseDecoder.__init__': ( 'a. neural modules.html#basedecoder.__init__',
+                                                                                       'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.BaseDecoder.check_batch_size': ( 'a. neural '
+                                                                                               'modules.html#basedecoder.check_batch_size',
+                                                                                               'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.BaseDecoder.forward': ( 'a. neural modules.html#basedecoder.forward',
+                                                                                      'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.BaseDecoder.kv_bucket': ( 'a. neural modules.html#basedecoder.kv_bucket',
+                                                                                        'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.BaseDecoder.kv_cache_bytes': ( 'a. neural '
+                                                                                             'modules.html#basedecoder.kv_cache_bytes',
+                                                                                             'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.BaseDecoder.max_batch_size': ( 'a. neural '
+                                                                                             'modules.html#basedecoder.max_batch_size',
+                                                                                             'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.BaseDecoder.max_seq_len': ( 'a. neural modules.html#basedecoder.max_seq_len',
+                                                                                          'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.BaseDecoder.prime_cross_attention': ( 'a. neural '
+                                                                                                    'modules.html#basedecoder.prime_cross_attention',
+                                                                                                    'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.BaseDecoder.reset_cross_attention': ( 'a. neural '
+                                                                                                    'modules.html#basedecoder.reset_cross_attention',
+                                                                                                    'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.BaseDecoder.select_rows': ( 'a. neural modules.html#basedecoder.select_rows',
+                                                                                          'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.BaseDecoder.setup_kv_cache': ( 'a. neural '
+                                                                                             'modules.html#basedecoder.setup_kv_cache',
+                                                                                             'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.EmbeddingProjector': ( 'a. neural modules.html#embeddingprojector',
+                                                                                     'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.FlexEmbeddings': ( 'a. neural modules.html#flexembeddings',
+                                                                                 'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.FlexEmbeddings.__init__': ( 'a. neural modules.html#flexembeddings.__init__',
+                                                                                          'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.FlexEmbeddings.convert_for_eval': ( 'a. neural '
+                                                                                                  'modules.html#flexembeddings.convert_for_eval',
+                                                                                                  'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.FlexEmbeddings.forward': ( 'a. neural modules.html#flexembeddings.forward',
+                                                                                         'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.FlexEmbeddings.set_frozen_embeddings': ( 'a. neural '
+                                                                                                       'modules.html#flexembeddings.set_frozen_embeddings',
+                                                                                                       'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.FlexEmbeddings.unembed': ( 'a. neural modules.html#flexembeddings.unembed',
+                                                                                         'whisperspeech/modules.py'),
                                        'whisperspeech.modules.LayerNorm': ('a. neural modules.html#layernorm', 'whisperspeech/modules.py'),
                                        'whisperspeech.modules.LayerNorm.forward': ( 'a. neural modules.html#layernorm.forward',
                                                                                     'whisperspeech/modules.py'),
@@ -58,18 +296,27 @@ d = { 'settings': { 'branch': 'master',
                                        'whisperspeech.modules.MultiHeadAttention.__init__': ( 'a. neural '
                                                                                               'modules.html#multiheadattention.__init__',
                                                                                               'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.MultiHeadAttention.convert_for_eval': ( 'a. neural '
+                                                                                                      'modules.html#multiheadattention.convert_for_eval',
+                                                                                                      'whisperspeech/modules.py'),
                                        'whisperspeech.modules.MultiHeadAttention.forward': ( 'a. neural '
                                                                                              'modules.html#multiheadattention.forward',
                                                                                              'whisperspeech/modules.py'),
-                                       'whisperspeech.modules.MultiHeadAttention.qkv_attention_pth20': ( 'a. neural '
-                                                                                                         'modules.html#multiheadattention.qkv_attention_pth20',
-                                                                                                         'whisperspeech/modules.py'),
-                                       'whisperspeech.modules.MultiHeadAttention.qkv_attention_vanilla': ( 'a. neural '
-                                                                                                           'modules.html#multiheadattention.qkv_attention_vanilla',
-                                                                                                           'whisperspeech/modules.py'),
-                                       'whisperspeech.modules.MultiHeadAttention.qkv_attention_xformers': ( 'a. neural '
-                                                                                                            'modules.html#multiheadattention.qkv_attention_xformers',
-                                                                                                            'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.MultiHeadAttention.merge_linears': ( 'a. neural '
+                                                                                                   'modules.html#multiheadattention.merge_linears',
+                                                                                                   'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.MultiHeadAttention.prime_cache': ( 'a. neural '
+                                                                                                 'modules.html#multiheadattention.prime_cache',
+                                                                                                 'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.MultiHeadAttention.project_kv': ( 'a. neural '
+                                                                                                'modules.html#multiheadattention.project_kv',
+                                                                                                'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.MultiHeadAttention.setup_kv_cache': ( 'a. neural '
+                                                                                                    'modules.html#multiheadattention.setup_kv_cache',
+                                                                                                    'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.MultiHeadAttention.split_heads': ( 'a. neural '
+                                                                                                 'modules.html#multiheadattention.split_heads',
+                                                                                                 'whisperspeech/modules.py'),
                                        'whisperspeech.modules.QueryHead': ('a. neural modules.html#queryhead', 'whisperspeech/modules.py'),
                                        'whisperspeech.modules.ResidualAttentionBlock': ( 'a. neural modules.html#residualattentionblock',
                                                                                          'whisperspeech/modules.py'),
@@ -79,36 +326,103 @@ d = { 'settings': { 'branch': 'master',
                                        'whisperspeech.modules.ResidualAttentionBlock.forward': ( 'a. neural '
                                                                                                  'modules.html#residualattentionblock.forward',
                                                                                                  'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.ResidualAttentionBlock.setup_kv_cache': ( 'a. neural '
+                                                                                                        'modules.html#residualattentionblock.setup_kv_cache',
+                                                                                                        'whisperspeech/modules.py'),
                                        'whisperspeech.modules.Rotary': ('a. neural modules.html#rotary', 'whisperspeech/modules.py'),
                                        'whisperspeech.modules.Rotary.__init__': ( 'a. neural modules.html#rotary.__init__',
                                                                                   'whisperspeech/modules.py'),
                                        'whisperspeech.modules.Rotary.forward': ( 'a. neural modules.html#rotary.forward',
                                                                                  'whisperspeech/modules.py'),
-                                       'whisperspeech.modules.SumDecoder': ( 'a. neural modules.html#sumdecoder',
-                                                                             'whisperspeech/modules.py'),
-                                       'whisperspeech.modules.SumDecoder.__init__': ( 'a. neural modules.html#sumdecoder.__init__',
-                                                                                      'whisperspeech/modules.py'),
-                                       'whisperspeech.modules.SumDecoder.forward': ( 'a. neural modules.html#sumdecoder.forward',
-                                                                                     'whisperspeech/modules.py'),
-                                       'whisperspeech.modules.apply_rotary_pos_emb': ( 'a. neural modules.html#apply_rotary_pos_emb',
-                                                                                       'whisperspeech/modules.py'),
+                                       'whisperspeech.modules._no_init': ('a. neural modules.html#_no_init', 'whisperspeech/modules.py'),
+                                       'whisperspeech.modules._safetensors': ( 'a. neural modules.html#_safetensors',
+                                                                               'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.assign_tensors': ( 'a. neural modules.html#assign_tensors',
+                                                                                 'whisperspeech/modules.py'),
                                        'whisperspeech.modules.init_transformer': ( 'a. neural modules.html#init_transformer',
                                                                                    'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.load_spec': ('a. neural modules.html#load_spec', 'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.load_weights': ( 'a. neural modules.html#load_weights',
+                                                                               'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.quantize_linears': ( 'a. neural modules.html#quantize_linears',
+                                                                                   'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.read_safetensors': ( 'a. neural modules.html#read_safetensors',
+                                                                                   'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.rope_rotate': ( 'a. neural modules.html#rope_rotate',
+                                                                              'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.rope_tables': ( 'a. neural modules.html#rope_tables',
+                                                                              'whisperspeech/modules.py'),
                                        'whisperspeech.modules.rotate_half': ( 'a. neural modules.html#rotate_half',
                                                                               'whisperspeech/modules.py'),
-                                       'whisperspeech.modules.sinusoids': ('a. neural modules.html#sinusoids', 'whisperspeech/modules.py')},
+                                       'whisperspeech.modules.sinusoids': ('a. neural modules.html#sinusoids', 'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.skip_init': ('a. neural modules.html#skip_init', 'whisperspeech/modules.py'),
+                                       'whisperspeech.modules.write_safetensors': ( 'a. neural modules.html#write_safetensors',
+                                                                                    'whisperspeech/modules.py')},
             'whisperspeech.pipeline': { 'whisperspeech.pipeline.Pipeline': ('7. pipeline.html#pipeline', 'whisperspeech/pipeline.py'),
                                         'whisperspeech.pipeline.Pipeline.__init__': ( '7. pipeline.html#pipeline.__init__',
                                                                                       'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline._extract_spk_emb': ( '7. pipeline.html#pipeline._extract_spk_emb',
+                                                                                              'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline._generate_stream': ( '7. pipeline.html#pipeline._generate_stream',
+                                                                                              'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline._load_model': ( '7. pipeline.html#pipeline._load_model',
+                                                                                         'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline._load_vocoder': ( '7. pipeline.html#pipeline._load_vocoder',
+                                                                                           'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline._record': ( '7. pipeline.html#pipeline._record',
+                                                                                     'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline._request': ( '7. pipeline.html#pipeline._request',
+                                                                                      'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline._timed': ( '7. pipeline.html#pipeline._timed',
+                                                                                    'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline._vocode': ( '7. pipeline.html#pipeline._vocode',
+                                                                                     'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline.cache_stats': ( '7. pipeline.html#pipeline.cache_stats',
+                                                                                         'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline.extract_spk_emb': ( '7. pipeline.html#pipeline.extract_spk_emb',
+                                                                                             'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline.from_models': ( '7. pipeline.html#pipeline.from_models',
+                                                                                         'whisperspeech/pipeline.py'),
                                         'whisperspeech.pipeline.Pipeline.generate': ( '7. pipeline.html#pipeline.generate',
                                                                                       'whisperspeech/pipeline.py'),
                                         'whisperspeech.pipeline.Pipeline.generate_atoks': ( '7. pipeline.html#pipeline.generate_atoks',
                                                                                             'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline.generate_atoks_batch': ( '7. '
+                                                                                                  'pipeline.html#pipeline.generate_atoks_batch',
+                                                                                                  'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline.generate_batch': ( '7. pipeline.html#pipeline.generate_batch',
+                                                                                            'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline.generate_long': ( '7. pipeline.html#pipeline.generate_long',
+                                                                                           'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline.generate_stream': ( '7. pipeline.html#pipeline.generate_stream',
+                                                                                             'whisperspeech/pipeline.py'),
                                         'whisperspeech.pipeline.Pipeline.generate_to_file': ( '7. pipeline.html#pipeline.generate_to_file',
                                                                                               'whisperspeech/pipeline.py'),
                                         'whisperspeech.pipeline.Pipeline.generate_to_notebook': ( '7. '
                                                                                                   'pipeline.html#pipeline.generate_to_notebook',
-                                                                                                  'whisperspeech/pipeline.py')},
+                                                                                                  'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline.get_speaker_emb': ( '7. pipeline.html#pipeline.get_speaker_emb',
+                                                                                             'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline.s2a': ( '7. pipeline.html#pipeline.s2a',
+                                                                                 'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline.stream_stoks': ( '7. pipeline.html#pipeline.stream_stoks',
+                                                                                          'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline.t2s': ( '7. pipeline.html#pipeline.t2s',
+                                                                                 'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline.vocoder': ( '7. pipeline.html#pipeline.vocoder',
+                                                                                     'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.Pipeline.wait': ( '7. pipeline.html#pipeline.wait',
+                                                                                  'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline._byte_len': ('7. pipeline.html#_byte_len', 'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline._crossfade_concat': ( '7. pipeline.html#_crossfade_concat',
+                                                                                      'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline._iterate_in_thread': ( '7. pipeline.html#_iterate_in_thread',
+                                                                                       'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline._pack': ('7. pipeline.html#_pack', 'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline._split_piece': ( '7. pipeline.html#_split_piece',
+                                                                                 'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline._timed_iter': ('7. pipeline.html#_timed_iter', 'whisperspeech/pipeline.py'),
+                                        'whisperspeech.pipeline.split_text': ('7. pipeline.html#split_text', 'whisperspeech/pipeline.py')},
             'whisperspeech.prepare_s2a_dataset': { 'whisperspeech.prepare_s2a_dataset.flac_to_s2a_name': ( '4a. s2a dataset '
                                                                                                            'preparation.html#flac_to_s2a_name',
                                                                                                            'whisperspeech/prepare_s2a_dataset.py'),
@@ -315,6 +629,546 @@ d = { 'settings': { 'branch': 'master',
                                                  'whisperspeech.s2a_delar_mup_wds.speaker_id_extractor': ( '4b. semantic to acoustic token '
                                                                                                            'modeling.html#speaker_id_extractor',
                                                                                                            'whisperspeech/s2a_delar_mup_wds.py')},
+            'whisperspeech.s2a_delar_mup_wds_mlang': { 'whisperspeech.s2a_delar_mup_wds_mlang.DelSumEmbedding': ( '4b. multi-language '
+                                                                                                                  'semantic to acoustic '
+                                                                                                                  'token '
+                                                                                                                  'modeling.html#delsumembedding',
+                                                                                                                  'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.DelSumEmbedding.__init__': ( '4b. '
+                                                                                                                           'multi-language '
+                                                                                                                           'semantic to '
+                                                                                                                           'acoustic token '
+                                                                                                                           'modeling.html#delsumembedding.__init__',
+                                                                                                                           'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.DelSumEmbedding.convert_for_eval': ( '4b. '
+                                                                                                                                   'multi-language '
+                                                                                                                                   'semantic '
+                                                                                                                                   'to '
+                                                                                                                                   'acoustic '
+                                                                                                                                   'token '
+                                                                                                                                   'modeling.html#delsumembedding.convert_for_eval',
+                                                                                                                                   'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.DelSumEmbedding.forward': ( '4b. '
+                                                                                                                          'multi-language '
+                                                                                                                          'semantic to '
+                                                                                                                          'acoustic token '
+                                                                                                                          'modeling.html#delsumembedding.forward',
+                                                                                                                          'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.DelSumEmbedding.unembed': ( '4b. '
+                                                                                                                          'multi-language '
+                                                                                                                          'semantic to '
+                                                                                                                          'acoustic token '
+                                                                                                                          'modeling.html#delsumembedding.unembed',
+                                                                                                                          'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.DelSumHead': ( '4b. multi-language semantic '
+                                                                                                             'to acoustic token '
+                                                                                                             'modeling.html#delsumhead',
+                                                                                                             'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.DelSumHead.__init__': ( '4b. multi-language '
+                                                                                                                      'semantic to '
+                                                                                                                      'acoustic token '
+                                                                                                                      'modeling.html#delsumhead.__init__',
+                                                                                                                      'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.DelSumHead.forward': ( '4b. multi-language '
+                                                                                                                     'semantic to acoustic '
+                                                                                                                     'token '
+                                                                                                                     'modeling.html#delsumhead.forward',
+                                                                                                                     'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.MultiTokenHead': ( '4b. multi-language '
+                                                                                                                 'semantic to acoustic '
+                                                                                                                 'token '
+                                                                                                                 'modeling.html#multitokenhead',
+                                                                                                                 'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.MultiTokenHead.__init__': ( '4b. '
+                                                                                                                          'multi-language '
+                                                                                                                          'semantic to '
+                                                                                                                          'acoustic token '
+                                                                                                                          'modeling.html#multitokenhead.__init__',
+                                                                                                                          'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.MultiTokenHead.forward': ( '4b. '
+                                                                                                                         'multi-language '
+                                                                                                                         'semantic to '
+                                                                                                                         'acoustic token '
+                                                                                                                         'modeling.html#multitokenhead.forward',
+                                                                                                                         'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer': ( '4b. multi-language '
+                                                                                                                     'semantic to acoustic '
+                                                                                                                     'token '
+                                                                                                                     'modeling.html#sadelartransformer',
+                                                                                                                     'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.__init__': ( '4b. '
+                                                                                                                              'multi-language '
+                                                                                                                              'semantic to '
+                                                                                                                              'acoustic '
+                                                                                                                              'token '
+                                                                                                                              'modeling.html#sadelartransformer.__init__',
+                                                                                                                              'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer._encoder': ( '4b. '
+                                                                                                                              'multi-language '
+                                                                                                                              'semantic to '
+                                                                                                                              'acoustic '
+                                                                                                                              'token '
+                                                                                                                              'modeling.html#sadelartransformer._encoder',
+                                                                                                                              'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer._frames': ( '4b. '
+                                                                                                                             'multi-language '
+                                                                                                                             'semantic to '
+                                                                                                                             'acoustic '
+                                                                                                                             'token '
+                                                                                                                             'modeling.html#sadelartransformer._frames',
+                                                                                                                             'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer._head': ( '4b. '
+                                                                                                                           'multi-language '
+                                                                                                                           'semantic to '
+                                                                                                                           'acoustic token '
+                                                                                                                           'modeling.html#sadelartransformer._head',
+                                                                                                                           'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer._noise': ( '4b. '
+                                                                                                                            'multi-language '
+                                                                                                                            'semantic to '
+                                                                                                                            'acoustic '
+                                                                                                                            'token '
+                                                                                                                            'modeling.html#sadelartransformer._noise',
+                                                                                                                            'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.convert_for_eval': ( '4b. '
+                                                                                                                                      'multi-language '
+                                                                                                                                      'semantic '
+                                                                                                                                      'to '
+                                                                                                                                      'acoustic '
+                                                                                                                                      'token '
+                                                                                                                                      'modeling.html#sadelartransformer.convert_for_eval',
+                                                                                                                                      'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.device': ( '4b. '
+                                                                                                                            'multi-language '
+                                                                                                                            'semantic to '
+                                                                                                                            'acoustic '
+                                                                                                                            'token '
+                                                                                                                            'modeling.html#sadelartransformer.device',
+                                                                                                                            'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.embed_stoks': ( '4b. '
+                                                                                                                                 'multi-language '
+                                                                                                                                 'semantic '
+                                                                                                                                 'to '
+                                                                                                                                 'acoustic '
+                                                                                                                                 'token '
+                                                                                                                                 'modeling.html#sadelartransformer.embed_stoks',
+                                                                                                                                 'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.forward': ( '4b. '
+                                                                                                                             'multi-language '
+                                                                                                                             'semantic to '
+                                                                                                                             'acoustic '
+                                                                                                                             'token '
+                                                                                                                             'modeling.html#sadelartransformer.forward',
+                                                                                                                             'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.generate': ( '4b. '
+                                                                                                                              'multi-language '
+                                                                                                                              'semantic to '
+                                                                                                                              'acoustic '
+                                                                                                                              'token '
+                                                                                                                              'modeling.html#sadelartransformer.generate',
+                                                                                                                              'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.generate_batch': ( '4b. '
+                                                                                                                                    'multi-language '
+                                                                                                                                    'semantic '
+                                                                                                                                    'to '
+                                                                                                                                    'acoustic '
+                                                                                                                                    'token '
+                                                                                                                                    'modeling.html#sadelartransformer.generate_batch',
+                                                                                                                                    'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.generate_chunks': ( '4b. '
+                                                                                                                                     'multi-language '
+                                                                                                                                     'semantic '
+                                                                                                                                     'to '
+                                                                                                                                     'acoustic '
+                                                                                                                                     'token '
+                                                                                                                                     'modeling.html#sadelartransformer.generate_chunks',
+                                                                                                                                     'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.generate_incremental': ( '4b. '
+                                                                                                                                          'multi-language '
+                                                                                                                                          'semantic '
+                                                                                                                                          'to '
+                                                                                                                                          'acoustic '
+                                                                                                                                          'token '
+                                                                                                                                          'modeling.html#sadelartransformer.generate_incremental',
+                                                                                                                                          'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.generate_multitoken': ( '4b. '
+                                                                                                                                         'multi-language '
+                                                                                                                                         'semantic '
+                                                                                                                                         'to '
+                                                                                                                                         'acoustic '
+                                                                                                                                         'token '
+                                                                                                                                         'modeling.html#sadelartransformer.generate_multitoken',
+                                                                                                                                         'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.generate_next': ( '4b. '
+                                                                                                                                   'multi-language '
+                                                                                                                                   'semantic '
+                                                                                                                                   'to '
+                                                                                                                                   'acoustic '
+                                                                                                                                   'token '
+                                                                                                                                   'modeling.html#sadelartransformer.generate_next',
+                                                                                                                                   'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.generate_one': ( '4b. '
+                                                                                                                                  'multi-language '
+                                                                                                                                  'semantic '
+                                                                                                                                  'to '
+                                                                                                                                  'acoustic '
+                                                                                                                                  'token '
+                                                                                                                                  'modeling.html#sadelartransformer.generate_one',
+                                                                                                                                  'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.get_extra_state': ( '4b. '
+                                                                                                                                     'multi-language '
+                                                                                                                                     'semantic '
+                                                                                                                                     'to '
+                                                                                                                                     'acoustic '
+                                                                                                                                     'token '
+                                                                                                                                     'modeling.html#sadelartransformer.get_extra_state',
+                                                                                                                                     'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.get_metrics': ( '4b. '
+                                                                                                                                 'multi-language '
+                                                                                                                                 'semantic '
+                                                                                                                                 'to '
+                                                                                                                                 'acoustic '
+                                                                                                                                 'token '
+                                                                                                                                 'modeling.html#sadelartransformer.get_metrics',
+                                                                                                                                 'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.init_transformer': ( '4b. '
+                                                                                                                                      'multi-language '
+                                                                                                                                      'semantic '
+                                                                                                                                      'to '
+                                                                                                                                      'acoustic '
+                                                                                                                                      'token '
+                                                                                                                                      'modeling.html#sadelartransformer.init_transformer',
+                                                                                                                                      'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.load_checkpoint': ( '4b. '
+                                                                                                                                     'multi-language '
+                                                                                                                                     'semantic '
+                                                                                                                                     'to '
+                                                                                                                                     'acoustic '
+                                                                                                                                     'token '
+                                                                                                                                     'modeling.html#sadelartransformer.load_checkpoint',
+                                                                                                                                     'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.load_frozen_acoustic_embeddings': ( '4b. '
+                                                                                                                                                     'multi-language '
+                                                                                                                                                     'semantic '
+                                                                                                                                                     'to '
+                                                                                                                                                     'acoustic '
+                                                                                                                                                     'token '
+                                                                                                                                                     'modeling.html#sadelartransformer.load_frozen_acoustic_embeddings',
+                                                                                                                                                     'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.load_frozen_semantic_embeddings': ( '4b. '
+                                                                                                                                                     'multi-language '
+                                                                                                                                                     'semantic '
+                                                                                                                                                     'to '
+                                                                                                                                                     'acoustic '
+                                                                                                                                                     'token '
+                                                                                                                                                     'modeling.html#sadelartransformer.load_frozen_semantic_embeddings',
+                                                                                                                                                     'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.load_model': ( '4b. '
+                                                                                                                                'multi-language '
+                                                                                                                                'semantic '
+                                                                                                                                'to '
+                                                                                                                                'acoustic '
+                                                                                                                                'token '
+                                                                                                                                'modeling.html#sadelartransformer.load_model',
+                                                                                                                                'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.logits_to_probs': ( '4b. '
+                                                                                                                                     'multi-language '
+                                                                                                                                     'semantic '
+                                                                                                                                     'to '
+                                                                                                                                     'acoustic '
+                                                                                                                                     'token '
+                                                                                                                                     'modeling.html#sadelartransformer.logits_to_probs',
+                                                                                                                                     'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.multinomial_sample_one_no_sync': ( '4b. '
+                                                                                                                                                    'multi-language '
+                                                                                                                                                    'semantic '
+                                                                                                                                                    'to '
+                                                                                                                                                    'acoustic '
+                                                                                                                                                    'token '
+                                                                                                                                                    'modeling.html#sadelartransformer.multinomial_sample_one_no_sync',
+                                                                                                                                                    'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.optimize': ( '4b. '
+                                                                                                                              'multi-language '
+                                                                                                                              'semantic to '
+                                                                                                                              'acoustic '
+                                                                                                                              'token '
+                                                                                                                              'modeling.html#sadelartransformer.optimize',
+                                                                                                                              'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.run_encoder': ( '4b. '
+                                                                                                                                 'multi-language '
+                                                                                                                                 'semantic '
+                                                                                                                                 'to '
+                                                                                                                                 'acoustic '
+                                                                                                                                 'token '
+                                                                                                                                 'modeling.html#sadelartransformer.run_encoder',
+                                                                                                                                 'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.sample': ( '4b. '
+                                                                                                                            'multi-language '
+                                                                                                                            'semantic to '
+                                                                                                                            'acoustic '
+                                                                                                                            'token '
+                                                                                                                            'modeling.html#sadelartransformer.sample',
+                                                                                                                            'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.save_model': ( '4b. '
+                                                                                                                                'multi-language '
+                                                                                                                                'semantic '
+                                                                                                                                'to '
+                                                                                                                                'acoustic '
+                                                                                                                                'token '
+                                                                                                                                'modeling.html#sadelartransformer.save_model',
+                                                                                                                                'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.set_extra_state': ( '4b. '
+                                                                                                                                     'multi-language '
+                                                                                                                                     'semantic '
+                                                                                                                                     'to '
+                                                                                                                                     'acoustic '
+                                                                                                                                     'token '
+                                                                                                                                     'modeling.html#sadelartransformer.set_extra_state',
+                                                                                                                                     'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.setup': ( '4b. '
+                                                                                                                           'multi-language '
+                                                                                                                           'semantic to '
+                                                                                                                           'acoustic token '
+                                                                                                                           'modeling.html#sadelartransformer.setup',
+                                                                                                                           'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.SADelARTransformer.switch_dtypes': ( '4b. '
+                                                                                                                                   'multi-language '
+                                                                                                                                   'semantic '
+                                                                                                                                   'to '
+                                                                                                                                   'acoustic '
+                                                                                                                                   'token '
+                                                                                                                                   'modeling.html#sadelartransformer.switch_dtypes',
+                                                                                                                                   'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.Tunables': ( '4b. multi-language semantic to '
+                                                                                                           'acoustic token '
+                                                                                                           'modeling.html#tunables',
+                                                                                                           'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.Tunables.__post_init__': ( '4b. '
+                                                                                                                         'multi-language '
+                                                                                                                         'semantic to '
+                                                                                                                         'acoustic token '
+                                                                                                                         'modeling.html#tunables.__post_init__',
+                                                                                                                         'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.Tunables.upgrade': ( '4b. multi-language '
+                                                                                                                   'semantic to acoustic '
+                                                                                                                   'token '
+                                                                                                                   'modeling.html#tunables.upgrade',
+                                                                                                                   'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang._make_model': ( '4b. multi-language semantic '
+                                                                                                              'to acoustic token '
+                                                                                                              'modeling.html#_make_model',
+                                                                                                              'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.delay_atoks': ( '4b. multi-language semantic '
+                                                                                                              'to acoustic token '
+                                                                                                              'modeling.html#delay_atoks',
+                                                                                                              'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.load_dataset': ( '4b. multi-language '
+                                                                                                               'semantic to acoustic token '
+                                                                                                               'modeling.html#load_dataset',
+                                                                                                               'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.make_model': ( '4b. multi-language semantic '
+                                                                                                             'to acoustic token '
+                                                                                                             'modeling.html#make_model',
+                                                                                                             'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.make_speaker_map': ( '4b. multi-language '
+                                                                                                                   'semantic to acoustic '
+                                                                                                                   'token '
+                                                                                                                   'modeling.html#make_speaker_map',
+                                                                                                                   'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.pad_samples': ( '4b. multi-language semantic '
+                                                                                                              'to acoustic token '
+                                                                                                              'modeling.html#pad_samples',
+                                                                                                              'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.rand': ( '4b. multi-language semantic to '
+                                                                                                       'acoustic token modeling.html#rand',
+                                                                                                       'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.random_trunc': ( '4b. multi-language '
+                                                                                                               'semantic to acoustic token '
+                                                                                                               'modeling.html#random_trunc',
+                                                                                                               'whisperspeech/s2a_delar_mup_wds_mlang.py'),
+                                                       'whisperspeech.s2a_delar_mup_wds_mlang.speaker_id_extractor': ( '4b. multi-language '
+                                                                                                                       'semantic to '
+                                                                                                                       'acoustic token '
+                                                                                                                       'modeling.html#speaker_id_extractor',
+                                                                                                                       'whisperspeech/s2a_delar_mup_wds_mlang.py')},
+            'whisperspeech.sampling': { 'whisperspeech.sampling.StopFlags': ('g. sampling.html#stopflags', 'whisperspeech/sampling.py'),
+                                        'whisperspeech.sampling.StopFlags.__init__': ( 'g. sampling.html#stopflags.__init__',
+                                                                                       'whisperspeech/sampling.py'),
+                                        'whisperspeech.sampling.StopFlags.poll': ( 'g. sampling.html#stopflags.poll',
+                                                                                   'whisperspeech/sampling.py'),
+                                        'whisperspeech.sampling.StopFlags.reset': ( 'g. sampling.html#stopflags.reset',
+                                                                                    'whisperspeech/sampling.py'),
+                                        'whisperspeech.sampling.StopFlags.select': ( 'g. sampling.html#stopflags.select',
+                                                                                     'whisperspeech/sampling.py'),
+                                        'whisperspeech.sampling.StopFlags.stats': ( 'g. sampling.html#stopflags.stats',
+                                                                                    'whisperspeech/sampling.py'),
+                                        'whisperspeech.sampling.StopFlags.update': ( 'g. sampling.html#stopflags.update',
+                                                                                     'whisperspeech/sampling.py'),
+                                        'whisperspeech.sampling._exponential': ( 'g. sampling.html#_exponential',
+                                                                                 'whisperspeech/sampling.py'),
+                                        'whisperspeech.sampling._per_row': ('g. sampling.html#_per_row', 'whisperspeech/sampling.py'),
+                                        'whisperspeech.sampling.filter_logits': ( 'g. sampling.html#filter_logits',
+                                                                                  'whisperspeech/sampling.py'),
+                                        'whisperspeech.sampling.is_greedy': ('g. sampling.html#is_greedy', 'whisperspeech/sampling.py'),
+                                        'whisperspeech.sampling.logits_to_probs': ( 'g. sampling.html#logits_to_probs',
+                                                                                    'whisperspeech/sampling.py'),
+                                        'whisperspeech.sampling.make_generator': ( 'g. sampling.html#make_generator',
+                                                                                   'whisperspeech/sampling.py'),
+                                        'whisperspeech.sampling.row_generators': ( 'g. sampling.html#row_generators',
+                                                                                   'whisperspeech/sampling.py'),
+                                        'whisperspeech.sampling.row_seeds': ('g. sampling.html#row_seeds', 'whisperspeech/sampling.py'),
+                                        'whisperspeech.sampling.sample': ('g. sampling.html#sample', 'whisperspeech/sampling.py'),
+                                        'whisperspeech.sampling.sample_probs': ( 'g. sampling.html#sample_probs',
+                                                                                 'whisperspeech/sampling.py'),
+                                        'whisperspeech.sampling.select_rows': ('g. sampling.html#select_rows', 'whisperspeech/sampling.py'),
+                                        'whisperspeech.sampling.split_seed': ('g. sampling.html#split_seed', 'whisperspeech/sampling.py'),
+                                        'whisperspeech.sampling.uniform_noise': ( 'g. sampling.html#uniform_noise',
+                                                                                  'whisperspeech/sampling.py')},
+            'whisperspeech.scheduler': { 'whisperspeech.scheduler.DecodeScheduler': ( '8. continuous batching.html#decodescheduler',
+                                                                                      'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.DecodeScheduler.__init__': ( '8. continuous '
+                                                                                               'batching.html#decodescheduler.__init__',
+                                                                                               'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.DecodeScheduler._admit': ( '8. continuous '
+                                                                                             'batching.html#decodescheduler._admit',
+                                                                                             'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.DecodeScheduler._loop': ( '8. continuous '
+                                                                                            'batching.html#decodescheduler._loop',
+                                                                                            'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.DecodeScheduler._noise': ( '8. continuous '
+                                                                                             'batching.html#decodescheduler._noise',
+                                                                                             'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.DecodeScheduler._retire': ( '8. continuous '
+                                                                                              'batching.html#decodescheduler._retire',
+                                                                                              'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.DecodeScheduler._set_sampling': ( '8. continuous '
+                                                                                                    'batching.html#decodescheduler._set_sampling',
+                                                                                                    'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.DecodeScheduler.active': ( '8. continuous '
+                                                                                             'batching.html#decodescheduler.active',
+                                                                                             'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.DecodeScheduler.decode_step': ( '8. continuous '
+                                                                                                  'batching.html#decodescheduler.decode_step',
+                                                                                                  'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.DecodeScheduler.prefill': ( '8. continuous '
+                                                                                              'batching.html#decodescheduler.prefill',
+                                                                                              'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.DecodeScheduler.result': ( '8. continuous '
+                                                                                             'batching.html#decodescheduler.result',
+                                                                                             'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.DecodeScheduler.run_until_idle': ( '8. continuous '
+                                                                                                     'batching.html#decodescheduler.run_until_idle',
+                                                                                                     'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.DecodeScheduler.start': ( '8. continuous '
+                                                                                            'batching.html#decodescheduler.start',
+                                                                                            'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.DecodeScheduler.step': ( '8. continuous '
+                                                                                           'batching.html#decodescheduler.step',
+                                                                                           'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.DecodeScheduler.stop': ( '8. continuous '
+                                                                                           'batching.html#decodescheduler.stop',
+                                                                                           'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.DecodeScheduler.submit': ( '8. continuous '
+                                                                                             'batching.html#decodescheduler.submit',
+                                                                                             'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.S2AScheduler': ( '8. continuous batching.html#s2ascheduler',
+                                                                                   'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.S2AScheduler.__init__': ( '8. continuous '
+                                                                                            'batching.html#s2ascheduler.__init__',
+                                                                                            'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.S2AScheduler.decode_step': ( '8. continuous '
+                                                                                               'batching.html#s2ascheduler.decode_step',
+                                                                                               'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.S2AScheduler.prefill': ( '8. continuous '
+                                                                                           'batching.html#s2ascheduler.prefill',
+                                                                                           'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.S2AScheduler.result': ( '8. continuous batching.html#s2ascheduler.result',
+                                                                                          'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.T2SScheduler': ( '8. continuous batching.html#t2sscheduler',
+                                                                                   'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.T2SScheduler.__init__': ( '8. continuous '
+                                                                                            'batching.html#t2sscheduler.__init__',
+                                                                                            'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.T2SScheduler.decode_step': ( '8. continuous '
+                                                                                               'batching.html#t2sscheduler.decode_step',
+                                                                                               'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.T2SScheduler.prefill': ( '8. continuous '
+                                                                                           'batching.html#t2sscheduler.prefill',
+                                                                                           'whisperspeech/scheduler.py'),
+                                         'whisperspeech.scheduler.T2SScheduler.result': ( '8. continuous batching.html#t2sscheduler.result',
+                                                                                          'whisperspeech/scheduler.py')},
+            'whisperspeech.server': { 'whisperspeech.server.TTSServer': ('i. server.html#ttsserver', 'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer.__init__': ( 'i. server.html#ttsserver.__init__',
+                                                                                   'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer._batcher': ( 'i. server.html#ttsserver._batcher',
+                                                                                   'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer._deliver': ( 'i. server.html#ttsserver._deliver',
+                                                                                   'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer._fail': ('i. server.html#ttsserver._fail', 'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer._finish': ( 'i. server.html#ttsserver._finish',
+                                                                                  'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer._handle': ( 'i. server.html#ttsserver._handle',
+                                                                                  'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer._http_tts': ( 'i. server.html#ttsserver._http_tts',
+                                                                                    'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer._parse_params': ( 'i. server.html#ttsserver._parse_params',
+                                                                                        'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer._read_request': ( 'i. server.html#ttsserver._read_request',
+                                                                                        'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer._record': ( 'i. server.html#ttsserver._record',
+                                                                                  'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer._respond': ( 'i. server.html#ttsserver._respond',
+                                                                                   'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer._run': ('i. server.html#ttsserver._run', 'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer._run_batch': ( 'i. server.html#ttsserver._run_batch',
+                                                                                     'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer._run_stream': ( 'i. server.html#ttsserver._run_stream',
+                                                                                      'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer._speaker': ( 'i. server.html#ttsserver._speaker',
+                                                                                   'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer._stage': ( 'i. server.html#ttsserver._stage',
+                                                                                 'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer._submit': ( 'i. server.html#ttsserver._submit',
+                                                                                  'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer._websocket': ( 'i. server.html#ttsserver._websocket',
+                                                                                     'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer.serve_forever': ( 'i. server.html#ttsserver.serve_forever',
+                                                                                        'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer.start': ('i. server.html#ttsserver.start', 'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer.stats': ('i. server.html#ttsserver.stats', 'whisperspeech/server.py'),
+                                      'whisperspeech.server.TTSServer.stop': ('i. server.html#ttsserver.stop', 'whisperspeech/server.py'),
+                                      'whisperspeech.server._Cancelled': ('i. server.html#_cancelled', 'whisperspeech/server.py'),
+                                      'whisperspeech.server._HTTPError': ('i. server.html#_httperror', 'whisperspeech/server.py'),
+                                      'whisperspeech.server._HTTPError.__init__': ( 'i. server.html#_httperror.__init__',
+                                                                                    'whisperspeech/server.py'),
+                                      'whisperspeech.server._Job': ('i. server.html#_job', 'whisperspeech/server.py'),
+                                      'whisperspeech.server._Job.__init__': ('i. server.html#_job.__init__', 'whisperspeech/server.py'),
+                                      'whisperspeech.server._Job.cancel': ('i. server.html#_job.cancel', 'whisperspeech/server.py'),
+                                      'whisperspeech.server._Job.send': ('i. server.html#_job.send', 'whisperspeech/server.py'),
+                                      'whisperspeech.server._Sink': ('i. server.html#_sink', 'whisperspeech/server.py'),
+                                      'whisperspeech.server._Sink.__init__': ('i. server.html#_sink.__init__', 'whisperspeech/server.py'),
+                                      'whisperspeech.server._Sink.write': ('i. server.html#_sink.write', 'whisperspeech/server.py'),
+                                      'whisperspeech.server._Timer': ('i. server.html#_timer', 'whisperspeech/server.py'),
+                                      'whisperspeech.server._Timer.__init__': ('i. server.html#_timer.__init__', 'whisperspeech/server.py'),
+                                      'whisperspeech.server._Timer.wrap': ('i. server.html#_timer.wrap', 'whisperspeech/server.py'),
+                                      'whisperspeech.server._WebSocket': ('i. server.html#_websocket', 'whisperspeech/server.py'),
+                                      'whisperspeech.server._WebSocket.__init__': ( 'i. server.html#_websocket.__init__',
+                                                                                    'whisperspeech/server.py'),
+                                      'whisperspeech.server._WebSocket._send_frame': ( 'i. server.html#_websocket._send_frame',
+                                                                                       'whisperspeech/server.py'),
+                                      'whisperspeech.server._WebSocket.accept_key': ( 'i. server.html#_websocket.accept_key',
+                                                                                      'whisperspeech/server.py'),
+                                      'whisperspeech.server._WebSocket.close': ( 'i. server.html#_websocket.close',
+                                                                                 'whisperspeech/server.py'),
+                                      'whisperspeech.server._WebSocket.receive': ( 'i. server.html#_websocket.receive',
+                                                                                   'whisperspeech/server.py'),
+                                      'whisperspeech.server._WebSocket.send': ('i. server.html#_websocket.send', 'whisperspeech/server.py'),
+                                      'whisperspeech.server._WebSocket.send_json': ( 'i. server.html#_websocket.send_json',
+                                                                                     'whisperspeech/server.py'),
+                                      'whisperspeech.server._micro_pipeline': ('i. server.html#_micro_pipeline', 'whisperspeech/server.py'),
+                                      'whisperspeech.server._server_timing': ('i. server.html#_server_timing', 'whisperspeech/server.py'),
+                                      'whisperspeech.server._unmask': ('i. server.html#_unmask', 'whisperspeech/server.py'),
+                                      'whisperspeech.server.main': ('i. server.html#main', 'whisperspeech/server.py')},
             'whisperspeech.t2s_up_wds': { 'whisperspeech.t2s_up_wds.CharTokenizer': ( '5b. text to semantic token '
                                                                                       'modeling.html#chartokenizer',
                                                                                       'whisperspeech/t2s_up_wds.py'),
@@ -410,6 +1264,289 @@ d = { 'settings': { 'branch': 'master',
                                                                                              'whisperspeech/t2s_up_wds.py'),
                                           'whisperspeech.t2s_up_wds.tokenizer': ( '5b. text to semantic token modeling.html#tokenizer',
                                                                                   'whisperspeech/t2s_up_wds.py')},
+            'whisperspeech.t2s_up_wds_mlang_enclm': { 'whisperspeech.t2s_up_wds_mlang_enclm.CharTokenizer': ( '5b. multi-lang text to '
+                                                                                                              'semantic token '
+                                                                                                              'modeling.html#chartokenizer',
+                                                                                                              'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.CharTokenizer.decode': ( '5b. multi-lang text '
+                                                                                                                     'to semantic token '
+                                                                                                                     'modeling.html#chartokenizer.decode',
+                                                                                                                     'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.CharTokenizer.encode': ( '5b. multi-lang text '
+                                                                                                                     'to semantic token '
+                                                                                                                     'modeling.html#chartokenizer.encode',
+                                                                                                                     'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.Encoder': ( '5b. multi-lang text to semantic '
+                                                                                                        'token modeling.html#encoder',
+                                                                                                        'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.Encoder.__init__': ( '5b. multi-lang text to '
+                                                                                                                 'semantic token '
+                                                                                                                 'modeling.html#encoder.__init__',
+                                                                                                                 'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.Encoder.forward': ( '5b. multi-lang text to '
+                                                                                                                'semantic token '
+                                                                                                                'modeling.html#encoder.forward',
+                                                                                                                'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.T2SEmbedding': ( '5b. multi-lang text to '
+                                                                                                             'semantic token '
+                                                                                                             'modeling.html#t2sembedding',
+                                                                                                             'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.T2SEmbedding.__init__': ( '5b. multi-lang text '
+                                                                                                                      'to semantic token '
+                                                                                                                      'modeling.html#t2sembedding.__init__',
+                                                                                                                      'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.T2SEmbedding.forward': ( '5b. multi-lang text '
+                                                                                                                     'to semantic token '
+                                                                                                                     'modeling.html#t2sembedding.forward',
+                                                                                                                     'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer': ( '5b. multi-lang text to '
+                                                                                                                'semantic token '
+                                                                                                                'modeling.html#tsartransformer',
+                                                                                                                'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.__init__': ( '5b. multi-lang '
+                                                                                                                         'text to semantic '
+                                                                                                                         'token '
+                                                                                                                         'modeling.html#tsartransformer.__init__',
+                                                                                                                         'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer._decode': ( '5b. multi-lang '
+                                                                                                                        'text to semantic '
+                                                                                                                        'token '
+                                                                                                                        'modeling.html#tsartransformer._decode',
+                                                                                                                        'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer._embed_cps': ( '5b. multi-lang '
+                                                                                                                           'text to '
+                                                                                                                           'semantic token '
+                                                                                                                           'modeling.html#tsartransformer._embed_cps',
+                                                                                                                           'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer._generate_batch': ( '5b. '
+                                                                                                                                'multi-lang '
+                                                                                                                                'text to '
+                                                                                                                                'semantic '
+                                                                                                                                'token '
+                                                                                                                                'modeling.html#tsartransformer._generate_batch',
+                                                                                                                                'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer._noise': ( '5b. multi-lang '
+                                                                                                                       'text to semantic '
+                                                                                                                       'token '
+                                                                                                                       'modeling.html#tsartransformer._noise',
+                                                                                                                       'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer._output_key': ( '5b. '
+                                                                                                                            'multi-lang '
+                                                                                                                            'text to '
+                                                                                                                            'semantic '
+                                                                                                                            'token '
+                                                                                                                            'modeling.html#tsartransformer._output_key',
+                                                                                                                            'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer._sampling_key': ( '5b. '
+                                                                                                                              'multi-lang '
+                                                                                                                              'text to '
+                                                                                                                              'semantic '
+                                                                                                                              'token '
+                                                                                                                              'modeling.html#tsartransformer._sampling_key',
+                                                                                                                              'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.cache_stats': ( '5b. '
+                                                                                                                            'multi-lang '
+                                                                                                                            'text to '
+                                                                                                                            'semantic '
+                                                                                                                            'token '
+                                                                                                                            'modeling.html#tsartransformer.cache_stats',
+                                                                                                                            'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.convert_for_eval': ( '5b. '
+                                                                                                                                 'multi-lang '
+                                                                                                                                 'text to '
+                                                                                                                                 'semantic '
+                                                                                                                                 'token '
+                                                                                                                                 'modeling.html#tsartransformer.convert_for_eval',
+                                                                                                                                 'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.device': ( '5b. multi-lang '
+                                                                                                                       'text to semantic '
+                                                                                                                       'token '
+                                                                                                                       'modeling.html#tsartransformer.device',
+                                                                                                                       'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.encode': ( '5b. multi-lang '
+                                                                                                                       'text to semantic '
+                                                                                                                       'token '
+                                                                                                                       'modeling.html#tsartransformer.encode',
+                                                                                                                       'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.ensure_tokenizer': ( '5b. '
+                                                                                                                                 'multi-lang '
+                                                                                                                                 'text to '
+                                                                                                                                 'semantic '
+                                                                                                                                 'token '
+                                                                                                                                 'modeling.html#tsartransformer.ensure_tokenizer',
+                                                                                                                                 'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.forward': ( '5b. multi-lang '
+                                                                                                                        'text to semantic '
+                                                                                                                        'token '
+                                                                                                                        'modeling.html#tsartransformer.forward',
+                                                                                                                        'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.generate': ( '5b. multi-lang '
+                                                                                                                         'text to semantic '
+                                                                                                                         'token '
+                                                                                                                         'modeling.html#tsartransformer.generate',
+                                                                                                                         'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.generate_batch': ( '5b. '
+                                                                                                                               'multi-lang '
+                                                                                                                               'text to '
+                                                                                                                               'semantic '
+                                                                                                                               'token '
+                                                                                                                               'modeling.html#tsartransformer.generate_batch',
+                                                                                                                               'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.generate_chunks': ( '5b. '
+                                                                                                                                'multi-lang '
+                                                                                                                                'text to '
+                                                                                                                                'semantic '
+                                                                                                                                'token '
+                                                                                                                                'modeling.html#tsartransformer.generate_chunks',
+                                                                                                                                'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.generate_next': ( '5b. '
+                                                                                                                              'multi-lang '
+                                                                                                                              'text to '
+                                                                                                                              'semantic '
+                                                                                                                              'token '
+                                                                                                                              'modeling.html#tsartransformer.generate_next',
+                                                                                                                              'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.generate_one': ( '5b. '
+                                                                                                                             'multi-lang '
+                                                                                                                             'text to '
+                                                                                                                             'semantic '
+                                                                                                                             'token '
+                                                                                                                             'modeling.html#tsartransformer.generate_one',
+                                                                                                                             'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.generate_speculative': ( '5b. '
+                                                                                                                                     'multi-lang '
+                                                                                                                                     'text '
+                                                                                                                                     'to '
+                                                                                                                                     'semantic '
+                                                                                                                                     'token '
+                                                                                                                                     'modeling.html#tsartransformer.generate_speculative',
+                                                                                                                                     'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.init_transformer': ( '5b. '
+                                                                                                                                 'multi-lang '
+                                                                                                                                 'text to '
+                                                                                                                                 'semantic '
+                                                                                                                                 'token '
+                                                                                                                                 'modeling.html#tsartransformer.init_transformer',
+                                                                                                                                 'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.load_checkpoint': ( '5b. '
+                                                                                                                                'multi-lang '
+                                                                                                                                'text to '
+                                                                                                                                'semantic '
+                                                                                                                                'token '
+                                                                                                                                'modeling.html#tsartransformer.load_checkpoint',
+                                                                                                                                'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.load_frozen_semantic_embeddings': ( '5b. '
+                                                                                                                                                'multi-lang '
+                                                                                                                                                'text '
+                                                                                                                                                'to '
+                                                                                                                                                'semantic '
+                                                                                                                                                'token '
+                                                                                                                                                'modeling.html#tsartransformer.load_frozen_semantic_embeddings',
+                                                                                                                                                'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.load_model': ( '5b. multi-lang '
+                                                                                                                           'text to '
+                                                                                                                           'semantic token '
+                                                                                                                           'modeling.html#tsartransformer.load_model',
+                                                                                                                           'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.logits_to_probs': ( '5b. '
+                                                                                                                                'multi-lang '
+                                                                                                                                'text to '
+                                                                                                                                'semantic '
+                                                                                                                                'token '
+                                                                                                                                'modeling.html#tsartransformer.logits_to_probs',
+                                                                                                                                'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.multinomial_sample_one_no_sync': ( '5b. '
+                                                                                                                                               'multi-lang '
+                                                                                                                                               'text '
+                                                                                                                                               'to '
+                                                                                                                                               'semantic '
+                                                                                                                                               'token '
+                                                                                                                                               'modeling.html#tsartransformer.multinomial_sample_one_no_sync',
+                                                                                                                                               'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.optimize': ( '5b. multi-lang '
+                                                                                                                         'text to semantic '
+                                                                                                                         'token '
+                                                                                                                         'modeling.html#tsartransformer.optimize',
+                                                                                                                         'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.prep': ( '5b. multi-lang text '
+                                                                                                                     'to semantic token '
+                                                                                                                     'modeling.html#tsartransformer.prep',
+                                                                                                                     'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.prep_batch_item': ( '5b. '
+                                                                                                                                'multi-lang '
+                                                                                                                                'text to '
+                                                                                                                                'semantic '
+                                                                                                                                'token '
+                                                                                                                                'modeling.html#tsartransformer.prep_batch_item',
+                                                                                                                                'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.run_encoder': ( '5b. '
+                                                                                                                            'multi-lang '
+                                                                                                                            'text to '
+                                                                                                                            'semantic '
+                                                                                                                            'token '
+                                                                                                                            'modeling.html#tsartransformer.run_encoder',
+                                                                                                                            'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.sample': ( '5b. multi-lang '
+                                                                                                                       'text to semantic '
+                                                                                                                       'token '
+                                                                                                                       'modeling.html#tsartransformer.sample',
+                                                                                                                       'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.save_model': ( '5b. multi-lang '
+                                                                                                                           'text to '
+                                                                                                                           'semantic token '
+                                                                                                                           'modeling.html#tsartransformer.save_model',
+                                                                                                                           'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.setup': ( '5b. multi-lang text '
+                                                                                                                      'to semantic token '
+                                                                                                                      'modeling.html#tsartransformer.setup',
+                                                                                                                      'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.setup_caches': ( '5b. '
+                                                                                                                             'multi-lang '
+                                                                                                                             'text to '
+                                                                                                                             'semantic '
+                                                                                                                             'token '
+                                                                                                                             'modeling.html#tsartransformer.setup_caches',
+                                                                                                                             'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.TSARTransformer.switch_dtypes': ( '5b. '
+                                                                                                                              'multi-lang '
+                                                                                                                              'text to '
+                                                                                                                              'semantic '
+                                                                                                                              'token '
+                                                                                                                              'modeling.html#tsartransformer.switch_dtypes',
+                                                                                                                              'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.Tunables': ( '5b. multi-lang text to semantic '
+                                                                                                         'token modeling.html#tunables',
+                                                                                                         'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.Tunables.__post_init__': ( '5b. multi-lang '
+                                                                                                                       'text to semantic '
+                                                                                                                       'token '
+                                                                                                                       'modeling.html#tunables.__post_init__',
+                                                                                                                       'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm._make_model': ( '5b. multi-lang text to '
+                                                                                                            'semantic token '
+                                                                                                            'modeling.html#_make_model',
+                                                                                                            'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.ar_padder': ( '5b. multi-lang text to semantic '
+                                                                                                          'token modeling.html#ar_padder',
+                                                                                                          'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.char_per_seconder': ( '5b. multi-lang text to '
+                                                                                                                  'semantic token '
+                                                                                                                  'modeling.html#char_per_seconder',
+                                                                                                                  'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.load_dataset': ( '5b. multi-lang text to '
+                                                                                                             'semantic token '
+                                                                                                             'modeling.html#load_dataset',
+                                                                                                             'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.make_model': ( '5b. multi-lang text to '
+                                                                                                           'semantic token '
+                                                                                                           'modeling.html#make_model',
+                                                                                                           'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.rand': ( '5b. multi-lang text to semantic '
+                                                                                                     'token modeling.html#rand',
+                                                                                                     'whisperspeech/t2s_up_wds_mlang_enclm.py'),
+                                                      'whisperspeech.t2s_up_wds_mlang_enclm.tokenizer': ( '5b. multi-lang text to semantic '
+                                                                                                          'token modeling.html#tokenizer',
+                                                                                                          'whisperspeech/t2s_up_wds_mlang_enclm.py')},
             'whisperspeech.train': { 'whisperspeech.train.SimpleVisual': ('b1. training.html#simplevisual', 'whisperspeech/train.py'),
                                      'whisperspeech.train.SimpleVisual.__init__': ( 'b1. training.html#simplevisual.__init__',
                                                                                     'whisperspeech/train.py'),
@@ -452,6 +1589,35 @@ d = { 'settings': { 'branch': 'master',
                                                                                                        'whisperspeech/train_multi.py'),
                                            'whisperspeech.train_multi.parse_and_call': ( 'b2. training (lightning).html#parse_and_call',
                                                                                          'whisperspeech/train_multi.py')},
+            'whisperspeech.utils': { 'whisperspeech.utils.AtomicTarWriter': ( 'd. common dataset utilities.html#atomictarwriter',
+                                                                              'whisperspeech/utils.py'),
+                                     'whisperspeech.utils.derived_dataset': ( 'd. common dataset utilities.html#derived_dataset',
+                                                                              'whisperspeech/utils.py'),
+                                     'whisperspeech.utils.derived_name': ( 'd. common dataset utilities.html#derived_name',
+                                                                           'whisperspeech/utils.py'),
+                                     'whisperspeech.utils.join_datasets': ( 'd. common dataset utilities.html#join_datasets',
+                                                                            'whisperspeech/utils.py'),
+                                     'whisperspeech.utils.join_datasets.__init__': ( 'd. common dataset '
+                                                                                     'utilities.html#join_datasets.__init__',
+                                                                                     'whisperspeech/utils.py'),
+                                     'whisperspeech.utils.join_datasets.__iter__': ( 'd. common dataset '
+                                                                                     'utilities.html#join_datasets.__iter__',
+                                                                                     'whisperspeech/utils.py'),
+                                     'whisperspeech.utils.join_datasets.__len__': ( 'd. common dataset '
+                                                                                    'utilities.html#join_datasets.__len__',
+                                                                                    'whisperspeech/utils.py'),
+                                     'whisperspeech.utils.merge_in': ( 'd. common dataset utilities.html#merge_in',
+                                                                       'whisperspeech/utils.py'),
+                                     'whisperspeech.utils.readlines': ( 'd. common dataset utilities.html#readlines',
+                                                                        'whisperspeech/utils.py'),
+                                     'whisperspeech.utils.resampler': ( 'd. common dataset utilities.html#resampler',
+                                                                        'whisperspeech/utils.py'),
+                                     'whisperspeech.utils.shard_glob': ( 'd. common dataset utilities.html#shard_glob',
+                                                                         'whisperspeech/utils.py'),
+                                     'whisperspeech.utils.split_to_chunks': ( 'd. common dataset utilities.html#split_to_chunks',
+                                                                              'whisperspeech/utils.py'),
+                                     'whisperspeech.utils.vad_dataset': ( 'd. common dataset utilities.html#vad_dataset',
+                                                                          'whisperspeech/utils.py')},
             'whisperspeech.vad': { 'whisperspeech.vad.extract_segments': ( '1b. voice activity detection.html#extract_segments',
                                                                            'whisperspeech/vad.py'),
                                    'whisperspeech.vad.fix_dots_in_names': ( '1b. voice activity detection.html#fix_dots_in_names',
@@ -464,8 +1630,6 @@ d = { 'settings': { 'branch': 'master',
                                                                         'whisperspeech/vad.py'),
                                    'whisperspeech.vad.segment_audio': ( '1b. voice activity detection.html#segment_audio',
                                                                         'whisperspeech/vad.py')},
-            'whisperspeech.verify_wds': { 'whisperspeech.verify_wds.process_shard': ( '0. verify webdataset archives.html#process_shard',
-                                                                                      'whisperspeech/verify_wds.py')},
             'whisperspeech.vq_stoks': { 'whisperspeech.vq_stoks.RQBottleneckTransformer': ( '2b. whisper quantization (semantic token) '
                                                                                             'model.html#rqbottlenecktransformer',
                                                                                             'whisperspeech/vq_stoks.py'),
@@ -553,9 +1717,9 @@ d = { 'settings': { 'branch': 'master',
                                         'whisperspeech.vq_stoks.derived_dataset': ( '2b. whisper quantization (semantic token) '
                                                                                     'model.html#derived_dataset',
                                                                                     'whisperspeech/vq_stoks.py'),
-                                        'whisperspeech.vq_stoks.load_datasets': ( '2b. whisper quantization (semantic token) '
-                                                                                  'model.html#load_datasets',
-                                                                                  'whisperspeech/vq_stoks.py'),
+                                        'whisperspeech.vq_stoks.load_dataset': ( '2b. whisper quantization (semantic token) '
+                                                                                 'model.html#load_dataset',
+                                                                                 'whisperspeech/vq_stoks.py'),
                                         'whisperspeech.vq_stoks.logrand': ( '2b. whisper quantization (semantic token) model.html#logrand',
                                                                             'whisperspeech/vq_stoks.py'),
                                         'whisperspeech.vq_stoks.make_model': ( '2b. whisper quantization (semantic token) '
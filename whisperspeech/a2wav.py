@@ -4,14 +4,20 @@
 __all__ = ['Vocoder']
 
 # %% ../nbs/6. Quality-boosting vocoder.ipynb 1
-from vocos import Vocos
+from pathlib import Path
+
 import torch
 import torchaudio
 
+from whisperspeech import audio_out
+
 # %% ../nbs/6. Quality-boosting vocoder.ipynb 2
 class Vocoder:
-    def __init__(self, repo_id="charactr/vocos-encodec-24khz"):
-        self.vocos = Vocos.from_pretrained(repo_id).cuda()
+    def __init__(self, repo_id="charactr/vocos-encodec-24khz", device=None):
+        if device is None: device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.device = torch.device(device)
+        from vocos import Vocos
+        self.vocos = Vocos.from_pretrained(repo_id).to(self.device)
     
     def is_notebook(self):
         try:
@@ -20,7 +26,17 @@ class Vocoder:
             return False
 
     @torch.no_grad()
-    def decode(self, atoks):
+    def decode(self, atoks, window=None, overlap=24):
+        """Decodes `(quantizers, n)` or `(batch, quantizers, n)` acoustic tokens into audio.
+
+        With `window` longer inputs are decoded in overlapping windows (see `decode_batch`) so the memory use
+        does not grow with the length of the input."""
+        if window and len(atoks.shape) == 2 and atoks.shape[-1] > window:
+            return self.decode_batch([atoks], window=window, overlap=overlap)[0]
+        return self._decode(atoks)
+
+    def _decode(self, atoks):
+        atoks = atoks.to(self.device)
         if len(atoks.shape) == 3:
             b,q,t = atoks.shape
             atoks = atoks.permute(1,0,2)
@@ -28,13 +44,115 @@ class Vocoder:
             q,t = atoks.shape
         
         features = self.vocos.codes_to_features(atoks)
-        bandwidth_id = torch.tensor({2:0,4:1,8:2}[q]).cuda()
+        bandwidth_id = torch.tensor({2:0,4:1,8:2}[q], device=self.device)
         return self.vocos.decode(features, bandwidth_id=bandwidth_id)
         
-    def decode_to_file(self, fname, atoks):
+    @torch.no_grad()
+    def decode_batch(self, atoks, bucket=75, max_batch_size=16, window=None, overlap=24):
+        """Decodes a list of `(quantizers, n)` acoustic token tensors of different lengths and returns a list of
+        `(1, samples)` audio tensors (the same as calling `decode` for each of them).
+
+        The inputs are sorted by length and the ones that round up to the same multiple of `bucket` frames
+        are decoded together in batches of up to `max_batch_size` rows. Shorter rows are padded by repeating
+        their last frame and the extra audio is trimmed, the padding only changes the last few hundred
+        milliseconds by the amount the convolutions see past the end.
+
+        With `window` every input is split into windows of `window` frames that overlap by `overlap` frames.
+        All the windows go through the batches above and are joined with linear crossfades (overlap-add)
+        so the peak memory is bounded by `max_batch_size * window` frames for inputs of any length."""
+        hop = self.vocos.head.istft.hop_length
+        pieces = [] # (input, start frame, tokens)
+        for i,x in enumerate(atoks):
+            n = x.shape[-1]
+            if not window or n <= window:
+                pieces.append((i, 0, x))
+                continue
+            assert overlap < window, "the windows have to overlap by less than their length"
+            for start in range(0, n - overlap, window - overlap):
+                pieces.append((i, start, x[:,start:start+window]))
+        audio = [None] * len(pieces)
+        order = sorted(range(len(pieces)), key=lambda k: (pieces[k][2].shape[0], pieces[k][2].shape[-1]))
+        groups = []
+        for k in order:
+            q, n = pieces[k][2].shape
+            key = (q, -(-n // bucket))
+            if not groups or groups[-1][0] != key or len(groups[-1][1]) == max_batch_size: groups.append((key, []))
+            groups[-1][1].append(k)
+        for _, group in groups:
+            L = max(pieces[k][2].shape[-1] for k in group)
+            batch = torch.stack([torch.cat([x, x[:,-1:].expand(-1, L - x.shape[-1])], -1).to(self.device)
+                                 for x in (pieces[k][2] for k in group)])
+            for k,row in zip(group, self._decode(batch)):
+                audio[k] = row[:pieces[k][2].shape[-1] * hop]
+        # overlap-add the windows
+        outs = []
+        for i,x in enumerate(atoks):
+            ws = [(start, a) for (j, start, _), a in zip(pieces, audio) if j == i]
+            if len(ws) == 1:
+                outs.append(ws[0][1].unsqueeze(0))
+                continue
+            out = torch.zeros(x.shape[-1] * hop, device=ws[0][1].device, dtype=ws[0][1].dtype)
+            ramp = torch.linspace(0, 1, overlap * hop, device=out.device, dtype=out.dtype)
+            for start, a in ws:
+                a = a.clone()
+                if start > 0: a[:len(ramp)] *= ramp
+                if start * hop + len(a) < len(out): a[-len(ramp):] *= 1 - ramp
+                out[start*hop:start*hop+len(a)] += a
+            outs.append(out.unsqueeze(0))
+        return outs
+
+    def decode_stream_to(self, f, atoks_chunks, format='wav', sample_rate=None, **kwargs):
+        """Decodes an iterator of acoustic token chunks with `decode_stream` (which gets the `kwargs`) and writes
+        the audio to `f` as it is decoded. Returns the number of seconds written."""
+        return audio_out.write_stream(f, self.decode_stream(atoks_chunks, **kwargs), format, sample_rate)
+
+    @torch.no_grad()
+    def decode_stream(self, atoks_chunks, min_frames=24, overlap=8, context=16):
+        """Decodes an iterator of `(quantizers, n)` acoustic token chunks and yields audio chunks as soon as
+        `min_frames` new frames are available.
+
+        Every window is decoded together with `context` preceding frames. The last `overlap` frames of
+        each window are held back and crossfaded with the start of the next one to hide the seams."""
+        hop = self.vocos.head.istft.hop_length
+        atoks, offset, emitted, tail = None, 0, 0, None
+        for chunk in atoks_chunks:
+            atoks = chunk if atoks is None else torch.cat([atoks, chunk], dim=-1)
+            end = offset + atoks.shape[-1]
+            if end - emitted < min_frames + overlap: continue
+            audio = self._decode_window(atoks, offset, emitted, context, tail)
+            cut = (end - overlap - emitted) * hop
+            yield audio[...,:cut]
+            tail = audio[...,cut:]
+            emitted = end - overlap
+            # only keep the frames we will need for the next window
+            start = max(0, emitted - context)
+            atoks, offset = atoks[:,start-offset:], start
+        if atoks is not None:
+            yield self._decode_window(atoks, offset, emitted, context, tail)
+
+    def _decode_window(self, atoks, offset, emitted, context, tail):
+        hop = self.vocos.head.istft.hop_length
+        start = max(0, emitted - context)
+        audio = self.decode(atoks[:,start-offset:])[...,(emitted-start)*hop:]
+        if tail is not None:
+            n = tail.shape[-1]
+            fade = torch.linspace(0, 1, n, device=audio.device, dtype=audio.dtype)
+            audio = torch.cat([tail * (1-fade) + audio[...,:n] * fade, audio[...,n:]], dim=-1)
+        return audio
+
+    def decode_to_file(self, fname, atoks, format=None, sample_rate=None):
+        """Writes the audio to `fname` (a file name or a binary file-like object). The `format` defaults to the
+        file extension, see `audio_out.open_writer` for the formats and the supported `sample_rate`s. The formats it
+        cannot write (e.g. `aiff` or `m4a`, or `ogg` and `flac` without the `soundfile` package) are saved with
+        `torchaudio.save`."""
         audio = self.decode(atoks)
-        torchaudio.save(fname, audio.cpu(), 24000)
-        if self.is_notebook():
+        if audio_out.can_write(audio_out.writer_format(fname, format)):
+            with audio_out.open_writer(fname, format, sample_rate) as w:
+                w.write(audio)
+        else:
+            if sample_rate: audio = audio_out.get_resampler(24000, sample_rate, audio.device, audio.dtype)(audio)
+            torchaudio.save(fname, audio.cpu(), sample_rate or 24000, format=format)
+        if self.is_notebook() and isinstance(fname, (str, Path)):
             from IPython.display import display, HTML, Audio
             display(HTML(f'<a href="{fname}" target="_blank">Listen to {fname}</a>'))
         
@@ -0,0 +1,197 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/H. Audio output.ipynb.
+
+# %% auto 0
+__all__ = ['content_types', 'get_resampler', 'StreamingResampler', 'AudioWriter', 'PCMWriter', 'WAVWriter', 'SoundFileWriter',
+           'open_writer', 'writer_format', 'can_write', 'write_stream']
+
+# %% ../nbs/H. Audio output.ipynb 1
+import functools
+import importlib.util
+import math
+import struct
+from pathlib import Path
+
+import torch
+import torchaudio
+
+# %% ../nbs/H. Audio output.ipynb 4
+@functools.lru_cache(maxsize=None)
+def _resampler(orig_sr, new_sr, device, dtype):
+    return torchaudio.transforms.Resample(orig_sr, new_sr).to(device=device, dtype=dtype)
+
+def get_resampler(orig_sr, new_sr, device='cpu', dtype=torch.float32):
+    "Returns a cached `torchaudio.transforms.Resample` from `orig_sr` to `new_sr` (e.g. 8000, 16000, 22050 or 48000)."
+    return _resampler(int(orig_sr), int(new_sr), torch.device(device), dtype)
+
+# %% ../nbs/H. Audio output.ipynb 5
+class StreamingResampler:
+    """Resamples an audio stream chunk by chunk (`(..., samples)` tensors) with the same result as resampling
+    all of it at once. Call it with every chunk and `flush` at the end of the stream."""
+    def __init__(self, orig_sr, new_sr, device='cpu', dtype=torch.float32):
+        g = math.gcd(int(orig_sr), int(new_sr))
+        self.in_block, self.out_block = orig_sr // g, new_sr // g
+        self.tform = get_resampler(orig_sr, new_sr, device, dtype)
+        # the filter looks `width` input samples to both sides of every output sample
+        self.context = -(-self.tform.width // self.in_block)
+        self.buf = None   # the input we still need, it starts at block `start`
+        self.start = 0
+        self.emitted = 0  # the number of output blocks returned so far
+        self.samples = 0  # the number of input samples so far
+
+    def __call__(self, x):
+        "Returns the output samples that do not depend on the input that has not arrived yet (can be empty)."
+        self.buf = x if self.buf is None else torch.cat([self.buf, x], -1)
+        self.samples += x.shape[-1]
+        ready = self.start + self.buf.shape[-1] // self.in_block - self.context
+        if ready <= self.emitted: return x.new_zeros((*x.shape[:-1], 0))
+        y = self.tform(self.buf[..., :(ready + self.context - self.start) * self.in_block])
+        out = y[..., (self.emitted - self.start) * self.out_block:(ready - self.start) * self.out_block]
+        self.emitted = ready
+        drop = max(0, ready - self.context - self.start)
+        self.buf, self.start = self.buf[..., drop * self.in_block:], self.start + drop
+        return out
+
+    def flush(self):
+        "Returns the rest of the output at the end of the stream."
+        if self.buf is None: return None
+        y = self.tform(self.buf)
+        total = -(-self.samples * self.out_block // self.in_block)
+        out = y[..., (self.emitted - self.start) * self.out_block:total - self.start * self.out_block]
+        self.buf = None
+        return out
+
+# %% ../nbs/H. Audio output.ipynb 8
+def _pcm16(chunk):
+    "Interleaved little-endian 16-bit PCM bytes of a `(channels, samples)` float chunk (converted on its device)."
+    x = (chunk.clamp(-1, 1) * 32767).round().to(torch.int16).T.contiguous().cpu().numpy()
+    return x.astype('<i2', copy=False).tobytes()
+
+class AudioWriter:
+    """Base class of the streaming writers.
+
+    `write` takes float audio chunks (`(samples,)` or `(channels, samples)`, on any device) at `source_rate`,
+    resamples them to `sample_rate` and encodes them right away. `f` is a file name or a binary file-like object
+    (anything with a `write` method). Use it as a context manager or call `close` at the end."""
+    def __init__(self, f, sample_rate=None, source_rate=24000, channels=1):
+        self.sample_rate = int(sample_rate or source_rate)
+        self.source_rate = source_rate
+        self.channels = channels
+        self.own_file = isinstance(f, (str, Path))
+        self.f = open(f, 'wb') if self.own_file else f
+        self.resampler = None
+        self.frames = 0 # samples written (per channel)
+        self.closed = False
+        self.start()
+
+    def write(self, chunk):
+        chunk = chunk.detach()
+        chunk = chunk.reshape(-1, chunk.shape[-1])
+        assert chunk.shape[0] == self.channels, f"expected {self.channels} channel(s), got {chunk.shape[0]}"
+        if self.sample_rate != self.source_rate:
+            if self.resampler is None:
+                self.resampler = StreamingResampler(self.source_rate, self.sample_rate, chunk.device, chunk.dtype)
+            chunk = self.resampler(chunk)
+        if chunk.shape[-1]:
+            self.encode(chunk)
+            self.frames += chunk.shape[-1]
+
+    def close(self):
+        if self.closed: return
+        self.closed = True
+        if self.resampler is not None and (rest := self.resampler.flush()) is not None and rest.shape[-1]:
+            self.encode(rest)
+            self.frames += rest.shape[-1]
+        self.finish()
+        if self.own_file: self.f.close()
+        elif hasattr(self.f, 'flush'): self.f.flush()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+    @property
+    def seconds(self): return self.frames / self.sample_rate
+
+    # implemented by the format specific subclasses
+    def start(self): pass
+    def encode(self, chunk): raise NotImplementedError()
+    def finish(self): pass
+
+# %% ../nbs/H. Audio output.ipynb 9
+class PCMWriter(AudioWriter):
+    "Raw 16-bit little-endian PCM with interleaved channels."
+    def encode(self, chunk):
+        self.f.write(_pcm16(chunk))
+
+def _wav_header(sample_rate, channels, data_bytes):
+    return struct.pack('<4sI4s4sIHHIIHH4sI', b'RIFF', min(36 + data_bytes, 0xFFFFFFFF), b'WAVE',
+                       b'fmt ', 16, 1, channels, sample_rate, sample_rate * channels * 2, channels * 2, 16,
+                       b'data', min(data_bytes, 0xFFFFFFFF))
+
+class WAVWriter(PCMWriter):
+    """16-bit PCM WAV. The header is written first with the maximum sizes so the audio can be played while
+    it is being written, if the output is seekable the real sizes are filled in on `close`."""
+    def start(self):
+        seekable = getattr(self.f, 'seekable', None)
+        self.header_at = self.f.tell() if seekable and seekable() else None
+        self.f.write(_wav_header(self.sample_rate, self.channels, 0xFFFFFFFF))
+
+    def finish(self):
+        if self.header_at is None: return
+        end = self.f.tell()
+        self.f.seek(self.header_at)
+        self.f.write(_wav_header(self.sample_rate, self.channels, self.frames * self.channels * 2))
+        self.f.seek(end)
+
+# %% ../nbs/H. Audio output.ipynb 10
+class SoundFileWriter(AudioWriter):
+    """The compressed formats supported by `libsndfile` (needs the `soundfile` package), e.g. `format='MP3'`
+    (libsndfile 1.1 or newer), `format='OGG', subtype='OPUS'` (only 8, 12, 16, 24 and 48 kHz) or `format='FLAC'`.
+    Some formats need a seekable output."""
+    def __init__(self, f, format='OGG', subtype=None, sample_rate=None, source_rate=24000, channels=1):
+        self.format, self.subtype = format, subtype
+        super().__init__(f, sample_rate, source_rate, channels)
+
+    def start(self):
+        try:
+            import soundfile
+        except ImportError:
+            raise ImportError(f"writing {self.format} needs the soundfile package: pip install soundfile") from None
+        self.sf = soundfile.SoundFile(self.f, 'w', samplerate=self.sample_rate, channels=self.channels,
+                                      format=self.format, subtype=self.subtype)
+
+    def encode(self, chunk):
+        self.sf.write(chunk.T.float().cpu().numpy())
+
+    def finish(self):
+        self.sf.close()
+
+# %% ../nbs/H. Audio output.ipynb 11
+_soundfile_formats = {'mp3': ('MP3', 'MPEG_LAYER_III'), 'opus': ('OGG', 'OPUS'), 'ogg': ('OGG', 'VORBIS'), 'flac': ('FLAC', 'PCM_16')}
+content_types = {'wav': 'audio/wav', 'pcm': 'audio/L16', 'mp3': 'audio/mpeg', 'opus': 'audio/ogg', 'ogg': 'audio/ogg', 'flac': 'audio/flac'}
+
+def open_writer(f, format=None, sample_rate=None, source_rate=24000, channels=1):
+    """Returns a writer for `format` (`wav`, `pcm`, `mp3`, `opus`, `ogg` or `flac`). The default is taken from
+    the extension of the file name `f` or `wav` for file-like objects."""
+    format = writer_format(f, format)
+    if format == 'wav': return WAVWriter(f, sample_rate, source_rate, channels)
+    if format in ('pcm', 'raw'): return PCMWriter(f, sample_rate, source_rate, channels)
+    if format in _soundfile_formats:
+        return SoundFileWriter(f, *_soundfile_formats[format], sample_rate, source_rate, channels)
+    raise ValueError(f"unsupported audio format: {format}")
+
+def writer_format(f, format=None):
+    "The format `open_writer` uses: `format` or the extension of the file name `f` (`wav` by default)."
+    if format is None:
+        format = Path(f).suffix[1:] if isinstance(f, (str, Path)) and Path(f).suffix else 'wav'
+    return format.lower()
+
+def can_write(format):
+    "Whether `open_writer` can write `format` here, the compressed formats need the `soundfile` package."
+    if format in ('wav', 'pcm', 'raw'): return True
+    return format in _soundfile_formats and importlib.util.find_spec('soundfile') is not None
+
+def write_stream(f, chunks, format=None, sample_rate=None, source_rate=24000):
+    "Writes an iterator of audio chunks with `open_writer` and returns the number of seconds written."
+    with open_writer(f, format, sample_rate, source_rate) as w:
+        for chunk in chunks: w.write(chunk)
+    return w.seconds
@@ -0,0 +1,498 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/E. Benchmarks.ipynb.
+
+# %% auto 0
+__all__ = ['make_t2s', 'make_s2a', 'benchmark_t2s', 'benchmark_s2a', 'benchmark_encoder', 'model_size', 't2s_quality',
+           's2a_quality', 'benchmark_cross_attention', 'benchmark_rope', 'benchmark_t2s_speculative',
+           'benchmark_s2a_multitoken', 'benchmark_delsum', 'benchmark_sampling', 'benchmark_vocoder',
+           'benchmark_import', 'compare_results', 'main']
+
+# %% ../nbs/E. Benchmarks.ipynb 1
+import copy
+import json
+import multiprocessing
+import subprocess
+import sys
+import time
+import platform
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+
+import torch
+import torch.nn.functional as F
+from fastcore.script import *
+
+from whisperspeech import __version__, t2s_up_wds_mlang_enclm, s2a_delar_mup_wds_mlang, sampling
+from whisperspeech.a2wav import Vocoder
+from whisperspeech.modules import rope_tables, rope_rotate, rotate_half
+
+# %% ../nbs/E. Benchmarks.ipynb 3
+def make_t2s(size='tiny', ref=None, device='cpu'):
+    "Loads a T2S model from `ref` or creates a randomly initialized one of the given `size`."
+    if ref: return t2s_up_wds_mlang_enclm.TSARTransformer.load_model(ref, device=device)
+    # the same shapes as the released checkpoints
+    ds = SimpleNamespace(stoks_len=750, ttoks_len=550, stoks_codes=513)
+    model = t2s_up_wds_mlang_enclm._make_model(size, dataset=ds, stoks_width=64)
+    assert model is not None, f"unknown T2S model size: {size}"
+    return model.to(device).eval()
+
+def make_s2a(size='tiny', ref=None, device='cpu', mtp_steps=0):
+    "Loads a S2A model from `ref` or creates a randomly initialized one of the given `size`."
+    if ref: return s2a_delar_mup_wds_mlang.SADelARTransformer.load_model(ref, device=device)
+    tunables = s2a_delar_mup_wds_mlang.Tunables(mtp_steps=mtp_steps)
+    model = s2a_delar_mup_wds_mlang._make_model(size, stoks_codes=513, stoks_width=64, spk_width=192, tunables=tunables)
+    assert model is not None, f"unknown S2A model size: {size}"
+    return model.to(device).eval()
+
+# the sizes known to the `_make_model` functions
+_t2s_sizes = ['micro', 'tiny', 'base', 'small', 'small+', 'medium']
+_s2a_sizes = ['micro', 'tiny-narrow', 'tiny', 'base', 'base-deep', 'base-wide', 'small/2', 'small', 'medium']
+
+# %% ../nbs/E. Benchmarks.ipynb 4
+def _sync(device):
+    device = torch.device(device)
+    if device.type == 'cuda': torch.cuda.synchronize()
+    elif device.type == 'mps': torch.mps.synchronize()
+
+def _timed(fun):
+    fun() # warmup
+    _sync(fun.device)
+    start = time.perf_counter()
+    out = fun()
+    _sync(fun.device)
+    return out, time.perf_counter() - start
+
+def _proc_status_mb(field):
+    "A memory field of `/proc/self/status` in MB, None where it is not available (outside of Linux)."
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'): return int(line.split()[1]) / 2**10
+    except OSError: pass
+    return None
+
+def _reset_peak_memory(device):
+    """Resets the peak memory counters and returns the baseline for `_peak_memory`. The peak resident set size of
+    the process (`VmHWM`) can only be reset on Linux, elsewhere the CPU memory use is not reported."""
+    if torch.device(device).type == 'cuda':
+        torch.cuda.reset_peak_memory_stats()
+        return None
+    try:
+        with open('/proc/self/clear_refs', 'w') as f: f.write('5') # sets VmHWM to the current RSS
+    except OSError:
+        return None
+    return _proc_status_mb('VmRSS')
+
+def _peak_memory(device, baseline=None):
+    """The peak memory use in MB since `_reset_peak_memory` (which returned the `baseline`): the allocated tensors on
+    CUDA, the growth of the resident set size over the baseline on the CPU."""
+    if torch.device(device).type == 'cuda': return dict(peak_cuda_mb=torch.cuda.max_memory_allocated() / 2**20)
+    peak = _proc_status_mb('VmHWM')
+    if baseline is None or peak is None: return {}
+    return dict(peak_rss_increase_mb=peak - baseline)
+
+# %% ../nbs/E. Benchmarks.ipynb 5
+def benchmark_t2s(model, batch_size=1, steps=100, txt="This is a benchmark of the text to semantic token model."):
+    """Measures the T2S decoding speed for `steps` tokens in a batch of `batch_size`.
+
+    The model has to be `optimize`d with a `max_batch_size` of at least `batch_size`. `ms_per_step` is the
+    latency of a single decoding step (including the encoder pass, see `benchmark_encoder`)."""
+    def run(): return model.generate_batch([txt] * batch_size, N=steps+1, show_progress_bar=False)
+    run.device = model.device
+    stoks, t = _timed(run)
+    tokens = sum(len(x) - 1 for x in stoks) # without the SOT token
+    return dict(batch_size=batch_size, tokens=tokens, seconds=t, tokens_per_s=tokens / t,
+                ms_per_step=t / max(len(x) - 1 for x in stoks) * 1000)
+
+def benchmark_s2a(model, batch_size=1, steps=100):
+    """Measures the S2A decoding speed for `steps` steps in a batch of `batch_size`.
+
+    The model has to be `optimize`d with a `max_batch_size` of at least `batch_size`."""
+    stoks = [torch.randint(0, model.stoks_codes - 1, (steps // 3 + 1,))] * batch_size
+    speakers = torch.randn(batch_size, model.spk_width, device=model.device)
+    def run(): return model.generate_batch(stoks, speakers, N=steps, show_progress_bar=False)
+    run.device = model.device
+    atoks, t = _timed(run)
+    tokens = sum(x.shape[-1] for x in atoks)
+    return dict(batch_size=batch_size, frames=tokens, seconds=t, frames_per_s=tokens / t,
+                x_realtime=tokens / 75 / t, ms_per_step=t / max(x.shape[-1] for x in atoks) * 1000)
+
+@torch.no_grad()
+def benchmark_encoder(model, batch_size=1, iters=10, txt="This is a benchmark of the text to semantic token model."):
+    "Times the encoder pass of a T2S or S2A `model` that runs once per batch before decoding (in milliseconds)."
+    dev = model.device
+    if isinstance(model, t2s_up_wds_mlang_enclm.TSARTransformer):
+        model.ensure_tokenizer()
+        ttoks, langs = model.prep_batch_item(txt)
+        args = ttoks.to(dev).repeat(batch_size, 1), langs.to(dev).repeat(batch_size, 1), torch.full((batch_size,), 15, device=dev)
+    else:
+        stoks = torch.randint(0, model.stoks_codes - 1, (batch_size, model.stoks_len), device=dev)
+        args = stoks, torch.randn(batch_size, model.spk_width, device=dev, dtype=model.dtype)
+    def loop():
+        for _ in range(iters): model.run_encoder(*args)
+    loop.device = dev
+    return dict(batch_size=batch_size, ms=_timed(loop)[1] / iters * 1000)
+
+def model_size(model):
+    "Returns the number of parameters of `model` and the size of its weights in MB."
+    params = list(model.parameters())
+    return dict(params=sum(p.numel() for p in params), weights_mb=sum(p.numel() * p.element_size() for p in params) / 2**20)
+
+def _first_call(model, steps=16):
+    "Generates a few tokens, the first call pays for the lazy initialization (and the compilation with `torch_compile`)."
+    if isinstance(model, t2s_up_wds_mlang_enclm.TSARTransformer):
+        model.generate_batch(["Hello world."], N=steps, show_progress_bar=False)
+    else:
+        model.generate_batch([torch.randint(0, model.stoks_codes - 1, (steps // 3 + 1,))],
+                             torch.randn(1, model.spk_width, device=model.device), N=steps, show_progress_bar=False)
+    _sync(model.device)
+
+# %% ../nbs/E. Benchmarks.ipynb 7
+def _compare_logits(ref, other):
+    ref, other = ref.float().log_softmax(-1), other.float().log_softmax(-1)
+    return dict(top1_agreement=(ref.argmax(-1) == other.argmax(-1)).float().mean().item(),
+                kl_div=F.kl_div(other, ref, log_target=True, reduction='none').sum(-1).mean().item())
+
+@torch.no_grad()
+def t2s_quality(ref_model, model, steps=150, txt="This is a benchmark of the text to semantic token model."):
+    "Compares the T2S predictions of `model` with `ref_model` on a sequence sampled from `ref_model`."
+    stoks = ref_model.generate_batch([txt], N=steps+1, show_progress_bar=False)[0][None]
+    def logits(m):
+        dev = m.device
+        ttoks, langs = m.prep_batch_item(txt)
+        xenc, xenc_positions, cps_emb = m.run_encoder(ttoks[None].to(dev), langs[None].to(dev), torch.tensor([15], device=dev))
+        positions = torch.arange(stoks.shape[-1], device=dev)
+        return m(None, None, None, None, stoks.to(dev), positions, loss=None,
+                 xenc=xenc, xenc_positions=xenc_positions, cps_emb=cps_emb)[0]
+    return _compare_logits(logits(ref_model), logits(model))
+
+@torch.no_grad()
+def s2a_quality(ref_model, model, steps=150):
+    "Compares the S2A predictions of `model` with `ref_model` on a sequence sampled from `ref_model`."
+    stoks = torch.randint(0, ref_model.stoks_codes - 1, (steps // 3 + 1,))
+    speakers = torch.randn(1, ref_model.spk_width)
+    atoks = ref_model.generate_batch([stoks], speakers, N=steps, show_progress_bar=False)[0]
+    # go back to the delayed layout the decoder works on
+    q, n = atoks.shape
+    delayed = torch.full((1, q, n), ref_model.codes+1, dtype=torch.long)
+    for j in range(q): delayed[0,j,j+1:] = atoks[j,:n-j-1]
+    def logits(m):
+        dev = m.device
+        padded = F.pad(stoks, (1, m.stoks_len - len(stoks) - 1), value=m.stoks_codes-1)[None].to(dev)
+        xenc, xenc_positions, _ = m.run_encoder(padded, speakers.to(dev))
+        positions = torch.arange(n, device=dev)
+        return m(None, delayed.to(dev), None, noloss=True, xenc=xenc, xenc_positions=xenc_positions, atoks_positions=positions)
+    return _compare_logits(logits(ref_model), logits(model))
+
+# %% ../nbs/E. Benchmarks.ipynb 9
+@contextmanager
+def _unprimed(model):
+    "Disables the cross-attention cache so every decoding step recomputes the keys and values."
+    model.decoder.prime_cross_attention = lambda *args, **kwargs: None
+    try: yield
+    finally: del model.decoder.prime_cross_attention
+
+# %% ../nbs/E. Benchmarks.ipynb 10
+def benchmark_cross_attention(model, bench, batch_size=1, steps=100):
+    "Runs `bench` (`benchmark_t2s` or `benchmark_s2a`) with and without the primed cross-attention cache."
+    primed = bench(model, batch_size, steps)
+    with _unprimed(model): recomputed = bench(model, batch_size, steps)
+    return dict(batch_size=batch_size, steps=steps,
+                primed_ms_per_step=primed['seconds'] / steps * 1000,
+                recomputed_ms_per_step=recomputed['seconds'] / steps * 1000,
+                speedup=recomputed['seconds'] / primed['seconds'])
+
+# %% ../nbs/E. Benchmarks.ipynb 12
+def _rope_reference(x, positions, cos, sin):
+    return x * cos[positions,None] + rotate_half(x) * sin[positions,None]
+
+# %% ../nbs/E. Benchmarks.ipynb 13
+@torch.no_grad()
+def benchmark_rope(n=1, batch_size=1, n_head=6, head_width=64, iters=200, device='cpu', dtype=torch.float32):
+    "Times the RoPE rotation of the queries and keys for `n` positions (in microseconds per layer)."
+    qkv = torch.randn(batch_size, n, 3, n_head, head_width, device=device, dtype=dtype)
+    positions = torch.arange(n, device=device)
+    cos, sin = rope_tables(head_width, device, dtype)
+    def fused(): return rope_rotate(qkv[:,:,:2], positions, cos, sin)
+    full_cos, full_sin = torch.cat([cos, cos], -1), torch.cat([sin, sin], -1)
+    def reference(): return [_rope_reference(qkv[:,:,i], positions, full_cos, full_sin) for i in range(2)]
+    def run(f):
+        def loop():
+            for _ in range(iters): f()
+        loop.device = device
+        return _timed(loop)[1] / iters * 1e6
+    err = (fused()[:,:,1] - reference()[1]).abs().max().item()
+    fused_us, reference_us = run(fused), run(reference)
+    return dict(n=n, batch_size=batch_size, fused_us=fused_us, reference_us=reference_us,
+                speedup=reference_us / fused_us, max_abs_diff=err)
+
+# %% ../nbs/E. Benchmarks.ipynb 15
+def benchmark_t2s_speculative(model, draft, k=4, steps=100, txt="This is a benchmark of the text to semantic token model."):
+    "Measures the T2S decoding speed with speculative decoding (`draft` proposes `k` tokens at a time)."
+    def run(): return model.generate_speculative(txt, draft, k=k, N=steps+1)
+    run.device = model.device
+    _, t = _timed(run)
+    return dict(model.speculative_stats, seconds=t, tokens_per_s=model.speculative_stats['tokens'] / t)
+
+# %% ../nbs/E. Benchmarks.ipynb 17
+def benchmark_s2a_multitoken(model, steps=100):
+    "Measures the S2A decoding speed with the multi-token prediction head."
+    stoks = torch.randint(0, model.stoks_codes - 1, (steps // 3 + 1,))
+    speakers = torch.randn(1, model.spk_width, device=model.device)
+    def run(): return model.generate_multitoken(stoks, speakers, N=steps)
+    run.device = model.device
+    atoks, t = _timed(run)
+    frames = atoks.shape[-1]
+    return dict(model.mtp_stats, seconds=t, frames_per_s=frames / t, x_realtime=frames / 75 / t)
+
+# %% ../nbs/E. Benchmarks.ipynb 19
+@contextmanager
+def _unstacked(model):
+    "Makes the S2A embeddings and head fall back to the per-quantizer loop."
+    embds = model.embds
+    saved = embds.stacked_in, embds.stacked_out, embds.stacked_bias
+    embds.stacked_in = embds.stacked_out = embds.stacked_bias = None
+    try: yield
+    finally: embds.stacked_in, embds.stacked_out, embds.stacked_bias = saved
+
+# %% ../nbs/E. Benchmarks.ipynb 20
+@torch.no_grad()
+def benchmark_delsum(model, batch_size=1, steps=100, iters=200):
+    "Compares the stacked S2A embeddings and head with the per-quantizer loop (in microseconds per decoding step)."
+    dev = model.device
+    toks = torch.randint(0, model.codes, (batch_size, model.quantizers, 1), device=dev)
+    x = torch.randn(batch_size, 1, model.width, device=dev, dtype=model.dtype)
+    xenc = x[:,:0]
+    def step(): return model._head(x + model.embds(toks, xenc))
+    def run():
+        def loop():
+            for _ in range(iters): step()
+        loop.device = dev
+        return _timed(loop)[1] / iters * 1e6
+    stacked_out, stacked_us = step(), run()
+    stacked = benchmark_s2a(model, batch_size, steps)
+    with _unstacked(model):
+        err = (step() - stacked_out).abs().max().item()
+        loop_us = run()
+        looped = benchmark_s2a(model, batch_size, steps)
+    return dict(batch_size=batch_size, stacked_us=stacked_us, loop_us=loop_us, speedup=loop_us / stacked_us,
+                max_abs_diff=err, decode_speedup=looped['seconds'] / stacked['seconds'])
+
+# %% ../nbs/E. Benchmarks.ipynb 22
+def _sampling_reference(logits, T=1.0, top_k=None):
+    logits = logits / max(T, 1e-5)
+    if top_k is not None:
+        v, _ = torch.topk(logits, min(top_k, logits.size(-1)))
+        logits = torch.where(logits < v[..., -1:], -float("Inf"), logits)
+    probs = torch.nn.functional.softmax(logits, dim=-1)
+    q = torch.empty_like(probs).exponential_(1)
+    return torch.argmax(probs / q, dim=-1, keepdim=True)
+
+# %% ../nbs/E. Benchmarks.ipynb 23
+@torch.no_grad()
+def benchmark_sampling(batch_size=1, quantizers=4, vocab=1026, T=0.7, top_k=None, iters=500, device='cpu', dtype=torch.float32, torch_compile=False):
+    "Times a single sampling step (in microseconds) with the old and the new sampling code."
+    logits = torch.randn(batch_size, quantizers, vocab, device=device, dtype=dtype)
+    new, old = sampling.sample, _sampling_reference
+    if torch_compile:
+        new, old = torch.compile(new, fullgraph=True), torch.compile(old, fullgraph=True)
+    def run(f):
+        def loop():
+            for _ in range(iters): f(logits, T, top_k)
+        loop.device = device
+        loop() # warmup (and compilation)
+        return _timed(loop)[1] / iters * 1e6
+    new_us, reference_us = run(new), run(old)
+    return dict(batch_size=batch_size, T=T, top_k=top_k, sample_us=new_us, reference_us=reference_us, speedup=reference_us / new_us)
+
+# %% ../nbs/E. Benchmarks.ipynb 25
+@torch.no_grad()
+def benchmark_vocoder(vocoder, duration=10, batch_size=1, quantizers=4, window=None):
+    "Measures the `vocoder` speed on `batch_size` random token sequences of `duration` seconds."
+    atoks = [torch.randint(0, 1024, (quantizers, int(duration * 75))) for _ in range(batch_size)]
+    def run(): return vocoder.decode_batch(atoks, max_batch_size=batch_size, window=window)
+    run.device = vocoder.device
+    _, t = _timed(run)
+    return dict(batch_size=batch_size, duration=duration, seconds=t, x_realtime=duration * batch_size / t)
+
+# %% ../nbs/E. Benchmarks.ipynb 27
+def benchmark_import(modules=('whisperspeech.pipeline',)):
+    "Times importing `modules` (together with PyTorch) in a fresh Python process (in seconds)."
+    code = f"import time; start = time.perf_counter(); import {', '.join(modules)}; print(time.perf_counter() - start)"
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return float(out.stdout.split()[-1])
+
+# %% ../nbs/E. Benchmarks.ipynb 29
+def _flatten(results, prefix=''):
+    if isinstance(results, dict): items = results.items()
+    elif isinstance(results, list): items = ((str(i), x) for i,x in enumerate(results))
+    elif isinstance(results, (int, float)) and not isinstance(results, bool): return {prefix: results}
+    else: return {}
+    flat = {}
+    for k,x in items: flat.update(_flatten(x, f"{prefix}.{k}" if prefix else k))
+    return flat
+
+def _flatten_runs(results):
+    "Flattens the results of every model size and device under a `size/device` prefix so runs can be matched up."
+    flat = {'import_s': results['import_s']} if 'import_s' in results else {}
+    for run in results.get('runs', [results]):
+        flat.update(_flatten({k:x for k,x in run.items() if k != 'import_s'}, '/'.join(run[k] for k in ('size', 'device') if k in run)))
+    return flat
+
+def _git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=Path(__file__).parent, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except (OSError, NameError):
+        return None
+
+_higher_is_better = ('_per_s', 'x_realtime', 'speedup', 'agreement', 'acceptance_rate')
+_lower_is_better = ('seconds', '_s', 'ms', 'ms_per_step', '_us', '_mb', 'kl_div')
+
+# %% ../nbs/E. Benchmarks.ipynb 30
+def compare_results(old, new, tolerance=0.1):
+    """Compares two benchmark results (returned by `main` or loaded from its JSON output) and returns the
+    metrics that got worse by more than `tolerance` (a fraction of the old value)."""
+    old, new = _flatten_runs(old), _flatten_runs(new)
+    regressions = []
+    for k,x in new.items():
+        if not old.get(k): continue
+        name = k.rsplit('.', 1)[-1]
+        if name.endswith(_higher_is_better): change = old[k] / x - 1 if x else float('inf')
+        elif name.endswith(_lower_is_better): change = x / old[k] - 1
+        else: continue
+        if change > tolerance: regressions.append(dict(metric=k, old=old[k], new=x, change=change))
+    return regressions
+
+# %% ../nbs/E. Benchmarks.ipynb 32
+def _devices(device):
+    "Expands `all` to the CPU and every available accelerator."
+    if device != 'all': return device.split(',')
+    devices = ['cpu']
+    if torch.cuda.is_available(): devices.append('cuda')
+    if torch.backends.mps.is_available(): devices.append('mps')
+    return devices
+
+def _benchmark_models(size, device, o, shared=True, models=('t2s', 's2a')):
+    """Runs the benchmarks selected in `o` (the `main` arguments) for the `models` of one `size` on one `device`.
+    The benchmarks that do not depend on the model size only run if `shared` is set."""
+    if o.threads: torch.set_num_threads(o.threads)
+    dtype = getattr(torch, o.dtype)
+    batch_sizes = sorted({o.batch_size, *o.batch_sizes})
+    quantize = o.quantize if torch.device(device).type == 'cpu' else None # int8 kernels only exist for the CPU
+    results = dict(size=size, device=device)
+    for name, make, ref, sizes, bench, quality in [('t2s', make_t2s, o.t2s_ref, _t2s_sizes, benchmark_t2s, t2s_quality),
+                                                   ('s2a', make_s2a, o.s2a_ref, _s2a_sizes, benchmark_s2a, s2a_quality)]:
+        if name not in models or not ref and size not in sizes: continue
+        mem = _reset_peak_memory(device)
+        start = time.perf_counter()
+        model = make(size, ref, device, o.mtp_steps) if name == 's2a' else make(size, ref, device)
+        load_s = time.perf_counter() - start
+        if quantize:
+            qmodel = copy.deepcopy(model)
+            qmodel.optimize(max_batch_size=o.batch_size, torch_compile=o.torch_compile, quantize=quantize)
+        start = time.perf_counter()
+        model.optimize(max_batch_size=max(batch_sizes), dtype=dtype, torch_compile=o.torch_compile)
+        optimize_s = time.perf_counter() - start
+        start = time.perf_counter()
+        _first_call(model)
+        cold_start = dict(load_s=load_s, optimize_s=optimize_s, first_call_s=time.perf_counter() - start)
+        r = results[name] = bench(model, o.batch_size, o.steps)
+        r.update(model_size(model), cold_start=cold_start, encoder=benchmark_encoder(model, o.batch_size))
+        if len(batch_sizes) > 1:
+            r['batch_sizes'] = [bench(model, bs, o.steps) for bs in batch_sizes]
+        r.update(_peak_memory(device, mem))
+        if name == 't2s' and (o.draft_size or o.draft_ref):
+            draft = make_t2s(o.draft_size, o.draft_ref, device)
+            draft.optimize(dtype=dtype, torch_compile=o.torch_compile)
+            results['t2s_speculative'] = benchmark_t2s_speculative(model, draft, o.draft_k, o.steps)
+            del draft
+        if name == 's2a' and model.mtp is not None:
+            results['s2a_multitoken'] = benchmark_s2a_multitoken(model, o.steps)
+        if name == 's2a' and o.delsum:
+            results['s2a_delsum'] = benchmark_delsum(model, o.batch_size, o.steps)
+        if o.cross_attention:
+            results[f'{name}_cross_attention'] = benchmark_cross_attention(model, bench, o.batch_size, o.steps)
+        if quantize:
+            r = results[f'{name}_{quantize}'] = bench(qmodel, o.batch_size, o.steps)
+            r['speedup'] = results[name]['seconds'] / r['seconds']
+            r.update(quality(model, qmodel, o.steps))
+            del qmodel
+        del model
+    if not shared: return results
+    if o.vocoder:
+        mem = _reset_peak_memory(device)
+        vocoder = Vocoder(o.vocoder, device=device)
+        results['vocoder'] = [benchmark_vocoder(vocoder, o.vocoder_duration, bs) for bs in batch_sizes]
+        results['vocoder_window'] = benchmark_vocoder(vocoder, o.vocoder_duration, o.batch_size, window=150)
+        results['vocoder_memory'] = _peak_memory(device, mem)
+        del vocoder
+    if o.sampling_overhead:
+        results['sampling'] = [benchmark_sampling(o.batch_size, T=T, top_k=top_k, device=device, dtype=dtype, torch_compile=o.torch_compile)
+                               for T, top_k in ((0.7, None), (0.7, 16))]
+    if o.rope:
+        results['rope'] = [benchmark_rope(n=n, batch_size=o.batch_size, device=device, dtype=dtype) for n in (1, 750)]
+    return results
+
+def _isolated(fun, *args):
+    "Runs `fun(*args)` in a fresh Python process so its peak memory use is not mixed up with the earlier runs."
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(fun, *args).result()
+
+def _run_config(size, device, o, shared):
+    "Benchmarks one model `size` on one `device`, every model in its own process unless `o.in_process` is set."
+    run = _benchmark_models if o.in_process else lambda *args: _isolated(_benchmark_models, *args)
+    results = dict(size=size, device=device)
+    for models in [('t2s',), ('s2a',)]: results.update(run(size, device, o, False, models))
+    if shared: results.update(run(size, device, o, True, ()))
+    return results
+
+# %% ../nbs/E. Benchmarks.ipynb 33
+@call_parse
+def main(
+    size:str='tiny', # model size (see `_make_model`) used when no checkpoints are given, comma separated or `all`
+    t2s_ref:str=None, # T2S checkpoint (use repo_id:filename to download it from hugginface)
+    s2a_ref:str=None, # S2A checkpoint (use repo_id:filename to download it from hugginface)
+    device:str='cpu', # device to run the benchmark on, comma separated or `all` (the CPU and the available accelerators)
+    dtype:str='float32', # model dtype (float32, bfloat16 or float16)
+    threads:int=None, # number of CPU threads for PyTorch
+    batch_size:int=1, # batch size for decoding
+    batch_sizes:str=None, # also measure the throughput at these batch sizes (comma separated, e.g. 1,4,16)
+    steps:int=150, # decoding steps to measure
+    torch_compile:bool=False, # use torch.compile
+    quantize:str=None, # also benchmark a quantized copy of the models (int8, CPU only)
+    cross_attention:bool=False, # also measure the savings from priming the cross-attention cache
+    rope:bool=False, # also run the RoPE microbenchmark
+    draft_size:str=None, # benchmark T2S speculative decoding with a draft model of this size
+    draft_ref:str=None, # ...or with this draft T2S checkpoint
+    draft_k:int=4, # number of tokens proposed by the draft model
+    mtp_steps:int=0, # add a multi-token prediction head to the random S2A model and benchmark multi-token decoding
+    delsum:bool=False, # also compare the stacked S2A embeddings and head with the per-quantizer loop
+    sampling_overhead:bool=False, # also run the sampling microbenchmark
+    vocoder:str=None, # also benchmark this Vocos vocoder (e.g. charactr/vocos-encodec-24khz)
+    vocoder_duration:float=10, # seconds of audio decoded by the vocoder benchmark
+    output:str=None, # save the results to this JSON file
+    compare:str=None, # compare the results with an earlier JSON output and report the regressions
+    tolerance:float=0.1, # the relative change reported as a regression by `compare`
+    in_process:bool=False, # run everything in this process (faster, but only the first model gets a clean CPU memory peak)
+):
+    "Benchmark the inference speed of the T2S and S2A models and the vocoder"
+    o = SimpleNamespace(**locals())
+    o.batch_sizes = [int(x) for x in batch_sizes.split(',')] if batch_sizes else []
+    if threads: torch.set_num_threads(threads)
+    sizes = _t2s_sizes + [x for x in _s2a_sizes if x not in _t2s_sizes] if size == 'all' else size.split(',')
+    if t2s_ref and s2a_ref: sizes = sizes[:1] # the size is not used with checkpoints
+    results = dict(dtype=dtype, threads=torch.get_num_threads(), batch_size=batch_size, steps=steps,
+                   cpu=platform.processor() or platform.machine(), torch=torch.__version__,
+                   version=__version__, commit=_git_commit(), import_s=benchmark_import())
+    runs = [_run_config(s, d, o, shared=i == 0) for d in _devices(device) for i,s in enumerate(sizes)]
+    if len(runs) == 1: results.update(runs[0])
+    else: results['runs'] = runs
+    print(json.dumps(results, indent=2))
+    if output: Path(output).write_text(json.dumps(results, indent=2))
+    if compare:
+        regressions = compare_results(json.loads(Path(compare).read_text()), results, tolerance)
+        for r in regressions: print(f"regression: {r['metric']} {r['old']:.4g} -> {r['new']:.4g} ({r['change']:+.0%})")
+        if not regressions: print(f"no regressions compared to {compare}")
+    return results
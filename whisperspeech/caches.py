@@ -0,0 +1,104 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/F. Inference caches.ipynb.
+
+# %% auto 0
+__all__ = ['LRUCache', 'file_hash', 'SpeakerEmbeddingCache']
+
+# %% ../nbs/F. Inference caches.ipynb 1
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import torch
+
+# %% ../nbs/F. Inference caches.ipynb 3
+def _nbytes(value):
+    if isinstance(value, torch.Tensor): return value.nelement() * value.element_size()
+    if isinstance(value, (tuple, list)): return sum(_nbytes(x) for x in value)
+    return 0
+
+class LRUCache:
+    """A thread-safe least-recently-used cache.
+
+    It is bounded by the number of entries (`max_items`) and optionally by the total size of the tensors
+    it holds (`max_bytes`). Hits and misses are counted for monitoring."""
+    def __init__(self, max_items=128, max_bytes=None):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.data = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.data:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.data.move_to_end(key)
+            return self.data[key]
+
+    def put(self, key, value):
+        size = _nbytes(value)
+        if self.max_bytes is not None and size > self.max_bytes: return
+        with self.lock:
+            if key in self.data: self.nbytes -= _nbytes(self.data.pop(key))
+            self.data[key] = value
+            self.nbytes += size
+            while len(self.data) > self.max_items or (self.max_bytes is not None and self.nbytes > self.max_bytes):
+                _, old = self.data.popitem(last=False)
+                self.nbytes -= _nbytes(old)
+
+    def __contains__(self, key): return key in self.data
+    def __len__(self): return len(self.data)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return dict(items=len(self.data), bytes=self.nbytes, hits=self.hits, misses=self.misses,
+                    hit_rate=self.hits / total if total else 0)
+
+# %% ../nbs/F. Inference caches.ipynb 6
+def file_hash(fname):
+    "Returns the SHA-256 hash of the file contents."
+    h = hashlib.sha256()
+    with open(fname, 'rb') as f:
+        for block in iter(lambda: f.read(1<<20), b''): h.update(block)
+    return h.hexdigest()
+
+class SpeakerEmbeddingCache:
+    """Caches speaker embeddings in memory (`max_items` entries, LRU) and optionally as `.npy` files in `cache_dir`."""
+    def __init__(self, max_items=256, cache_dir=None):
+        self.memory = LRUCache(max_items)
+        self.cache_dir = Path(cache_dir).expanduser() if cache_dir else None
+        self.disk_hits = 0
+
+    def _disk_path(self, key):
+        return self.cache_dir/f"{key}.npy"
+
+    def get(self, fname, encoder_id, compute):
+        """Returns the embedding of the audio in `fname`, calling `compute(fname)` only if the file
+        contents were not seen before with this `encoder_id`. Embeddings are returned on the CPU."""
+        key = hashlib.sha256(f"{encoder_id}\n{file_hash(fname)}".encode()).hexdigest()
+        emb = self.memory.get(key)
+        if emb is not None: return emb
+        if self.cache_dir and self._disk_path(key).exists():
+            emb = torch.from_numpy(np.load(self._disk_path(key)))
+            self.disk_hits += 1
+        else:
+            emb = compute(fname).detach().float().cpu()
+            if self.cache_dir:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                np.save(self._disk_path(key), emb.numpy())
+        self.memory.put(key, emb)
+        return emb
+
+    def stats(self):
+        return dict(self.memory.stats(), disk_hits=self.disk_hits)
@@ -0,0 +1,207 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/J. Metrics.ipynb.
+
+# %% auto 0
+__all__ = ['StageTimer', 'add_stages', 'add_time', 'add_count', 'LogSink', 'CounterSink', 'Metrics']
+
+# %% ../nbs/J. Metrics.ipynb 1
+import json
+import logging
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from pathlib import Path
+
+import torch
+from torch.profiler import profile, ProfilerActivity
+
+# %% ../nbs/J. Metrics.ipynb 4
+class StageTimer:
+    """Measures the time spent in the consecutive stages of a generation.
+
+    `mark(stage)` charges the time since the previous mark to `stage` and `skip()` restarts the clock without
+    charging anything (e.g. while a generator is suspended). The models store the number of decoding steps in `steps`."""
+    def __init__(self, device='cpu'):
+        self.cuda = torch.device(device).type == 'cuda'
+        self.seconds = {} # the CPU timings
+        self.events = [] # (stage, start, end) on CUDA
+        self.steps = 0
+        self.last = self._now()
+
+    def _now(self):
+        if not self.cuda: return time.perf_counter()
+        ev = torch.cuda.Event(enable_timing=True)
+        ev.record()
+        return ev
+
+    def mark(self, stage):
+        now = self._now()
+        if self.cuda: self.events.append((stage, self.last, now))
+        else: self.seconds[stage] = self.seconds.get(stage, 0) + now - self.last
+        self.last = now
+
+    def skip(self):
+        self.last = self._now()
+
+    def stats(self):
+        "Returns the seconds spent in every stage and the number of decoding `steps`."
+        seconds = dict(self.seconds)
+        if self.events: self.events[-1][2].synchronize()
+        for stage, start, end in self.events:
+            seconds[stage] = seconds.get(stage, 0) + start.elapsed_time(end) / 1000
+        return dict(seconds, steps=self.steps)
+
+# %% ../nbs/J. Metrics.ipynb 7
+def add_stages(report, prefix, timer):
+    "Adds the stage timings and steps of `timer` (a `StageTimer`) to `report` under `prefix` (e.g. `t2s`)."
+    stats = timer.stats()
+    add_count(report, f'{prefix}_steps', stats.pop('steps'))
+    for stage, seconds in stats.items(): add_time(report, f'{prefix}.{stage}', seconds)
+
+def add_time(report, stage, seconds):
+    report['timings'][stage] = report['timings'].get(stage, 0) + seconds
+
+def add_count(report, name, n):
+    report[name] = report.get(name, 0) + n
+
+# %% ../nbs/J. Metrics.ipynb 9
+class LogSink:
+    "Logs every report as one line of JSON (to the `whisperspeech.metrics` logger by default)."
+    def __init__(self, logger='whisperspeech.metrics', level=logging.INFO):
+        self.logger = logging.getLogger(logger) if isinstance(logger, str) else logger
+        self.level = level
+
+    def __call__(self, report):
+        self.logger.log(self.level, json.dumps(report))
+
+# %% ../nbs/J. Metrics.ipynb 10
+class CounterSink:
+    """Aggregates the reports into Prometheus-style counters and gauges.
+
+    `render()` returns them in the Prometheus text format (e.g. for a `/metrics` endpoint) and `values` holds
+    them as `{(name, labels): value}`."""
+    def __init__(self, prefix='whisperspeech'):
+        self.prefix = prefix
+        self.values = {}
+        self.types = {}
+        self.lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        self.types[name] = 'counter'
+        key = (name, tuple(sorted(labels.items())))
+        self.values[key] = self.values.get(key, 0) + value
+
+    def set(self, name, value, kind='gauge', **labels):
+        self.types[name] = kind
+        self.values[(name, tuple(sorted(labels.items())))] = value
+
+    def __call__(self, report):
+        with self.lock:
+            kind = report['kind']
+            self.inc('requests_total', kind=kind)
+            if report.get('error'): self.inc('errors_total', kind=kind, error=report['error'])
+            for stage, seconds in report['timings'].items():
+                self.inc('stage_seconds_total', seconds, stage=stage)
+            for model, unit in [('t2s', 'tokens'), ('s2a', 'frames')]:
+                if f'{model}_{unit}' in report: self.inc('tokens_total', report[f'{model}_{unit}'], model=model)
+                if f'{model}_steps' in report: self.inc('steps_total', report[f'{model}_steps'], model=model)
+            self.inc('audio_seconds_total', report.get('audio_seconds', 0))
+            for cache, stats in report.get('caches', {}).items():
+                self.set('cache_hits_total', stats['hits'], 'counter', cache=cache)
+                self.set('cache_misses_total', stats['misses'], 'counter', cache=cache)
+                self.set('cache_items', stats['items'], cache=cache)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, kind in self.types.items():
+                lines.append(f'# TYPE {self.prefix}_{name} {kind}')
+                for (n, labels), value in self.values.items():
+                    if n != name: continue
+                    labels = ','.join(f'{k}="{v}"' for k,v in labels)
+                    lines.append(f'{self.prefix}_{name}{{{labels}}} {value}' if labels else f'{self.prefix}_{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+# %% ../nbs/J. Metrics.ipynb 12
+class _Request:
+    def __init__(self, report, profiler):
+        self.report = report
+        self.profiler = profiler
+        self.start = time.perf_counter()
+
+# %% ../nbs/J. Metrics.ipynb 13
+class Metrics:
+    "Sends a performance report for every request to the `sinks` (see `LogSink`, `CounterSink` or any callable)."
+    def __init__(self, sinks=(), profile_every=0, profile_dir='profiles'):
+        self.sinks = list(sinks)
+        self.profile_every = profile_every
+        self.profile_dir = Path(profile_dir)
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.profiling = threading.Lock()
+        self.local = threading.local()
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    @property
+    def enabled(self): return bool(self.sinks) or self.profile_every > 0
+
+    def _profiler(self, n):
+        if not self.profile_every or n % self.profile_every or not self.profiling.acquire(blocking=False): return None
+        activities = [ProfilerActivity.CPU] + ([ProfilerActivity.CUDA] if torch.cuda.is_available() else [])
+        profiler = profile(activities=activities)
+        profiler.start()
+        return profiler
+
+    def start(self, kind, **info):
+        "Starts a request, returns `None` if the metrics are disabled."
+        if not self.enabled: return None
+        with self.lock:
+            self.requests += 1
+            n = self.requests
+        return _Request(dict(kind=kind, request=n, **info, error=None, timings={}), self._profiler(n))
+
+    def finish(self, req, error=None):
+        "Completes the report of `req` (see `start`) and sends it to the sinks."
+        if req is None: return
+        report = req.report
+        report['timings']['total'] = time.perf_counter() - req.start
+        if error is not None: report['error'] = type(error).__name__
+        for model in ('t2s', 's2a'):
+            if report.get(f'{model}_steps'):
+                report[f'{model}_ms_per_step'] = report['timings'].get(f'{model}.decode', 0) / report[f'{model}_steps'] * 1000
+        if report.get('audio_seconds'):
+            report['x_realtime'] = report['audio_seconds'] / report['timings']['total']
+        if req.profiler is not None:
+            req.profiler.stop()
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            fname = self.profile_dir/f"{report['kind']}-{report['request']}.json"
+            req.profiler.export_chrome_trace(str(fname))
+            report['profile'] = str(fname)
+            self.profiling.release()
+        for sink in self.sinks:
+            try: sink(report)
+            except Exception:
+                print("A metrics sink failed:")
+                print(traceback.format_exc())
+
+    @contextmanager
+    def request(self, kind, **info):
+        """Collects the report of a request in this thread, yields the report dict to fill in (or `None`
+        if the metrics are disabled). Nested calls yield the report of the outermost one."""
+        outer = getattr(self.local, 'request', None)
+        if outer is not None:
+            yield outer.report
+            return
+        req = self.local.request = self.start(kind, **info)
+        try:
+            yield None if req is None else req.report
+        except BaseException as e:
+            self.finish(req, e)
+            raise
+        else:
+            self.finish(req)
+        finally:
+            self.local.request = None
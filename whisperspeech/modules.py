@@ -2,12 +2,18 @@
 
 # %% auto 0
 __all__ = ['LayerNorm', 'LinearHead', 'QueryHead', 'init_transformer', 'sinusoids', 'MultiHeadAttention',
-           'ResidualAttentionBlock', 'BaseDecoder', 'EmbeddingProjector', 'FlexEmbeddings']
+           'ResidualAttentionBlock', 'BaseDecoder', 'EmbeddingProjector', 'FlexEmbeddings', 'quantize_linears',
+           'skip_init', 'load_spec', 'load_weights', 'write_safetensors', 'read_safetensors', 'assign_tensors']
 
 # %% ../nbs/A. Neural modules.ipynb 2
 import torch
 import numpy as np
 import math
+import json
+import itertools
+import bisect
+import threading
+from contextlib import contextmanager
 
 from torch import Tensor, nn
 import torch.nn.functional as F
@@ -84,7 +90,8 @@ class MultiHeadAttention(nn.Module):
     def merge_linears(self, layers, mults):
         bias = [x.bias for x in layers if x.bias is not None][0]
         din, dout = layers[0].weight.shape
-        new = nn.Linear(din, len(layers) * dout).to(layers[0].weight.device)
+        with skip_init(): # the weights are overwritten below
+            new = nn.Linear(din, len(layers) * dout).to(layers[0].weight.device)
         with torch.no_grad():
             new.weight[:] = torch.cat([x.weight * m for x,m in zip(layers, mults)])
             new.bias[:] = torch.cat([torch.zeros_like(bias) if x.bias is None else x.bias * m for x, m in zip(layers, mults)])
@@ -108,6 +115,30 @@ class MultiHeadAttention(nn.Module):
             x = rope_rotate(x, x_positions * subsampling, *self.rotary(x))
         return x.permute(0, 2, 1, 3)
 
+    def project_kv(self, kvx, kv_positions, k=None, v=None):
+        if k is None:
+            if self.kv: k,v = self.kv(kvx).split(self.odim, dim=-1)
+            else: k,v = self.key(kvx) * self.sqrt_qk_scale, self.value(kvx)
+        k = self.split_heads(k, kv_positions, rope = self.rotary, subsampling = self.key_subsampling)
+        v = self.split_heads(v, kv_positions)
+        return k, v
+
+    def prime_cache(self, kvx, kv_positions, rows=None):
+        """Computes the cross-attention keys and values for `kvx` and stores them in the cache so the following
+        calls with the same `kvx` tensor only have to project the queries.
+
+        With `rows` only these batch rows of `kvx` are (re)computed."""
+        if self.k_cache is None: return
+        if rows is None:
+            k, v = self.project_kv(kvx, kv_positions)
+            self.k_cache[:len(k),:,kv_positions] = k
+            self.v_cache[:len(v),:,kv_positions] = v
+        else:
+            k, v = self.project_kv(kvx[rows], kv_positions)
+            self.k_cache[rows.unsqueeze(1),:,kv_positions] = k.transpose(1, 2)
+            self.v_cache[rows.unsqueeze(1),:,kv_positions] = v.transpose(1, 2)
+        self.cached_kvx = kvx
+
     def forward(
         self,
         qx,
@@ -116,32 +147,45 @@ class MultiHeadAttention(nn.Module):
         kv_positions,
         causal = False,
         mask=None,
+        kv_len=None,
     ):
-        if self.qkv:
+        rotated = False
+        if self.qkv and self.rotary and q_positions is kv_positions and self.query_subsampling == self.key_subsampling:
+            # self-attention, rotate the queries and the keys together
+            qkv = self.qkv(qx).view(*qx.shape[:2], 3, self.n_head, -1)
+            qk = rope_rotate(qkv[:,:,:2], q_positions * self.query_subsampling, *self.rotary(qkv))
+            q, k, v = qk[:,:,0].transpose(1, 2), qk[:,:,1].transpose(1, 2), qkv[:,:,2].transpose(1, 2)
+            rotated = True
+        elif self.qkv:
             q,k,v = self.qkv(qx).split(self.odim, dim=-1)
-        elif self.kv:
-            q = self.q(qx)
-            k,v = self.kv(kvx).split(self.odim, dim=-1)
         else:
-            q,k,v = None,None,None
-        
-        if q is None: q = self.query(qx) * self.sqrt_qk_scale
-        q = self.split_heads(q, q_positions, rope = self.rotary, subsampling = self.query_subsampling)
-
-        if kvx is not self.cached_kvx:
-            if k is None: k = self.key(kvx) * self.sqrt_qk_scale
-            k = self.split_heads(k, kv_positions, rope = self.rotary, subsampling = self.key_subsampling)
-            if v is None: v = self.value(kvx)
-            v = self.split_heads(v, kv_positions)
-            if self.k_cache is not None:
-                self.k_cache[:,:,kv_positions] = k
-                self.v_cache[:,:,kv_positions] = v
-
-        if self.k_cache is not None:
-            k, v = self.k_cache, self.v_cache
+            q = self.q(qx) if self.kv else self.query(qx) * self.sqrt_qk_scale
+            k,v = None,None
+        if not rotated:
+            q = self.split_heads(q, q_positions, rope = self.rotary, subsampling = self.query_subsampling)
+
+        if self.cached_kvx is not None and kvx is self.cached_kvx:
+            # cross-attention keys and values computed once per request by `prime_cache`
+            k, v = self.k_cache[:len(q),:,:kvx.shape[1]], self.v_cache[:len(q),:,:kvx.shape[1]]
+        else:
+            if not rotated: k, v = self.project_kv(kvx, kv_positions, k, v)
+            if self.k_cache is not None and not self.cross:
+                if kv_positions.dim() == 2:
+                    # every batch row is at a different position (continuous batching)
+                    rows = torch.arange(len(k), device=k.device).unsqueeze(1)
+                    self.k_cache[rows,:,kv_positions] = k.transpose(1, 2)
+                    self.v_cache[rows,:,kv_positions] = v.transpose(1, 2)
+                else:
+                    # the batch can be smaller than the cache (max_batch_size)
+                    self.k_cache[:len(k),:,kv_positions] = k
+                    self.v_cache[:len(v),:,kv_positions] = v
+                # only attend over the filled part of the cache (`kv_len` is bucketed by `BaseDecoder.kv_bucket`)
+                k, v = self.k_cache[:len(q),:,:kv_len], self.v_cache[:len(q),:,:kv_len]
 
         if mask is not None:
             mask = mask[q_positions]
+            mask = mask[...,:k.shape[-2]] # the keys can be shorter than the context (see `kv_len`)
+            if mask.dim() == 3: mask = mask.unsqueeze(1) # per-row positions, broadcast over the heads
             
         wv = F.scaled_dot_product_attention(q, k, v, attn_mask=mask, dropout_p=0, is_causal=causal)
         
@@ -152,27 +196,29 @@ class MultiHeadAttention(nn.Module):
 
 import torch
 
+_rope_tables = {}
+
+def rope_tables(dim, device, dtype, base=10000, length=2500):
+    """Returns the `(length, dim//2)` cos and sin tables for RoPE. They are computed once for every device
+    and dtype and shared by all the layers."""
+    key = (dim, base, length, torch.device(device), dtype)
+    if key not in _rope_tables:
+        # computed in float64 so the positions stay exact even if the model runs in half precision
+        inv_freq = 1.0 / (base ** (torch.arange(0, dim, 2, dtype=torch.float64) / dim))
+        freqs = torch.outer(torch.arange(length, dtype=torch.float64), inv_freq)
+        _rope_tables[key] = (freqs.cos().to(device, dtype), freqs.sin().to(device, dtype))
+    return _rope_tables[key]
+
 class Rotary(torch.nn.Module):
     def __init__(self, dim, base=10000):
         super().__init__()
+        self.dim = dim
+        self.base = base
         inv_freq = 1.0 / (base ** (torch.arange(0, dim, 2).float() / dim))
-        self.register_buffer("inv_freq", inv_freq)
-        self.seq_len_cached = None
-        self.cos_cached = None
-        self.sin_cached = None
+        self.register_buffer("inv_freq", inv_freq) # unused, kept for compatibility with the saved models
 
     def forward(self, x, seq_dim=1):
-        seq_len = x.shape[seq_dim]
-        if not self.seq_len_cached or seq_len > self.seq_len_cached:
-            self.seq_len_cached = 2500
-            # self.seq_len_cached = seq_len
-            
-            t = torch.arange(self.seq_len_cached, device=x.device).type_as(self.inv_freq)
-            freqs = torch.einsum("i,j->ij", t, self.inv_freq)
-            emb = torch.cat((freqs, freqs), dim=-1).to(x.device)
-            self.cos_cached = emb.cos()[None, :, None, :]
-            self.sin_cached = emb.sin()[None, :, None, :]
-        return self.cos_cached, self.sin_cached
+        return rope_tables(self.dim, x.device, x.dtype, self.base)
 
 
 # rotary pos emb helpers:
@@ -183,7 +229,21 @@ def rotate_half(x):
     )
 
 def rope_rotate(x, positions, cos, sin):
-    return x * cos[:,positions] + rotate_half(x) * sin[:,positions]
+    """Rotates the `(batch, n, ..., head_width)` tensor `x` by the `cos` and `sin` tables from `rope_tables`.
+
+    The positions can be shared by the whole batch `(n,)` or given for every row `(batch, n)`."""
+    shape = (*positions.shape, *[1] * (x.dim() - 3), -1)
+    cos, sin = cos[positions].view(shape), sin[positions].view(shape)
+    x1, x2 = x.chunk(2, dim=-1)
+    if torch.compiler.is_compiling() or (x.requires_grad and torch.is_grad_enabled()):
+        # inductor fuses this into a single kernel (and the `out=` version below does not support autograd)
+        return torch.cat([x1 * cos - x2 * sin, x2 * cos + x1 * sin], dim=-1)
+    # the same as `x * cos + rotate_half(x) * sin` without the intermediate tensors
+    out = torch.empty_like(x)
+    o1, o2 = out.chunk(2, dim=-1)
+    torch.mul(x1, cos, out=o1).addcmul_(x2, sin, value=-1)
+    torch.mul(x2, cos, out=o2).addcmul_(x1, sin)
+    return out
 
 # %% ../nbs/A. Neural modules.ipynb 7
 class ResidualAttentionBlock(nn.Module):
@@ -217,9 +277,10 @@ class ResidualAttentionBlock(nn.Module):
         xa_positions: Optional[Tensor] = None,
         causal = False,
         mask=None,
+        kv_len=None,
     ):
         lnx = self.attn_ln(x)
-        x = x + self.attn(lnx, x_positions, lnx, x_positions, causal=causal, mask=mask)
+        x = x + self.attn(lnx, x_positions, lnx, x_positions, causal=causal, mask=mask, kv_len=kv_len)
         if self.cross_attn:
             lnx = self.cross_attn_ln(x)
             x = x + self.cross_attn(lnx, x_positions, xa, xa_positions)
@@ -242,10 +303,78 @@ class BaseDecoder(nn.Module):
         
         mask = torch.empty(length, length).fill_(-torch.inf).triu_(1)
         self.register_buffer("mask", mask, persistent=False)
-
-    def forward(self, x, x_positions, xenc, xenc_positions):
+        self.kv_buckets = None
+
+    def setup_kv_cache(self, max_batch_size, max_seq_len, max_cross_seq_len=None, min_bucket=64):
+        """Allocates the KV caches for `max_batch_size` rows of `max_seq_len` positions.
+
+        A batch slot takes `kv_cache_bytes()` of memory so `max_seq_len` can be lowered to the longest expected
+        request. Decoding only attends over the filled part of the cache rounded up to one of `kv_buckets`
+        (`min_bucket` times powers of two) which keeps the number of different shapes (and `torch.compile`
+        recompilations) small."""
+        assert max_seq_len <= self.length, f"the model supports at most {self.length} positions"
+        for l in self.layers:
+            l.setup_kv_cache(max_batch_size, max_seq_len, max_cross_seq_len)
+        self.kv_buckets = []
+        n = min_bucket
+        while n < max_seq_len:
+            self.kv_buckets.append(n)
+            n *= 2
+        self.kv_buckets.append(max_seq_len)
+
+    @property
+    def max_seq_len(self):
+        "The number of positions in the KV cache (or the full context when there is no cache)."
+        return self.kv_buckets[-1] if self.kv_buckets else self.length
+
+    @property
+    def max_batch_size(self):
+        "The number of rows in the KV cache (None when there is no cache)."
+        k_cache = self.layers[0].attn.k_cache
+        return None if k_cache is None else k_cache.shape[0]
+
+    def check_batch_size(self, n):
+        "Raises a `ValueError` if a batch of `n` rows does not fit in the KV cache."
+        if self.max_batch_size is not None and n > self.max_batch_size:
+            raise ValueError(f"a batch of {n} does not fit in the KV cache set up for {self.max_batch_size} rows, "
+                             f"split it or call optimize(max_batch_size={n})")
+
+    def kv_bucket(self, n):
+        "The length of the cache prefix to attend over when the first `n` positions are filled."
+        if self.kv_buckets is None: return None
+        return self.kv_buckets[bisect.bisect_left(self.kv_buckets, n)]
+
+    def prime_cross_attention(self, xenc, xenc_positions, rows=None):
+        """Computes the cross-attention keys and values of every layer once per request. Decoding steps that
+        get the same `xenc` tensor afterwards only project the new query token.
+
+        The schedulers keep the encoder outputs of all the batch slots in a single tensor and pass the `rows`
+        that were updated."""
+        for l in self.layers:
+            l.cross_attn.prime_cache(xenc, xenc_positions, rows)
+
+    def reset_cross_attention(self):
+        for l in self.layers:
+            l.cross_attn.cached_kvx = None
+
+    def select_rows(self, rows, kv_len=None):
+        """Moves the self-attention KV cache of the batch `rows` (in this order) to the first rows of the cache
+        so decoding can continue with a smaller batch (e.g. without the rows that already finished). Only the
+        first `kv_len` positions are copied. The cross-attention has to be primed again for the new batch."""
+        rows = torch.as_tensor(rows, device=self.mask.device)
+        for l in self.layers:
+            if l.attn.k_cache is None: continue
+            l.attn.k_cache[:len(rows),:,:kv_len] = l.attn.k_cache[rows,:,:kv_len]
+            l.attn.v_cache[:len(rows),:,:kv_len] = l.attn.v_cache[rows,:,:kv_len]
+        self.reset_cross_attention()
+
+    def kv_cache_bytes(self):
+        "The memory used by the self-attention KV cache of a single batch slot."
+        return sum(l.attn.k_cache[0].nbytes + l.attn.v_cache[0].nbytes for l in self.layers if l.attn.k_cache is not None)
+
+    def forward(self, x, x_positions, xenc, xenc_positions, kv_len=None):
         for i,l in enumerate(self.layers):
-            x = l(x, x_positions, xenc, xenc_positions, causal=False, mask=self.mask)
+            x = l(x, x_positions, xenc, xenc_positions, causal=False, mask=self.mask, kv_len=kv_len)
 
         x = self.ln_post(x)
 
@@ -270,6 +399,7 @@ class FlexEmbeddings(nn.Module):
             
         self.register_buffer('merged_in', None)
         self.register_buffer('merged_out', None)
+        self.register_buffer('bias_out', None)
     
     def set_frozen_embeddings(self, values):
         with torch.no_grad():
@@ -328,3 +458,104 @@ class FlexEmbeddings(nn.Module):
         
         special_logits = (orig_embs @ self.special.weight.to(orig_embs.dtype).T).float()
         return torch.cat([main_logits, special_logits], dim=-1)
+
+# %% ../nbs/A. Neural modules.ipynb 10
+def quantize_linears(model, names=('qkv', 'q', 'kv', 'out', 'mlp', 'splitter')):
+    """Replaces the `nn.Linear` layers in all the submodules called one of `names` with dynamically quantized
+    int8 versions (the weights are stored in int8, the activations are quantized on the fly).
+
+    The embeddings, the unembedding and the LayerNorms are not touched. The quantized kernels only run on the CPU
+    and expect float32 activations."""
+    from torch.ao.quantization import quantize_dynamic, default_dynamic_qconfig
+    spec = {n:default_dynamic_qconfig for n,m in model.named_modules() if n.split('.')[-1] in names}
+    quantize_dynamic(model, spec, inplace=True)
+    return model
+
+# %% ../nbs/A. Neural modules.ipynb 12
+_init_fns = ['uniform_', 'normal_', 'trunc_normal_', 'constant_', 'zeros_', 'ones_',
+             'kaiming_uniform_', 'kaiming_normal_', 'xavier_uniform_', 'xavier_normal_']
+_skip_init_lock = threading.Lock()
+_skip_init_depth = 0
+_orig_init_fns = {}
+
+def _no_init(tensor, *args, **kwargs): return tensor
+
+@contextmanager
+def skip_init():
+    "Skips the random weight initialization of all the modules created inside the context."
+    global _skip_init_depth
+    with _skip_init_lock:
+        if _skip_init_depth == 0:
+            for name in _init_fns:
+                _orig_init_fns[name] = getattr(nn.init, name)
+                setattr(nn.init, name, _no_init)
+        _skip_init_depth += 1
+    try:
+        yield
+    finally:
+        with _skip_init_lock:
+            _skip_init_depth -= 1
+            if _skip_init_depth == 0:
+                for name, fn in _orig_init_fns.items(): setattr(nn.init, name, fn)
+
+def load_spec(fname):
+    "Loads a saved model (config and weights) to the CPU, memory-mapping the tensors if possible."
+    try:
+        return torch.load(fname, map_location='cpu', mmap=True)
+    except RuntimeError:
+        # mmap only works for files saved in the zip format
+        return torch.load(fname, map_location='cpu')
+
+def load_weights(model, state_dict):
+    "Loads `state_dict` into `model` reusing the tensors (converted to the model dtypes if needed) instead of copying them."
+    own = model.state_dict()
+    state_dict = {k:v.to(own[k].dtype) if isinstance(v, torch.Tensor) and isinstance(own.get(k), torch.Tensor) else v
+                  for k,v in state_dict.items()}
+    model.load_state_dict(state_dict, assign=True)
+    return model
+
+# %% ../nbs/A. Neural modules.ipynb 14
+def _safetensors():
+    try:
+        import safetensors.torch
+    except ImportError:
+        raise ImportError("saving and loading .safetensors models needs the safetensors package: pip install safetensors") from None
+    return safetensors
+
+def write_safetensors(model, fname, **meta):
+    """Saves all the parameters and buffers of `model` (apart from the KV caches) to a safetensors file
+    and stores the `meta` values as JSON in its header."""
+    st = _safetensors()
+    assert not any(type(m).__module__.startswith('torch.ao.') for m in model.modules()), "quantized models cannot be saved"
+    tensors, storages = {}, set()
+    for name, t in itertools.chain(model.named_parameters(remove_duplicate=False), model.named_buffers(remove_duplicate=False)):
+        if name.endswith(('.k_cache', '.v_cache')): continue
+        t = t.detach().contiguous()
+        # safetensors does not support tensors sharing memory (e.g. tied weights)
+        if t.untyped_storage().data_ptr() in storages: t = t.clone()
+        storages.add(t.untyped_storage().data_ptr())
+        tensors[name] = t
+    st.torch.save_file(tensors, fname, metadata={k:json.dumps(v) for k,v in meta.items()})
+
+def read_safetensors(fname, device='cpu'):
+    "Memory-maps a safetensors file and returns the tensors and the JSON metadata from its header."
+    st = _safetensors()
+    with st.safe_open(fname, framework='pt') as f:
+        meta = {k:json.loads(v) for k,v in (f.metadata() or {}).items()}
+    return st.torch.load_file(fname, device=str(device)), meta
+
+def assign_tensors(model, tensors, dtype=None):
+    """Puts `tensors` into the parameters and buffers of `model` (usually created on the `meta` device) without copying.
+
+    With `dtype` the weights of the linear and embedding layers and all the buffers are converted (like in `switch_dtypes`)."""
+    for name, t in tensors.items():
+        mod_name, _, attr = name.rpartition('.')
+        m = model.get_submodule(mod_name)
+        if dtype is not None and t.is_floating_point() and (attr in m._buffers or isinstance(m, (nn.Linear, nn.Embedding))):
+            t = t.to(dtype)
+        if attr in m._parameters: m._parameters[attr] = nn.Parameter(t, requires_grad=m._parameters[attr].requires_grad)
+        elif attr in m._buffers: m._buffers[attr] = t
+        else: raise KeyError(f"unexpected tensor in the model file: {name}")
+    missing = [n for n,t in itertools.chain(model.named_parameters(remove_duplicate=False), model.named_buffers(remove_duplicate=False)) if t.is_meta]
+    if missing: raise KeyError(f"tensors missing from the model file: {', '.join(missing)}")
+    return model
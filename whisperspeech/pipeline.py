@@ -1,17 +1,111 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/7. Pipeline.ipynb.
 
 # %% auto 0
-__all__ = ['Pipeline']
+__all__ = ['split_text', 'Pipeline']
 
 # %% ../nbs/7. Pipeline.ipynb 1
 import torch
 from whisperspeech.t2s_up_wds_mlang_enclm import TSARTransformer
 from whisperspeech.s2a_delar_mup_wds_mlang import SADelARTransformer
 from whisperspeech.a2wav import Vocoder
+from whisperspeech.caches import SpeakerEmbeddingCache
+from whisperspeech import sampling
+from whisperspeech.metrics import Metrics, StageTimer, add_stages, add_time, add_count
 import traceback
+import re
+import time
+import queue
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
 # %% ../nbs/7. Pipeline.ipynb 2
+_sentence_end = re.compile(r'(?<=[.!?…。！？])\s+')
+_clause_end = re.compile(r'(?<=[,;:，、；：])\s+|\s+(?=[–—-]\s)')
+
+def _byte_len(txt):
+    return len(txt.encode('utf-8'))
+
+def _split_piece(txt, max_len):
+    "Splits a single sentence that is too long at clause boundaries, then at spaces and as a last resort anywhere."
+    for splitter in [_clause_end, re.compile(r'\s+')]:
+        parts = [x for x in splitter.split(txt) if x]
+        if len(parts) > 1: return _pack(parts, max_len)
+    out = []
+    while _byte_len(txt) > max_len:
+        n = max_len
+        while _byte_len(txt[:n]) > max_len: n -= 1
+        out.append(txt[:n])
+        txt = txt[n:]
+    return out + [txt]
+
+def _pack(parts, max_len):
+    chunks, cur = [], ""
+    for part in parts:
+        if _byte_len(part) > max_len:
+            if cur: chunks.append(cur)
+            *full, cur = _split_piece(part, max_len)
+            chunks += full
+        elif not cur:
+            cur = part
+        elif _byte_len(cur) + 1 + _byte_len(part) <= max_len:
+            cur = cur + " " + part
+        else:
+            chunks.append(cur)
+            cur = part
+    if cur: chunks.append(cur)
+    return chunks
+
+def split_text(txt, max_len=300):
+    """Splits `txt` into pieces of at most `max_len` UTF-8 bytes (the T2S tokenizer budget). It prefers
+    sentence boundaries, then clause boundaries, then spaces and joins short sentences together."""
+    txt = " ".join(txt.split())
+    if not txt: return []
+    return _pack(_sentence_end.split(txt), max_len)
+
+# %% ../nbs/7. Pipeline.ipynb 4
+def _iterate_in_thread(make_iter):
+    """Runs the iterator returned by `make_iter()` in a background thread (and on a separate CUDA stream)
+    and yields its items."""
+    items = queue.Queue()
+    done = object()
+    def worker():
+        try:
+            stream = torch.cuda.Stream() if torch.cuda.is_available() else None
+            with torch.cuda.stream(stream):
+                for x in make_iter():
+                    if stream is not None: stream.synchronize()
+                    items.put(x)
+        except Exception as e:
+            items.put(e)
+        items.put(done)
+    threading.Thread(target=worker, daemon=True).start()
+    while True:
+        x = items.get()
+        if x is done: return
+        if isinstance(x, Exception): raise x
+        yield x
+
+def _timed_iter(it, waits, key):
+    "Yields the items of `it` and adds the time spent waiting for them to `waits[key]`."
+    it = iter(it)
+    while True:
+        start = time.perf_counter()
+        try: x = next(it)
+        except StopIteration: return
+        waits[key] = waits.get(key, 0) + time.perf_counter() - start
+        yield x
+
+def _crossfade_concat(audios, n):
+    out = audios[0]
+    for audio in audios[1:]:
+        m = min(n, out.shape[-1], audio.shape[-1])
+        fade = torch.linspace(0, 1, m, device=audio.device, dtype=audio.dtype)
+        mixed = out[...,out.shape[-1]-m:] * (1-fade) + audio[...,:m] * fade
+        out = torch.cat([out[...,:out.shape[-1]-m], mixed, audio[...,m:]], dim=-1)
+    return out
+
 class Pipeline:
     default_speaker = torch.tensor(
        [-0.2929, -0.4503,  0.4155, -0.1417,  0.0473, -0.1624, -0.2322,  0.7071,
@@ -40,54 +134,293 @@ class Pipeline:
          0.2702,  0.1699, -0.1443, -0.9614,  0.3261,  0.1718,  0.3545, -0.0686]
     )
     
-    def __init__(self, t2s_ref=None, s2a_ref=None, optimize=True, torch_compile=False):
-        args = dict()
-        try:
-            if t2s_ref:
-                args["ref"] = t2s_ref
-            self.t2s = TSARTransformer.load_model(**args).cuda()
-            if optimize: self.t2s.optimize(torch_compile=torch_compile)
-        except:
-            print("Failed to load the T2S model:")
-            print(traceback.format_exc())
+    def __init__(self, t2s_ref=None, s2a_ref=None, optimize=True, torch_compile=False, max_batch_size=1,
+                 device=None, dtype=None, num_threads=None, quantize=None, speaker_cache_dir=None, lazy=False, metrics=None):
+        """Loads the T2S, S2A and vocoder models. `device` defaults to CUDA (if available) and `dtype` to
+        float16 on CUDA and float32 on the CPU (bfloat16 is a faster choice on recent CPUs). `num_threads`
+        sets the number of threads PyTorch uses for CPU inference. `quantize='int8'` switches the T2S and
+        S2A models to dynamically quantized int8 layers (CPU only). Speaker embeddings extracted from audio
+        files are cached in memory and, if `speaker_cache_dir` is given, on disk.
+
+        The three models are loaded in parallel threads. With `lazy=True` the constructor returns right away
+        and the first use of a model waits for it to finish loading. The time spent in every stage
+        is recorded in `startup_timings`.
+
+        `metrics` (a `metrics.Metrics` with some sinks) gets a performance report for every generation."""
+        self.max_batch_size = max_batch_size
+        if device is None: device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.device = torch.device(device)
+        if dtype is None: dtype = torch.float16 if self.device.type == 'cuda' else torch.float32
+        if num_threads is not None: torch.set_num_threads(num_threads)
+        self.encoder = None
+        self.speaker_cache = SpeakerEmbeddingCache(cache_dir=speaker_cache_dir)
+        self.metrics = metrics if metrics is not None else Metrics()
+
+        self.startup_timings = {}
+        start = time.perf_counter()
+        def finished(_): self.startup_timings['total'] = time.perf_counter() - start
+        opt_args = dict(max_batch_size=max_batch_size, dtype=dtype, torch_compile=torch_compile, quantize=quantize) if optimize else None
+        pool = ThreadPoolExecutor(3, thread_name_prefix='whisperspeech-load')
+        self._models = {
+            't2s': pool.submit(self._load_model, 't2s', TSARTransformer, t2s_ref, opt_args),
+            's2a': pool.submit(self._load_model, 's2a', SADelARTransformer, s2a_ref, opt_args),
+            'vocoder': pool.submit(self._load_vocoder),
+        }
+        for f in self._models.values(): f.add_done_callback(finished)
+        pool.shutdown(wait=False)
+        if not lazy: self.wait()
+
+    @classmethod
+    def from_models(cls, t2s, s2a, vocoder, max_batch_size=1, speaker_cache_dir=None, metrics=None):
+        """Creates a pipeline from models that are already loaded (and optimized), e.g. tiny randomly initialized
+        ones from `_make_model('micro')` for testing."""
+        self = cls.__new__(cls)
+        self.max_batch_size = max_batch_size
+        self.device = t2s.device
+        self.encoder = None
+        self.speaker_cache = SpeakerEmbeddingCache(cache_dir=speaker_cache_dir)
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.startup_timings = {}
+        self._models = {}
+        for name, model in [('t2s', t2s), ('s2a', s2a), ('vocoder', vocoder)]:
+            self._models[name] = Future()
+            self._models[name].set_result(model)
+        return self
+
+    @contextmanager
+    def _timed(self, stage):
+        start = time.perf_counter()
+        yield
+        self.startup_timings[stage] = time.perf_counter() - start
+
+    def _load_model(self, name, cls, ref, opt_args):
         try:
-            if s2a_ref:
-                args["ref"] = s2a_ref
-            self.s2a = SADelARTransformer.load_model(**args).cuda()
-            if optimize: self.s2a.optimize(torch_compile=torch_compile)
+            with self._timed(f'{name}.load'):
+                model = cls.load_model(**({'ref': ref} if ref else {}), device=self.device)
+            if opt_args is not None:
+                with self._timed(f'{name}.optimize'):
+                    model.optimize(**opt_args)
+            return model
         except:
-            print("Failed to load the S2A model:")
+            print(f"Failed to load the {name.upper()} model:")
             print(traceback.format_exc())
-        self.vocoder = Vocoder()
-        self.encoder = None
+
+    def _load_vocoder(self):
+        with self._timed('vocoder.load'):
+            return Vocoder(device=self.device)
+
+    def wait(self):
+        "Waits until all the models are loaded and returns the startup timings (in seconds)."
+        for f in self._models.values(): f.result()
+        return self.startup_timings
+
+    @property
+    def t2s(self): return self._models['t2s'].result()
+    @property
+    def s2a(self): return self._models['s2a'].result()
+    @property
+    def vocoder(self): return self._models['vocoder'].result()
+
+    def cache_stats(self):
+        "Returns the statistics of the speaker embedding cache and the T2S caches (see `TSARTransformer.setup_caches`)."
+        stats = {'speaker': self.speaker_cache.stats()}
+        stats.update({f't2s.{name}': x for name,x in self.t2s.cache_stats().items()})
+        return stats
+
+    @contextmanager
+    def _request(self, kind, **info):
+        with self.metrics.request(kind, **info) as report:
+            yield report
+            if report is not None: report['caches'] = self.cache_stats()
+
+    def _record(self, report, model, toks=None):
+        """Adds the stage timings of the last `model` (`t2s` or `s2a`) call and the number of tokens in `toks`
+        to `report`. The timer is taken from the model so outputs served from the T2S output cache are not counted."""
+        m = getattr(self, model)
+        timer, m.stage_timer = m.stage_timer, None
+        if report is None or timer is None: return
+        add_stages(report, model, timer)
+        if toks is None: return
+        if model == 't2s':
+            add_count(report, 't2s_tokens', sum(len(x) - 1 for x in toks)) # without the start token
+        else:
+            frames = sum(x.shape[-1] for x in toks)
+            add_count(report, 's2a_frames', frames)
+            add_count(report, 'audio_seconds', frames / 75)
+
+    def _vocode(self, report, decode, *args):
+        "Calls `decode` (a `Vocoder` method) and adds the time it took to `report`."
+        if report is None: return decode(*args)
+        timer = StageTimer(self.vocoder.device)
+        audio = decode(*args)
+        timer.mark('vocoder')
+        add_time(report, 'vocoder', timer.stats()['vocoder'])
+        return audio
+
+    speaker_encoder_id = "speechbrain/spkrec-ecapa-voxceleb"
 
     def extract_spk_emb(self, fname):
         """Extracts a speaker embedding from the first 30 seconds of the give audio file.
+
+        The results are cached by the file contents so repeated requests with the same file skip both
+        the audio decoding and the encoder.
         """
+        return self.speaker_cache.get(fname, self.speaker_encoder_id, self._extract_spk_emb)
+
+    def _extract_spk_emb(self, fname):
         import torchaudio
         if self.encoder is None:
             from speechbrain.pretrained import EncoderClassifier
-            self.encoder = EncoderClassifier.from_hparams("speechbrain/spkrec-ecapa-voxceleb",
+            self.encoder = EncoderClassifier.from_hparams(self.speaker_encoder_id,
                                                           savedir="~/.cache/speechbrain/",
-                                                          run_opts={"device": "cuda"})
+                                                          run_opts={"device": str(self.device)})
         samples, sr = torchaudio.load(fname)
         samples = self.encoder.audio_normalizer(samples[0,:30*sr], sr)
         spk_emb = self.encoder.encode_batch(samples)
         return spk_emb[0,0]
         
-    def generate_atoks(self, text, speaker=None, lang='en', cps=15, step_callback=None):
-        if speaker is None: speaker = self.default_speaker
-        elif isinstance(speaker, (str, Path)): speaker = self.extract_spk_emb(speaker)
-        text = text.replace("\n", " ")
-        stoks = self.t2s.generate(text, cps=cps, lang=lang, step=step_callback)
-        atoks = self.s2a.generate(stoks, speaker.unsqueeze(0), step=step_callback)
-        return atoks
+    def get_speaker_emb(self, speaker):
+        if speaker is None: return self.default_speaker
+        if isinstance(speaker, (str, Path)): return self.extract_spk_emb(speaker)
+        return speaker
+
+    def stream_stoks(self, text, lang='en', cps=15, chunk=25, seed=None):
+        """Runs T2S in a background thread and returns an iterator over chunks of semantic tokens."""
+        return _iterate_in_thread(lambda: self.t2s.generate_chunks(text, cps=cps, lang=lang, chunk=chunk, seed=seed, show_progress_bar=False))
+
+    def generate_atoks(self, text, speaker=None, lang='en', cps=15, step_callback=None, pipelined=False, lag=25, seed=None):
+        """Generates acoustic tokens. With `pipelined=True` T2S runs in a background thread and S2A starts
+        decoding as soon as `lag` semantic tokens are available (`step_callback` is only called by S2A then).
+
+        `seed` (an int or a `torch.Generator`) makes the output reproducible. T2S and S2A get separate seeds
+        derived from it because with `pipelined=True` they run at the same time."""
+        with self._request('atoks', texts=1) as report:
+            speaker = self.get_speaker_emb(speaker)
+            text = text.replace("\n", " ")
+            t2s_seed, s2a_seed = sampling.split_seed(seed, 2)
+            if pipelined:
+                stoks = self.stream_stoks(text, lang=lang, cps=cps, chunk=lag, seed=t2s_seed)
+                atoks = torch.cat(list(self.s2a.generate_incremental(stoks, speaker.unsqueeze(0), lag=lag, seed=s2a_seed, step=step_callback)), dim=-1)
+                self._record(report, 't2s')
+            else:
+                stoks = self.t2s.generate(text, cps=cps, lang=lang, seed=t2s_seed, step=step_callback)
+                self._record(report, 't2s', [stoks])
+                atoks = self.s2a.generate(stoks, speaker.unsqueeze(0), seed=s2a_seed, step=step_callback)
+            self._record(report, 's2a', [atoks])
+            return atoks
         
-    def generate(self, text, speaker=None, lang='en', cps=15, step_callback=None):
-        return self.vocoder.decode(self.generate_atoks(text, speaker, lang=lang, cps=cps, step_callback=step_callback))
+    def generate_atoks_batch(self, texts, speakers=None, langs='en', cpss=15, step_callback=None, seed=None):
+        """Runs T2S and S2A over a padded batch of texts (split into groups of at most `max_batch_size`).
+
+        `speakers`, `langs` and `cpss` can be lists with one entry per text or single values shared by all texts.
+        `seed` is a list with a seed per text or a single int (text `i` gets `seed + i`), every text gets the
+        same result as `generate_atoks` with its seed.
+        """
+        bs = len(texts)
+        if not isinstance(speakers, (list, tuple)): speakers = [speakers] * bs
+        if not isinstance(langs, (list, tuple)): langs = [langs] * bs
+        if not isinstance(cpss, (list, tuple)): cpss = [cpss] * bs
+        t2s_seeds, s2a_seeds = zip(*[sampling.split_seed(s, 2) for s in sampling.row_seeds(seed, bs)])
+        texts = [text.replace("\n", " ") for text in texts]
+        with self._request('atoks_batch', texts=bs) as report:
+            speakers = [self.get_speaker_emb(speaker).to(self.s2a.device) for speaker in speakers]
+            atoks = []
+            for i in range(0, bs, self.max_batch_size):
+                sl = slice(i, i+self.max_batch_size)
+                stoks = self.t2s.generate_batch(texts[sl], cpss=cpss[sl], langs=langs[sl], seed=list(t2s_seeds[sl]), step=step_callback)
+                self._record(report, 't2s', stoks)
+                atoks += self.s2a.generate_batch(stoks, torch.stack(speakers[sl]), seed=list(s2a_seeds[sl]), step=step_callback)
+                self._record(report, 's2a', atoks[i:])
+            return atoks
+
+    def generate_batch(self, texts, speakers=None, langs='en', cpss=15, step_callback=None, seed=None):
+        """Generates speech for several texts at once and returns a list of waveforms."""
+        with self._request('batch', texts=len(texts)) as report:
+            atoks = self.generate_atoks_batch(texts, speakers, langs=langs, cpss=cpss, step_callback=step_callback, seed=seed)
+            return self._vocode(report, self.vocoder.decode_batch, atoks)
+
+    def generate(self, text, speaker=None, lang='en', cps=15, step_callback=None, pipelined=False, seed=None):
+        with self._request('generate', texts=1) as report:
+            atoks = self.generate_atoks(text, speaker, lang=lang, cps=cps, step_callback=step_callback, pipelined=pipelined, seed=seed)
+            return self._vocode(report, self.vocoder.decode, atoks)
     
-    def generate_to_file(self, fname, text, speaker=None, lang='en', cps=15, step_callback=None):
-        self.vocoder.decode_to_file(fname, self.generate_atoks(text, speaker, lang=lang, cps=cps, step_callback=None))
+    def generate_long(self, text, speaker=None, lang='en', cps=15, max_len=None, crossfade=0.05, step_callback=None, seed=None):
+        """Generates speech for texts of any length.
+
+        The text is split at sentence (or clause) boundaries into pieces that fit both the T2S input and
+        its ~30 second output window, all the pieces go through the batched T2S and S2A in groups of
+        `max_batch_size` (with the same speaker and cps) and the audio is joined with `crossfade` second
+        crossfades."""
+        if max_len is None:
+            # a safety margin for slower speakers: at most 2/3 of the output window at the requested cps
+            max_len = min(self.t2s.ttoks_len - 2, int(cps * 30 * 2 / 3))
+        texts = split_text(text.replace("\n", " "), max_len)
+        with self._request('long', texts=len(texts)) as report:
+            speaker = self.get_speaker_emb(speaker)
+            atoks = self.generate_atoks_batch(texts, speaker, langs=lang, cpss=cps, step_callback=step_callback, seed=seed)
+            audios = self._vocode(report, self.vocoder.decode_batch, atoks)
+            return _crossfade_concat(audios, int(crossfade * 24000))
+
+    def generate_stream(self, text, speaker=None, lang='en', cps=15, step_callback=None, min_frames=24, pipelined=False, lag=25, seed=None):
+        """Generates speech and yields 24kHz audio chunks as soon as they are ready.
+
+        S2A and the vocoder run in chunks so the first audio is ready after `min_frames` acoustic frames
+        (75 per second) instead of after the whole utterance. T2S runs to completion first unless
+        `pipelined=True` (see `generate_atoks`).
+
+        The metrics report is sent when the stream ends (or is closed), it also has the time to the first
+        audio chunk (`first_audio`). The time the caller spends between the chunks is not counted."""
+        req = self.metrics.start('stream', texts=1)
+        if req is None:
+            yield from self._generate_stream(None, text, speaker, lang, cps, step_callback, min_frames, pipelined, lag, seed)
+            return
+        try:
+            for audio in self._generate_stream(req.report, text, speaker, lang, cps, step_callback, min_frames, pipelined, lag, seed):
+                req.start -= time.perf_counter() # the time the caller spends between the chunks does not count
+                try: yield audio
+                finally: req.start += time.perf_counter()
+            req.report['caches'] = self.cache_stats()
+        except BaseException as e:
+            self.metrics.finish(req, e)
+            raise
+        self.metrics.finish(req)
+
+    def _generate_stream(self, report, text, speaker, lang, cps, step_callback, min_frames, pipelined, lag, seed):
+        speaker = self.get_speaker_emb(speaker)
+        text = text.replace("\n", " ")
+        t2s_seed, s2a_seed = sampling.split_seed(seed, 2)
+        if pipelined:
+            stoks = self.stream_stoks(text, lang=lang, cps=cps, chunk=lag, seed=t2s_seed)
+            atoks = self.s2a.generate_incremental(stoks, speaker.unsqueeze(0), chunk=8, lag=lag, seed=s2a_seed, step=step_callback)
+        else:
+            stoks = self.t2s.generate(text, cps=cps, lang=lang, seed=t2s_seed, step=step_callback)
+            self._record(report, 't2s', [stoks])
+            atoks = self.s2a.generate_chunks(stoks, speaker.unsqueeze(0), chunk=8, seed=s2a_seed, step=step_callback)
+        if report is None:
+            yield from self.vocoder.decode_stream(atoks, min_frames=min_frames)
+            return
+        # the vocoder pulls the S2A chunks so its time is the difference of the waits
+        waits, frames = {}, []
+        def counted(atoks):
+            for x in atoks:
+                frames.append(x.shape[-1])
+                yield x
+        start = time.perf_counter()
+        for audio in _timed_iter(self.vocoder.decode_stream(_timed_iter(counted(atoks), waits, 's2a'), min_frames=min_frames), waits, 'audio'):
+            if 'first_audio' not in report['timings']: add_time(report, 'first_audio', time.perf_counter() - start)
+            yield audio
+        if pipelined: self._record(report, 't2s')
+        self._record(report, 's2a')
+        add_count(report, 's2a_frames', sum(frames))
+        add_count(report, 'audio_seconds', sum(frames) / 75)
+        add_time(report, 'vocoder', waits.get('audio', 0) - waits.get('s2a', 0))
+
+    def generate_to_file(self, fname, text, speaker=None, lang='en', cps=15, step_callback=None, seed=None):
+        with self._request('file', texts=1) as report:
+            atoks = self.generate_atoks(text, speaker, lang=lang, cps=cps, step_callback=step_callback, seed=seed)
+            self._vocode(report, self.vocoder.decode_to_file, fname, atoks)
         
-    def generate_to_notebook(self, text, speaker=None, lang='en', cps=15, step_callback=None):
-        self.vocoder.decode_to_notebook(self.generate_atoks(text, speaker, lang=lang, cps=cps, step_callback=None))
+    def generate_to_notebook(self, text, speaker=None, lang='en', cps=15, step_callback=None, seed=None):
+        with self._request('notebook', texts=1) as report:
+            atoks = self.generate_atoks(text, speaker, lang=lang, cps=cps, step_callback=step_callback, seed=seed)
+            self._vocode(report, self.vocoder.decode_to_notebook, atoks)
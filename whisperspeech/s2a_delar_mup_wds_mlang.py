@@ -1,7 +1,8 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/4B. Multi-language semantic to acoustic token modeling.ipynb.
 
 # %% auto 0
-__all__ = ['load_dataset', 'DelSumEmbedding', 'DelSumHead', 'rand', 'Tunables', 'SADelARTransformer']
+__all__ = ['load_dataset', 'DelSumEmbedding', 'DelSumHead', 'MultiTokenHead', 'delay_atoks', 'rand', 'Tunables',
+           'SADelARTransformer']
 
 # %% ../nbs/4B. Multi-language semantic to acoustic token modeling.ipynb 1
 import io
@@ -26,6 +27,8 @@ from fastprogress import progress_bar, master_bar
 
 # %% ../nbs/4B. Multi-language semantic to acoustic token modeling.ipynb 4
 from .modules import *
+from . import sampling
+from .metrics import StageTimer
 
 # %% ../nbs/4B. Multi-language semantic to acoustic token modeling.ipynb 8
 def rand(start, end):
@@ -138,12 +141,33 @@ class DelSumEmbedding(nn.Module):
         self.embeddings = nn.ModuleList(embs)
         if pos_embs is not None:
             self.register_buffer("positional_embedding", pos_embs)
+        self.register_buffer('stacked_in', None)
+        self.register_buffer('stacked_out', None)
+        self.register_buffer('stacked_bias', None)
+
+    @torch.no_grad()
+    def convert_for_eval(self):
+        """Merges the embeddings of all the quantizers so they can be looked up with a single `embedding_bag`
+        call and unembedded with a single batched matmul."""
+        for emb in self.embeddings: emb.convert_for_eval()
+        if self.embeddings[0].merged_in is None: return
+        self.stacked_in = torch.cat([emb.merged_in.weight for emb in self.embeddings])
+        self.stacked_out = torch.stack([emb.merged_out.T for emb in self.embeddings]) # (q, width, vocab)
+        if self.embeddings[0].bias_out is not None:
+            self.stacked_bias = torch.stack([emb.bias_out for emb in self.embeddings]).unsqueeze(1)
 
     def forward(self, toks, xenc):
         with record_function("embeddings"):
             b,_,n = toks.shape
             newn = min(n, self.length)
 
+            if not self.training and self.stacked_in is not None:
+                # every quantizer gets its own slice of the stacked vocabulary
+                vocab = self.stacked_in.shape[0] // self.quantizers
+                offsets = torch.arange(0, self.quantizers * vocab, vocab, device=toks.device)
+                idxs = (toks[:,:,:newn] + offsets[:,None]).transpose(1,2).reshape(b*newn, self.quantizers)
+                return F.embedding_bag(idxs, self.stacked_in, mode='sum').view(b,newn,self.width).to(xenc.dtype)
+
             embs = torch.zeros((b,newn,self.width), dtype=xenc.dtype, device=xenc.device)
             for i in range(self.quantizers):
                 embs[:, :] += self.embeddings[i](toks[:,i,:])
@@ -151,6 +175,18 @@ class DelSumEmbedding(nn.Module):
             x = embs.to(xenc.dtype)
         return x
 
+    def unembed(self, split):
+        "Unembeds the `(b, n, quantizers, width)` splitter outputs into `(b, quantizers, n, vocab)` logits."
+        b, newn, q, w = split.shape
+        if self.training or self.stacked_out is None:
+            return torch.stack([self.embeddings[i].unembed(split[:,:,i]) for i in range(q)], dim=1)
+        x = split.permute(2,0,1,3).reshape(q, b*newn, w)
+        if self.stacked_bias is not None:
+            logits = torch.baddbmm(self.stacked_bias, x, self.stacked_out)
+        else:
+            logits = torch.bmm(x, self.stacked_out)
+        return logits.view(q, b, newn, -1).transpose(0,1)
+
 # %% ../nbs/4B. Multi-language semantic to acoustic token modeling.ipynb 38
 class DelSumHead(nn.Module):
     def __init__(self, quantizers=8, n_head=6, head_width=64):
@@ -167,8 +203,34 @@ class DelSumHead(nn.Module):
         with record_function("splitter"):
             split = self.splitter(x).view(b,newn,self.quantizers,self.width)
         with record_function("unembed"):
-            logits = torch.stack([embeddings[q].unembed(split[:,:,q]) for q in range(self.quantizers)], dim=1)
+            if isinstance(embeddings, DelSumEmbedding):
+                logits = embeddings.unembed(split)
+            else:
+                logits = torch.stack([embeddings[q].unembed(split[:,:,q]) for q in range(self.quantizers)], dim=1)
         return logits
+
+class MultiTokenHead(nn.Module):
+    """Predicts the decoder outputs for the next `steps` positions (after the one predicted by the main head)
+    with small residual MLPs. Their results go through the regular `DelSumHead`."""
+    def __init__(self, width, steps=2):
+        super().__init__()
+        self.blocks = nn.ModuleList([
+            nn.Sequential(LayerNorm(width), nn.Linear(width, width), nn.GELU(), nn.Linear(width, width))
+            for _ in range(steps)
+        ])
+
+    def forward(self, x):
+        return [x + block(x) for block in self.blocks]
+
+def delay_atoks(atoks, pad, length):
+    """Converts `(batch, quantizers, n)` acoustic tokens to the delayed layout used by the decoder: quantizer `j`
+    is shifted right by `j+1` positions and the gaps are filled with `pad`."""
+    b, q, n = atoks.shape
+    out = atoks.new_full((b, q, length), pad)
+    for j in range(q):
+        m = max(0, min(n, length-1-j))
+        out[:,j,1+j:1+j+m] = atoks[:,j,:m]
+    return out
         
 def rand(start, end):
     return random.random() * (end - start) + start
@@ -184,6 +246,7 @@ class Tunables:
     encoder_depth_ratio :float = 0.25
     linear_heads :bool = False
     rope :bool = True
+    mtp_steps :int = 0 # extra positions predicted by the `MultiTokenHead` (0 disables it)
     
     lr0 :float = 3e-3
     clip_gradient_norm :float = 2
@@ -271,14 +334,22 @@ class SADelARTransformer(nn.Module):
                                      ffn_mult=ffn_mult, depth=decoder_depth,
                                      rope=tunables.rope)
         self.head = DelSumHead(n_head=n_head, head_width=head_width, quantizers=quantizers)
+        self.mtp = MultiTokenHead(width, tunables.mtp_steps) if tunables.mtp_steps else None
         for l in self.decoder.layers:
             l.cross_attn.key_subsampling = 3
 #         for l in self.encoder:
 #             l.attn.key_subsampling = 3
 #             l.attn.query_subsampling = 3
         
-        self.register_buffer('val_true', torch.zeros(self.quantizers).cuda())
-        self.register_buffer('val_total', torch.zeros(self.quantizers).cuda())
+        self.register_buffer('val_true', torch.zeros(self.quantizers))
+        self.register_buffer('val_total', torch.zeros(self.quantizers))
+        if self.mtp:
+            self.register_buffer('val_mtp_true', torch.zeros(tunables.mtp_steps))
+            self.register_buffer('val_mtp_total', torch.zeros(tunables.mtp_steps))
+        self.converted_for_eval = False
+        self.mtp_stats = None
+        self.stop_stats = None
+        self.stage_timer = None
         self.apply(self.init_transformer)
 
     def setup(self, device):
@@ -360,24 +431,31 @@ class SADelARTransformer(nn.Module):
         if self.spk_factor: spk_embs = self.spk_to_hidden(spk_embs)
         return xenc + spk_embs.unsqueeze(1), positions, enc_logits
 
-    def forward(self, Stoks, Atoks, speakers, langs=None, out_stoks=None, noloss=False, xenc=None, xenc_positions=None, atoks_positions=None):
+    def _head(self, x):
+        logits = self.head(x, embeddings=self.embds)
+        return logits * (self.tunables.output_mult / (self.width / self.base_width))
+
+    def forward(self, Stoks, Atoks, speakers, langs=None, out_stoks=None, noloss=False, xenc=None, xenc_positions=None, atoks_positions=None, kv_len=None, mtp=False):
         if xenc is None:
             Atoks = Atoks.to(torch.long)
             out_stoks = out_stoks.to(torch.long)
             Atoks_gt = Atoks.clone()
             Atoks_gt[Atoks == -100] = 1024
-            xenc, enc_logits = self.run_encoder(Stoks, speakers)
+            xenc, xenc_positions, enc_logits = self.run_encoder(Stoks, speakers)
+            # the extra heads continue the delayed layout used in `generate_multitoken`,
+            # so they are trained with the ground truth in that layout (teacher forcing)
+            Atoks_in = delay_atoks(Atoks_gt, self.codes+1, Atoks.shape[-1]) if self.mtp else Atoks
         else:
-            Atoks_gt = Atoks
+            Atoks_gt = Atoks_in = Atoks
         with record_function("decoder"):
-            embs = self.embds(Atoks, xenc)
+            embs = self.embds(Atoks_in, xenc)
             if atoks_positions is None: atoks_positions = torch.arange(0, embs.shape[1], device=embs.device)
-            x = self.decoder(embs, atoks_positions, xenc, xenc_positions)
-            logits = self.head(x, embeddings=self.embds.embeddings)
-            logits *= self.tunables.output_mult / (self.width / self.base_width)
+            x = self.decoder(embs, atoks_positions, xenc, xenc_positions, kv_len=kv_len)
+            logits = self._head(x)
+            mtp_logits = [self._head(y) for y in self.mtp(x)] if self.mtp and (mtp or not noloss) else []
             
         if noloss:
-            return logits
+            return (logits, mtp_logits) if mtp else logits
 
         with record_function("loss"):
             N = Atoks.shape[-1]
@@ -387,6 +465,11 @@ class SADelARTransformer(nn.Module):
                 if self.training and i == 0:
                     loss *= 5
             loss /= self.quantizers
+            if mtp_logits:
+                # the extra heads predict the delayed tokens 2, 3, ... positions ahead
+                mtp_targets = delay_atoks(Atoks, -100, N + 1 + len(mtp_logits))
+                for s,l in enumerate(mtp_logits, 1):
+                    loss += F.cross_entropy(l.reshape(-1,l.shape[-1]), mtp_targets[:,:,1+s:1+s+N].reshape(-1)) / len(mtp_logits)
             if self.training:
                 loss += 0.1 * F.cross_entropy(enc_logits.transpose(-1,-2), out_stoks)
 
@@ -396,6 +479,11 @@ class SADelARTransformer(nn.Module):
                 valid_Atoks = Atoks_i != -100
                 self.val_true[i] += (logits[:,i,i:].argmax(-1)[valid_Atoks] == Atoks_i[valid_Atoks]).float().sum()
                 self.val_total[i] += valid_Atoks.float().sum()
+            for s,l in enumerate(mtp_logits):
+                target = mtp_targets[:,:,2+s:2+s+N]
+                valid = target != -100
+                self.val_mtp_true[s] += (l.argmax(-1)[valid] == target[valid]).float().sum()
+                self.val_mtp_total[s] += valid.float().sum()
 
         return logits, loss
 
@@ -405,6 +493,10 @@ class SADelARTransformer(nn.Module):
         }
         self.val_true[:] = 0
         self.val_total[:] = 0
+        if self.mtp:
+            metrics.update({f'mtp_acc_{i+2}':x.item() for i,x in enumerate(self.val_mtp_true / self.val_mtp_total)})
+            self.val_mtp_true[:] = 0
+            self.val_mtp_total[:] = 0
         return metrics
 
     #
@@ -412,7 +504,7 @@ class SADelARTransformer(nn.Module):
     #
     @classmethod
     def load_model(cls, ref="collabora/whisperspeech:s2a-q4-small-en+pl.model",
-                   repo_id=None, filename=None, local_filename=None):
+                   repo_id=None, filename=None, local_filename=None, device=None, dtype=None):
         if repo_id is None and filename is None and local_filename is None:
             if ":" in ref:
                 repo_id, filename = ref.split(":", 1)
@@ -420,11 +512,22 @@ class SADelARTransformer(nn.Module):
                 local_filename = ref
         if not local_filename:
             local_filename = hf_hub_download(repo_id=repo_id, filename=filename)
-        spec = torch.load(local_filename)
+        if str(local_filename).endswith('.safetensors'):
+            tensors, meta = read_safetensors(local_filename, device or 'cpu')
+            with torch.device('meta'):
+                model = cls(**meta['config'], tunables=Tunables(**Tunables.upgrade(meta['tunables'])))
+                if meta.get('converted_for_eval'): model.convert_for_eval()
+            assign_tensors(model, tensors, dtype)
+            model.eval()
+            return model
+        spec = load_spec(local_filename)
         if '_extra_state' not in spec['state_dict']: spec['state_dict']['_extra_state'] = { 'speaker_map': spec['config']['speaker_map'] }
-        model = cls(**spec['config'], tunables=Tunables(**Tunables.upgrade(spec['tunables'])))
-        model.load_state_dict(spec['state_dict'])
+        with skip_init():
+            model = cls(**spec['config'], tunables=Tunables(**Tunables.upgrade(spec['tunables'])))
+        load_weights(model, spec['state_dict'])
+        if dtype is not None: model.switch_dtypes(dtype)
         model.eval()
+        if device is not None: model.to(device)
         return model
     
     def get_extra_state(self):
@@ -442,6 +545,11 @@ class SADelARTransformer(nn.Module):
         return self
     
     def save_model(self, fname):
+        if str(fname).endswith('.safetensors'):
+            write_safetensors(self, fname, config = self.__stored_args__,
+                              tunables = dataclasses.asdict(self.tunables),
+                              converted_for_eval = self.converted_for_eval)
+            return
         torch.save(dict(config = self.__stored_args__,
                         tunables = dataclasses.asdict(self.tunables),
                         state_dict = self.state_dict()), fname)
@@ -456,71 +564,292 @@ class SADelARTransformer(nn.Module):
             for bn,b in m.named_buffers(recurse=False):
                 setattr(m,bn,b.to(dtype))
 
-    def optimize(self, max_batch_size=1, dtype=torch.float16, torch_compile=True):
-        for emb in self.embds.embeddings:
-            emb.convert_for_eval()
+    def convert_for_eval(self):
+        """Merges the attention projections and the embedding matrices for inference.
+
+        Models saved to `.safetensors` after this step load in the converted form."""
+        self.embds.convert_for_eval()
         for l in self.encoder:
             l.attn.convert_for_eval()
         for l in self.decoder.layers:
             l.attn.convert_for_eval()
             l.cross_attn.convert_for_eval()
-            l.setup_kv_cache(max_batch_size, self.ctx_n, self.stoks_len)
+        self.converted_for_eval = True
+
+    def optimize(self, max_batch_size=1, dtype=torch.float16, torch_compile=True, quantize=None, max_seq_len=None):
+        """Prepares the model for fast inference.
+
+        `max_seq_len` shortens the KV cache (and the longest possible output) to save memory, by default the cache
+        holds the full context. See `BaseDecoder.setup_kv_cache` for the details.
+
+        `quantize='int8'` replaces the attention projections, the MLPs and the `DelSumHead` splitter with
+        dynamically quantized int8 layers. This only works on the CPU and the rest of the model runs in float32
+        (`dtype` is ignored)."""
+        if not self.converted_for_eval: self.convert_for_eval()
+        self.decoder.setup_kv_cache(max_batch_size, max_seq_len or self.ctx_n, self.stoks_len)
+        if quantize is not None:
+            assert quantize == 'int8', f"unsupported quantization: {quantize}"
+            assert self.device.type == 'cpu', "int8 quantization is only supported on the CPU"
+            dtype = torch.float32
         self.switch_dtypes(dtype)
+        if quantize: quantize_linears(self)
         if torch_compile:
-            self.generate_next = torch.compile(self.generate_next, mode="reduce-overhead", fullgraph=True)
+            # every KV cache bucket gets its own static graph
+            self.generate_next = torch.compile(self.generate_next, mode="reduce-overhead", fullgraph=True, dynamic=False)
 
     @property
     def device(self):
         return next(self.parameters()).device
 
-    # from https://github.com/pytorch-labs/gpt-fast/blob/main/generate.py
-    def multinomial_sample_one_no_sync(self, probs_sort): # Does multinomial sampling without a cuda synchronization
-        q = torch.empty_like(probs_sort).exponential_(1)
-        return torch.argmax(probs_sort / q, dim=-1, keepdim=True).to(dtype=torch.int)
+    def multinomial_sample_one_no_sync(self, probs_sort, generator=None): # Does multinomial sampling without a cuda synchronization
+        return sampling.sample_probs(probs_sort, generator)
 
-    def logits_to_probs(self, logits, T=1.0, top_k=None):
-        logits = logits / max(T, 1e-5)
+    def logits_to_probs(self, logits, T=1.0, top_k=None, top_p=None, min_p=None):
+        return sampling.logits_to_probs(logits, T, top_k, top_p, min_p)
 
-        if top_k is not None:
-            v, _ = torch.topk(logits, min(top_k, logits.size(-1)))
-            pivot = v.select(-1, -1).unsqueeze(-1)
-            logits = torch.where(logits < pivot, -float("Inf"), logits)
-        probs = torch.nn.functional.softmax(logits, dim=-1)
-        return probs
+    def sample(self, logits, T=1.0, top_k=None, top_p=None, min_p=None, noise=None):
+        # the codes above `codes` only appear in the decoder input (the delay padding), they are never a target
+        return sampling.sample(logits[:,:,-1], T, top_k, top_p, min_p, vocab=self.codes, noise=noise)
 
-    def sample(self, logits, T=1.0, top_k=None):
-        probs = self.logits_to_probs(logits[0,:,-1], T, top_k)
-        idx_next = self.multinomial_sample_one_no_sync(probs)
-        return idx_next
+    def _noise(self, gens):
+        "The sampling noise for one decoding step (drawn outside of the compiled `generate_next`), None without generators."
+        return sampling.uniform_noise(gens, (self.quantizers, self.codes), self.device)
 
-    def generate_one(self, toks, positions, langs, xenc, xenc_positions, T, top_k):
-        probs = self(None, toks, None, langs, noloss=True, xenc=xenc, xenc_positions=xenc_positions, atoks_positions=positions)
-        return self.sample(probs, T, top_k)
+    def generate_one(self, toks, positions, langs, xenc, xenc_positions, T, top_k, kv_len=None, top_p=None, min_p=None, noise=None):
+        probs = self(None, toks, None, langs, noloss=True, xenc=xenc, xenc_positions=xenc_positions, atoks_positions=positions, kv_len=kv_len)
+        return self.sample(probs, T, top_k, top_p, min_p, noise)
 
     def generate_next(self, *args, **kwargs):
         return self.generate_one(*args, **kwargs)
     
     @torch.no_grad()
-    def generate(self, stoks, speakers, langs=None, N=None, T=0.7, top_k=None, show_progress_bar=True, step=None, subsample_enc=False):
+    def generate(self, stoks, speakers, langs=None, N=None, T=0.7, top_k=None, top_p=None, min_p=None, seed=None, show_progress_bar=True, step=None, subsample_enc=False):
+        chunks = self.generate_chunks(stoks, speakers, langs, N=N, T=T, top_k=top_k, top_p=top_p, min_p=min_p, seed=seed, show_progress_bar=show_progress_bar, step=step)
+        return torch.cat(list(chunks), dim=-1)
+
+    def _frames(self, toks, n):
+        "Turns one row of delayed tokens `(quantizers, positions)` decoded up to position `n-1` into `(quantizers, frames)`."
+        out = toks[:,1:n].clone()
+        for j in range(self.quantizers):
+            out[j] = torch.roll(out[j], -j)
+        return out
+
+    @torch.no_grad()
+    def generate_chunks(self, stoks, speakers, langs=None, N=None, T=0.7, top_k=None, top_p=None, min_p=None, seed=None, chunk=None, show_progress_bar=True, step=None):
+        """Yields the acoustic tokens in `(quantizers, n)` chunks as soon as `chunk` new frames are complete.
+
+        Because of the delay pattern (quantizer `j` lags `j` steps behind the first one) a frame is complete
+        `quantizers` steps after it was started. Concatenating all the chunks gives the output of `generate`.
+        `seed` (an int or a `torch.Generator`) makes sampling reproducible.
+
+        The model has no end-of-audio token so decoding always runs for `N` steps (3 frames per semantic token).
+        The time spent in the encoder, the prefill and the decoding loop is measured in `stage_timer`."""
         dev = self.device
+        timer = self.stage_timer = StageTimer(dev)
+        gens = sampling.row_generators(seed, 1, dev)
         N = N or len(stoks) * 3
         stoks = F.pad(stoks.to(dev), (1, self.stoks_len - len(stoks)-1), value=self.stoks_codes-1).unsqueeze(0)
         speakers = speakers.to(device=dev, dtype=self.dtype)
-        toks = torch.full((1,self.quantizers,2250), self.codes+1, dtype=torch.long, device=dev)
-        it = range(1,min(N,2250-1))
+        L = self.decoder.max_seq_len
+        toks = torch.full((1,self.quantizers,L), self.codes+1, dtype=torch.long, device=dev)
+        it = range(1,min(N,L-1))
         if show_progress_bar: it = progress_bar(it)
         with record_function("encode"):
             xenc, xenc_positions, _ = self.run_encoder(stoks, speakers)
+            self.decoder.prime_cross_attention(xenc, xenc_positions)
             toks_positions = torch.arange(N, device=dev)
+        timer.mark('encode')
         with record_function("prefill"):
-            toks[0,0,1] = self.generate_one(toks[:,:,:1], toks_positions[:1], langs, xenc, xenc_positions, T, top_k)[0,0]
+            toks[0,0,1] = self.generate_one(toks[:,:,:1], toks_positions[:1], langs, xenc, xenc_positions, T, top_k,
+                                            kv_len=self.decoder.kv_bucket(1), top_p=top_p, min_p=min_p, noise=self._noise(gens))[0,0,0]
+        timer.mark('prefill')
+        emitted = 0
         with torch.backends.cuda.sdp_kernel(enable_flash=False, enable_mem_efficient=False, enable_math=True):
             for i in it:
                 with record_function("generate_one"):
-                    toks[0,:i+1,i+1] = self.generate_next(toks[:,:,i:i+1], toks_positions[i:i+1], langs, xenc, xenc_positions, T, top_k)[:i+1,0]
+                    toks[0,:i+1,i+1] = self.generate_next(toks[:,:,i:i+1], toks_positions[i:i+1], langs, xenc, xenc_positions, T, top_k,
+                                                          kv_len=self.decoder.kv_bucket(i+1), top_p=top_p, min_p=min_p, noise=self._noise(gens))[0,:i+1,0]
+                timer.steps = i
+
+                # for profiling, debugging or early exit
+                if step is not None: step()
+
+                ready = i + 2 - self.quantizers
+                if chunk and ready - emitted >= chunk:
+                    timer.mark('decode')
+                    yield torch.stack([toks[0,j,1+j+emitted:1+j+ready] for j in range(self.quantizers)])
+                    timer.skip() # the time between the chunks belongs to the consumer
+                    emitted = ready
+        timer.mark('decode')
+        yield self._frames(toks[0], N)[:,emitted:]
+
+    @torch.no_grad()
+    def generate_incremental(self, stoks_chunks, speakers, langs=None, T=0.7, top_k=None, top_p=None, min_p=None, seed=None, chunk=None, lag=25, step=None):
+        """Like `generate_chunks` but the semantic tokens arrive as an iterator of chunks (e.g. from T2S running
+        in another thread) so decoding can start before all of them are known.
+
+        Acoustic frame `t` is decoded only after `t//3 + lag` semantic tokens have arrived (or the input ended).
+        The encoder is rerun every time new semantic tokens are consumed, so earlier frames see a truncated
+        encoder context and the result approximates `generate` run on the full input."""
+        dev = self.device
+        timer = self.stage_timer = StageTimer(dev)
+        gens = sampling.row_generators(seed, 1, dev)
+        speakers = speakers.to(device=dev, dtype=self.dtype)
+        L = self.decoder.max_seq_len
+        toks = torch.full((1,self.quantizers,L), self.codes+1, dtype=torch.long, device=dev)
+        toks_positions = torch.arange(L, device=dev)
+        stoks_chunks = iter(stoks_chunks)
+        stoks, n, finished, stale = [], 0, False, True
+        i, emitted = 0, 0
+        with torch.backends.cuda.sdp_kernel(enable_flash=False, enable_mem_efficient=False, enable_math=True):
+            while True:
+                while not finished and n < i // 3 + lag:
+                    try:
+                        stoks.append(next(stoks_chunks).to(dev))
+                        n += len(stoks[-1])
+                        stale = True
+                    except StopIteration:
+                        finished = True
+                timer.skip() # waiting for the semantic tokens is not counted
+                if i >= (min(n * 3, L-1) if finished else L-1) - 1: break
+                if stale:
+                    x = torch.cat(stoks)
+                    x = F.pad(x, (1, self.stoks_len - len(x)-1), value=self.stoks_codes-1).unsqueeze(0)
+                    with record_function("encode"):
+                        xenc, xenc_positions, _ = self.run_encoder(x, speakers)
+                        self.decoder.prime_cross_attention(xenc, xenc_positions)
+                    timer.mark('encode')
+                    stale = False
+                with record_function("prefill" if i == 0 else "generate_one"):
+                    gen = self.generate_one if i == 0 else self.generate_next
+                    toks[0,:i+1,i+1] = gen(toks[:,:,i:i+1], toks_positions[i:i+1], langs, xenc, xenc_positions, T, top_k,
+                                           kv_len=self.decoder.kv_bucket(i+1), top_p=top_p, min_p=min_p, noise=self._noise(gens))[0,:i+1,0]
+                timer.mark('prefill' if i == 0 else 'decode')
+                timer.steps = i
+
+                # for profiling, debugging or early exit
+                if step is not None: step()
+
+                ready = i + 2 - self.quantizers
+                if chunk and ready - emitted >= chunk:
+                    yield torch.stack([toks[0,j,1+j+emitted:1+j+ready] for j in range(self.quantizers)])
+                    emitted = ready
+                i += 1
+        # shift tokens
+        toks = toks[:,:,1:n*3]
+        for j in range(self.quantizers):
+            toks[0, j] = torch.roll(toks[0, j], -j)
+        yield toks[0,:,emitted:]
+
+    @torch.no_grad()
+    def generate_batch(self, stoks, speakers, langs=None, N=None, T=0.7, top_k=None, top_p=None, min_p=None, seed=None, show_progress_bar=True, step=None):
+        """Generates acoustic tokens for a list of semantic token tensors in a single decoding loop.
+
+        `speakers` is a `(batch, spk_width)` tensor. Every row is decoded for `3*len(stoks)` steps (or `N`)
+        and the loop stops once the longest one is finished. Once half of the rows are done they are retired from
+        the batch (the steps spent on finished rows are counted in `stop_stats`). Returns a list of
+        `(quantizers, length)` tensors.
+        Every row samples with its own generator, `seed` is a list with one seed per row or a single int
+        (row `i` gets `seed + i`), see `sampling.row_seeds`."""
+        dev = self.device
+        timer = self.stage_timer = StageTimer(dev)
+        bs = len(stoks)
+        self.decoder.check_batch_size(bs)
+        gens = sampling.row_generators(seed, bs, dev)
+        Ns = [min(N or len(x) * 3, self.decoder.max_seq_len-1) for x in stoks]
+        maxN = max(Ns)
+        stoks = torch.stack([F.pad(x.to(dev), (1, self.stoks_len - len(x)-1), value=self.stoks_codes-1) for x in stoks])
+        speakers = speakers.to(device=dev, dtype=self.dtype)
+        toks = torch.full((bs,self.quantizers,self.ctx_n), self.codes+1, dtype=torch.long, device=dev)
+        stop = sampling.StopFlags(bs, dev)
+        rows = torch.arange(bs, device=dev) # the `toks` rows that are still being decoded
+        last = torch.tensor(Ns, device=dev) - 1 # the last position of every row
+        it = range(1,maxN)
+        if show_progress_bar: it = progress_bar(it)
+        with record_function("encode"):
+            xenc, xenc_positions, _ = self.run_encoder(stoks, speakers)
+            self.decoder.prime_cross_attention(xenc, xenc_positions)
+            toks_positions = torch.arange(maxN, device=dev)
+        timer.mark('encode')
+        with record_function("prefill"):
+            toks[:,0,1] = self.generate_one(toks[:,:,:1], toks_positions[:1], langs, xenc, xenc_positions, T, top_k,
+                                            kv_len=self.decoder.kv_bucket(1), top_p=top_p, min_p=min_p, noise=self._noise(gens))[:,0,0]
+        timer.mark('prefill')
+        with torch.backends.cuda.sdp_kernel(enable_flash=False, enable_mem_efficient=False, enable_math=True):
+            for i in it:
+                with record_function("generate_one"):
+                    toks[rows,:i+1,i+1] = self.generate_next(toks[rows,:,i:i+1], toks_positions[i:i+1], langs, xenc, xenc_positions, T, top_k,
+                                                             kv_len=self.decoder.kv_bucket(i+1), top_p=top_p, min_p=min_p, noise=self._noise(gens))[:,:i+1,0]
+                stop.update(last <= i+1)
+                done = stop.poll()
+                if done is not None and done.all(): break
+                # retiring the finished rows in halves limits the number of different batch sizes (and recompilations)
+                if done is not None and 2 * int(done.sum()) >= len(done):
+                    with record_function("retire"):
+                        keep = (~done).nonzero()[:,0].tolist()
+                        rows, last, xenc = rows[keep], last[keep], xenc[keep]
+                        if isinstance(langs, torch.Tensor): langs = langs[keep]
+                        T, top_k, top_p, min_p = [sampling.select_rows(x, keep) for x in (T, top_k, top_p, min_p)]
+                        if gens is not None: gens = sampling.select_rows(gens, keep)
+                        stop.select(keep)
+                        self.decoder.select_rows(keep, i+1)
+                        self.decoder.prime_cross_attention(xenc, xenc_positions)
+
+                # for profiling, debugging or early exit
+                if step is not None: step()
+        self.stop_stats = stop.stats()
+        # trim and shift tokens
+        out = [self._frames(toks[b], n) for b,n in enumerate(Ns)]
+        timer.steps = stop.steps
+        timer.mark('decode')
+        return out
+
+    @torch.no_grad()
+    def generate_multitoken(self, stoks, speakers, langs=None, N=None, T=0.7, top_k=None, top_p=None, min_p=None, seed=None, step=None):
+        """Like `generate` but uses the `MultiTokenHead` (see `Tunables.mtp_steps`) to decode several frames per step.
+
+        The guesses for the following positions are fed to the decoder together with the next frame and each of them
+        is kept only if it is the same as the token sampled from the main head, so the output has the same distribution
+        as `generate` (and is identical for `T=0`). When the guesses are wrong we fall back to one frame per step.
+        The number of decoding steps of the last call is stored in `mtp_stats`."""
+        assert self.mtp is not None, "this model does not have the multi-token prediction head (Tunables.mtp_steps)"
+        dev = self.device
+        gen = sampling.make_generator(seed, dev)
+        L = self.decoder.max_seq_len
+        N = min(N or len(stoks) * 3, L-1)
+        stoks = F.pad(stoks.to(dev), (1, self.stoks_len - len(stoks)-1), value=self.stoks_codes-1).unsqueeze(0)
+        speakers = speakers.to(device=dev, dtype=self.dtype)
+        toks = torch.full((1,self.quantizers,L), self.codes+1, dtype=torch.long, device=dev)
+        # the delay pattern: at position p only the first p quantizers have started
+        started = torch.arange(self.quantizers, device=dev)[:,None] < torch.arange(L, device=dev)
+        with record_function("encode"):
+            xenc, xenc_positions, _ = self.run_encoder(stoks, speakers)
+            self.decoder.prime_cross_attention(xenc, xenc_positions)
+        n, g, steps = 0, 0, 0 # the last known position, the number of guesses after it and the decoder calls
+        with torch.backends.cuda.sdp_kernel(enable_flash=False, enable_mem_efficient=False, enable_math=True):
+            while n < N-1:
+                g = min(g, N-2-n)
+                positions = torch.arange(n, n+g+1, device=dev)
+                with record_function("generate_multitoken"):
+                    logits, mtp_logits = self(None, toks[:,:,n:n+g+1], None, langs, noloss=True, xenc=xenc, xenc_positions=xenc_positions,
+                                              atoks_positions=positions, kv_len=self.decoder.kv_bucket(n+g+1), mtp=True)
+                    nxt = sampling.sample(logits[0], T, top_k, top_p, min_p, vocab=self.codes, generator=gen)[:,:,0]
+                    nxt = torch.where(started[:,n+1:n+g+2], nxt, self.codes+1)
+                    # accept the guesses that match the sampled tokens
+                    a = int((nxt[:,:g] == toks[0,:,n+1:n+g+1]).all(0).cumprod(0).sum()) if g else 0
+                    toks[0,:,n+1:n+a+2] = nxt[:,:a+1]
+                    n += a+1
+                    # new guesses from the last position that had the right input
+                    g = len(mtp_logits)
+                    guesses = torch.cat([sampling.sample(l[0,:,a:a+1], T, top_k, top_p, min_p, vocab=self.codes, generator=gen)[:,:,0]
+                                         for l in mtp_logits], -1)
+                    g = min(g, L-1-n)
+                    toks[0,:,n+1:n+g+1] = torch.where(started[:,n+1:n+g+1], guesses[:,:g], self.codes+1)
+                steps += 1
 
                 # for profiling, debugging or early exit
                 if step is not None: step()
+        self.mtp_stats = dict(steps=steps, frames=N-1, frames_per_step=(N-1) / max(steps, 1))
         # shift tokens
         toks = toks[:,:,1:N]
         for j in range(self.quantizers):
@@ -0,0 +1,187 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/G. Sampling.ipynb.
+
+# %% auto 0
+__all__ = ['is_greedy', 'filter_logits', 'logits_to_probs', 'sample_probs', 'sample', 'make_generator', 'split_seed', 'row_seeds',
+           'row_generators', 'uniform_noise', 'StopFlags', 'select_rows']
+
+# %% ../nbs/G. Sampling.ipynb 1
+import torch
+import torch.nn.functional as F
+
+# %% ../nbs/G. Sampling.ipynb 3
+def _per_row(x, logits, dtype=None):
+    "Broadcasts per-row parameter values against `logits` (numbers are passed through)."
+    if x is None or isinstance(x, (int, float)): return x
+    x = torch.as_tensor(x, device=logits.device, dtype=dtype)
+    return x.view(-1, *[1] * (logits.dim() - 1))
+
+# %% ../nbs/G. Sampling.ipynb 4
+def is_greedy(T):
+    "True if `T` (a number) always picks the most likely token."
+    return isinstance(T, (int, float)) and T == 0
+
+def filter_logits(logits, T=1.0, top_k=None, top_p=None, min_p=None):
+    """Sets the logits of the tokens removed by the `top_k`, `top_p` (nucleus) and `min_p` filters to `-inf`.
+
+    `T` is only used to compute the probabilities for `top_p` and `min_p`, the logits are not scaled."""
+    if top_k is None and top_p is None and min_p is None: return logits
+    V = logits.shape[-1]
+    T = _per_row(T, logits, logits.dtype)
+    Tc = max(T, 1e-5) if isinstance(T, (int, float)) else T.clamp(min=1e-5)
+    pivot = None
+    def tighten(x): return x if pivot is None else torch.maximum(pivot, x)
+    if top_p is not None or (top_k is not None and not isinstance(top_k, int)):
+        srt = logits.sort(dim=-1, descending=True).values
+    if top_k is not None:
+        if isinstance(top_k, int):
+            pivot = tighten(logits.topk(min(top_k, V)).values[..., -1:])
+        else:
+            k = _per_row(top_k, logits, torch.long)
+            k = torch.where(k > 0, k, V).clamp(max=V)
+            pivot = tighten(srt.gather(-1, (k - 1).expand(*srt.shape[:-1], 1)))
+    if top_p is not None:
+        probs = F.softmax(srt / Tc, dim=-1)
+        # the smallest set of tokens that covers `top_p` of the probability mass
+        n = ((probs.cumsum(-1) - probs) < _per_row(top_p, logits, probs.dtype)).sum(-1, keepdim=True).clamp(min=1)
+        pivot = tighten(srt.gather(-1, n - 1))
+    if min_p is not None:
+        # p >= min_p * p_max  <=>  logit >= logit_max + T * log(min_p)
+        log_min_p = torch.as_tensor(_per_row(min_p, logits, logits.dtype), device=logits.device, dtype=logits.dtype).log()
+        pivot = tighten(logits.amax(-1, keepdim=True) + Tc * log_min_p)
+    return logits.masked_fill(logits < pivot, -torch.inf)
+
+# %% ../nbs/G. Sampling.ipynb 5
+def logits_to_probs(logits, T=1.0, top_k=None, top_p=None, min_p=None, vocab=None):
+    """Returns the (filtered) sampling distribution. Tokens from `vocab` upwards get zero probability.
+    Only needed when the probabilities themselves are used (e.g. for speculative decoding), `sample` does not use it."""
+    V = logits.shape[-1]
+    if vocab is not None: logits = logits[..., :vocab]
+    logits = filter_logits(logits, T, top_k, top_p, min_p)
+    T = _per_row(T, logits, logits.dtype)
+    probs = F.softmax(logits / (max(T, 1e-5) if isinstance(T, (int, float)) else T.clamp(min=1e-5)), dim=-1)
+    return F.pad(probs, (0, V - probs.shape[-1]))
+
+def _exponential(x, generator=None, noise=None):
+    "Exponentially distributed noise shaped like `x` (`-log(U)` is a lot faster than `exponential_` on the CPU)."
+    if noise is not None: u = noise.to(x.dtype, copy=True)
+    elif generator is None: u = torch.rand_like(x) # torch.compile does not support the generator argument
+    elif isinstance(generator, torch.Generator): u = torch.rand(x.shape, generator=generator, device=generator.device).to(x)
+    else: u = uniform_noise(generator, x.shape[1:], x.device).to(x.dtype)
+    return u.clamp_(min=torch.finfo(x.dtype).tiny).log_().neg_()
+
+def sample_probs(probs, generator=None, noise=None):
+    "Samples from the `probs` distributions (in the last dimension) without a device synchronization."
+    q = _exponential(probs, generator, noise)
+    return torch.argmax(probs / q, dim=-1, keepdim=True)
+
+def sample(logits, T=0.7, top_k=None, top_p=None, min_p=None, vocab=None, generator=None, noise=None):
+    """Samples token ids (with a trailing dimension of size 1) from the last dimension of `logits`.
+
+    Only the first `vocab` logits are considered if it is given. The random numbers come from `generator`
+    (a `torch.Generator` or a list with one for every row), from uniform `noise` drawn in advance
+    (see `uniform_noise`) or from the global RNG."""
+    if vocab is not None: logits = logits[..., :vocab]
+    logits = filter_logits(logits, T, top_k, top_p, min_p)
+    if is_greedy(T): return logits.argmax(-1, keepdim=True)
+    T = _per_row(T, logits, logits.dtype)
+    # Gumbel-max: argmax(logits/T + G) == argmax(logits - T*log(E)), and T=0 rows are greedy
+    noise = _exponential(logits, generator, noise)
+    noise.log_().mul_(-T).add_(logits)
+    return noise.argmax(-1, keepdim=True)
+
+# %% ../nbs/G. Sampling.ipynb 7
+def make_generator(seed, device='cpu'):
+    "Returns a `torch.Generator` seeded with `seed` (generators and `None` are passed through)."
+    if seed is None or isinstance(seed, torch.Generator): return seed
+    return torch.Generator(device=device).manual_seed(int(seed))
+
+def split_seed(seed, n):
+    "Derives `n` independent integer seeds from `seed` (an int or a `torch.Generator`), or `n` Nones if `seed` is None."
+    if seed is None: return [None] * n
+    gen = seed if isinstance(seed, torch.Generator) else torch.Generator().manual_seed(int(seed))
+    return torch.randint(0, 2**62, (n,), generator=gen, device=gen.device).tolist()
+
+def row_seeds(seed, n):
+    """Returns a list with the seed (or generator, or None) of each of the `n` batch rows.
+
+    `seed` is a list with a seed per row, a single int (row `i` gets `seed + i`) or a generator
+    (split into `n` independent seeds)."""
+    if seed is None: return [None] * n
+    if isinstance(seed, (list, tuple)): seeds = list(seed)
+    elif isinstance(seed, torch.Generator): seeds = split_seed(seed, n) if n > 1 else [seed]
+    else: seeds = [int(seed) + i for i in range(n)]
+    assert len(seeds) == n, f"got {len(seeds)} seeds for {n} rows"
+    return seeds
+
+def row_generators(seed, n, device='cpu'):
+    "Returns a list with a generator (or None) for each of the `n` batch rows (see `row_seeds`), or None if none of them are seeded."
+    gens = [make_generator(s, device) for s in row_seeds(seed, n)]
+    return None if all(g is None for g in gens) else gens
+
+def uniform_noise(generators, shape, device='cpu'):
+    """Uniform noise of shape `(len(generators), *shape)` with every row drawn from its own generator
+    (or the global RNG for the None entries). Returns None if there are no generators at all."""
+    if generators is None: return None
+    return torch.stack([torch.rand(shape, device=device) if g is None else
+                        torch.rand(shape, generator=g, device=g.device).to(device) for g in generators])
+
+# %% ../nbs/G. Sampling.ipynb 11
+class StopFlags:
+    """Device-side per-row "done" flags that the host checks without synchronizing with the device.
+
+    Call `update` after every decoding step with the rows that finished in it and `poll` to get the latest flags
+    that reached the host (or None). `select` keeps only the given rows (when finished rows are retired from a batch)."""
+    def __init__(self, n, device='cpu', check_every=4):
+        self.device = torch.device(device)
+        self.done = torch.zeros(n, dtype=torch.bool, device=self.device)
+        self.wasted = torch.zeros((), dtype=torch.long, device=self.device)
+        self.check_every = check_every if self.device.type == 'cuda' else 1
+        self.steps, self.row_steps = 0, 0
+        self.checked_at = None # the step of the flags returned by the last successful `poll`
+        self._pending = None
+
+    def update(self, finished):
+        "Marks the rows in the bool tensor `finished` as done and counts the step."
+        self.wasted += self.done.sum() # rows decoded in this step although they were already done
+        self.done |= finished
+        self.steps += 1
+        self.row_steps += len(self.done)
+
+    def reset(self, rows):
+        "Clears the flags of `rows` (e.g. when a scheduler slot gets a new request)."
+        self.done[rows] = False
+
+    def select(self, rows):
+        "Keeps only the flags of `rows` (a list or a tensor of indices)."
+        self.done = self.done[torch.as_tensor(rows, device=self.device)]
+        self._pending = None
+
+    def poll(self):
+        "Returns the latest flags (a bool tensor on the CPU) that reached the host or None if there are no new ones."
+        if self.device.type != 'cuda':
+            if self.steps % self.check_every: return None
+            self.checked_at = self.steps
+            return self.done.cpu() if self.device.type != 'cpu' else self.done.clone()
+        result = None
+        if self._pending is not None and self._pending[2].query():
+            result, self.checked_at = self._pending[:2]
+            self._pending = None
+        if self._pending is None and self.steps % self.check_every == 0:
+            buf = torch.empty(self.done.shape, dtype=torch.bool, pin_memory=True)
+            buf.copy_(self.done, non_blocking=True)
+            ev = torch.cuda.Event(); ev.record()
+            self._pending = (buf, self.steps, ev)
+        return result
+
+    def stats(self):
+        "Step counts (this synchronizes with the device)."
+        wasted = int(self.wasted)
+        return dict(steps=self.steps, row_steps=self.row_steps, wasted_row_steps=wasted,
+                    wasted_fraction=wasted / max(self.row_steps, 1))
+
+# %% ../nbs/G. Sampling.ipynb 12
+def select_rows(x, rows):
+    "Selects the `rows` of a per-row parameter (a list or a tensor), numbers and None are passed through."
+    if x is None or isinstance(x, (int, float)): return x
+    if isinstance(x, torch.Tensor): return x[torch.as_tensor(rows, device=x.device)]
+    return [x[r] for r in rows]
@@ -0,0 +1,254 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/8. Continuous batching.ipynb.
+
+# %% auto 0
+__all__ = ['DecodeScheduler', 'T2SScheduler', 'S2AScheduler']
+
+# %% ../nbs/8. Continuous batching.ipynb 1
+import queue
+import threading
+from concurrent.futures import Future
+
+import torch
+import torch.nn.functional as F
+from torch.profiler import record_function
+
+from whisperspeech import sampling
+
+# %% ../nbs/8. Continuous batching.ipynb 3
+class DecodeScheduler:
+    """Base class for the continuous batching schedulers.
+
+    Requests are queued with `submit` (safe to call from any thread) and a `concurrent.futures.Future`
+    is returned for each one. Call `step` in a loop or `start` a background thread that does it for you.
+
+    Every request can override the sampling parameters given here (`T`, `top_k`, `top_p` and `min_p`) by passing
+    them to `submit` as keyword arguments. They are kept per slot so requests with different settings share a batch.
+    A `seed` (an int or a `torch.Generator`) gives the request its own random number generator so its result does
+    not depend on the other requests in the batch.
+
+    The finished rows are flagged on the device and retired when the flags reach the host (see `sampling.StopFlags`)
+    so a step never waits for the device. Until then they stay in the batch without advancing,
+    `stop_flags.stats()` counts these wasted row steps."""
+    def __init__(self, model, T=0.7, top_k=None, top_p=None, min_p=None):
+        self.model = model
+        self.defaults = dict(T=T, top_k=top_k, top_p=top_p, min_p=min_p)
+        caches = [l.attn.k_cache for l in model.decoder.layers]
+        assert caches[0] is not None, "the KV cache is not set up, call model.optimize(max_batch_size=...) first"
+        self.slots = caches[0].shape[0]
+        self.dev = model.device
+        self.rows = torch.arange(self.slots, device=self.dev)
+        self.positions = torch.zeros((self.slots, 1), dtype=torch.long, device=self.dev)
+        self.lens = [0] * self.slots # the positions tracked on the host to pick the KV cache bucket without a sync
+        self.requests = [None] * self.slots
+        self.pending = queue.Queue()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.stopping = False
+        self.steps = 0
+        # per-slot sampling parameters, the filters nobody asked for stay disabled (None)
+        self.T = torch.full((self.slots,), float(T), device=self.dev)
+        self.top_k = self.top_p = self.min_p = None
+        self.generators = [None] * self.slots
+        self.stop_flags = sampling.StopFlags(self.slots, self.dev)
+        self.admitted_at = [0] * self.slots # the step the request in each slot was admitted at
+
+    _sampling_off = dict(top_k=0, top_p=1.0, min_p=0.0) # the row values that turn the filters off
+
+    def _set_sampling(self, slots, kwargs):
+        "Stores the sampling parameters of the admitted requests in their `slots`."
+        self.T[slots] = torch.tensor([float(kw.get('T', self.defaults['T'])) for kw in kwargs], device=self.dev)
+        for slot, kw in zip(slots.tolist(), kwargs):
+            self.generators[slot] = sampling.make_generator(kw.get('seed'), self.dev)
+        for name, off in self._sampling_off.items():
+            vals = [kw.get(name, self.defaults[name]) for kw in kwargs]
+            if getattr(self, name) is None:
+                if all(v is None for v in vals): continue
+                setattr(self, name, torch.full((self.slots,), off, device=self.dev, dtype=torch.long if name == 'top_k' else torch.float))
+            x = getattr(self, name)
+            x[slots] = torch.tensor([off if v is None else v for v in vals], device=self.dev, dtype=x.dtype)
+
+    @property
+    def active(self):
+        return sum(r is not None for r in self.requests)
+
+    def submit(self, *args, **kwargs):
+        fut = Future()
+        self.pending.put((fut, args, kwargs))
+        self.wakeup.set()
+        return fut
+
+    def _admit(self):
+        free = [i for i,r in enumerate(self.requests) if r is None]
+        admitted = []
+        while free and not self.pending.empty():
+            fut, args, kwargs = self.pending.get()
+            if not fut.set_running_or_notify_cancel(): continue
+            slot = free.pop(0)
+            self.requests[slot] = fut
+            self.lens[slot] = 0
+            self.admitted_at[slot] = self.stop_flags.steps
+            admitted.append((slot, args, kwargs))
+        if admitted:
+            slots = torch.tensor([x[0] for x in admitted], device=self.dev)
+            try:
+                self._set_sampling(slots, [x[2] for x in admitted])
+                self.prefill(slots, [x[1] for x in admitted], [x[2] for x in admitted])
+            except Exception as e:
+                for slot in slots.tolist(): self._retire(slot, exception=e)
+        return len(admitted)
+
+    def _retire(self, slot, result=None, exception=None):
+        fut = self.requests[slot]
+        self.requests[slot] = None
+        self.generators[slot] = None
+        self.stop_flags.reset(slot)
+        if exception is not None: fut.set_exception(exception)
+        else: fut.set_result(result)
+
+    def _noise(self):
+        "Sampling noise for the seeded rows (the others use the global RNG), None if no request is seeded."
+        if all(g is None for g in self.generators): return None
+        return self.model._noise(self.generators)
+
+    @torch.no_grad()
+    def step(self):
+        "Admits the queued requests, runs one decoding step and retires the finished rows. Returns the number of busy slots."
+        self._admit()
+        if not self.active: return 0
+        busy = [r is not None for r in self.requests]
+        # the rows that finished but were not retired yet do not advance
+        active = torch.tensor(busy, device=self.dev) & ~self.stop_flags.done
+        kv_len = self.model.decoder.kv_bucket(max(n for n,b in zip(self.lens, busy) if b) + 1)
+        try:
+            with torch.backends.cuda.sdp_kernel(enable_flash=False, enable_mem_efficient=False, enable_math=True):
+                with record_function("decode_step"):
+                    finished = self.decode_step(active, kv_len)
+        except Exception as e:
+            for slot,b in enumerate(busy):
+                if b: self._retire(slot, exception=e)
+            return 0
+        self.steps += 1
+        for slot,b in enumerate(busy): self.lens[slot] += b
+        self.stop_flags.update(finished)
+        done = self.stop_flags.poll()
+        if done is not None:
+            for slot in done.nonzero()[:,0].tolist():
+                # skip the flags copied before the request in this slot was admitted
+                if self.requests[slot] is not None and self.stop_flags.checked_at > self.admitted_at[slot]:
+                    self._retire(slot, self.result(slot))
+        return self.active
+
+    def run_until_idle(self):
+        while self.step() or not self.pending.empty(): pass
+
+    def _loop(self):
+        while not self.stopping:
+            if not self.step() and self.pending.empty():
+                self.wakeup.wait(0.1)
+                self.wakeup.clear()
+
+    def start(self):
+        "Runs the scheduler in a background thread."
+        self.stopping = False
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopping = True
+        self.wakeup.set()
+        if self.thread is not None: self.thread.join()
+        self.thread = None
+
+    # implemented by the model specific subclasses
+    def prefill(self, slots, args, kwargs): raise NotImplementedError()
+    def decode_step(self, active, kv_len): raise NotImplementedError()
+    def result(self, slot): raise NotImplementedError()
+
+# %% ../nbs/8. Continuous batching.ipynb 4
+class T2SScheduler(DecodeScheduler):
+    """Continuous batching for `TSARTransformer`. `submit(txt, cps=15, lang='en')` returns a future
+    with the semantic tokens (the same as `TSARTransformer.generate_batch` would return)."""
+    def __init__(self, t2s, T=0.7, top_k=None, top_p=None, min_p=None):
+        super().__init__(t2s, T=T, top_k=top_k, top_p=top_p, min_p=min_p)
+        t2s.ensure_tokenizer()
+        self.eot = t2s.stoks_codes-1
+        self.N = t2s.decoder.max_seq_len
+        self.toks = torch.zeros((self.slots, self.N), dtype=torch.long, device=self.dev)
+        self.xenc = None
+
+    def prefill(self, slots, args, kwargs):
+        m = self.model
+        ttoks, langs, cpss = [], [], []
+        for (txt,), kw in zip(args, kwargs):
+            tt, ll = m.prep_batch_item(txt, kw.get('lang', 'en'))
+            ttoks.append(tt); langs.append(ll); cpss.append(kw.get('cps', 15))
+        ttoks = torch.stack(ttoks).to(self.dev)
+        langs = torch.stack(langs).to(self.dev)
+        with record_function("encode"):
+            xenc, self.xenc_positions, cps_emb = m.encode(ttoks, langs, torch.tensor(cpss, device=self.dev))
+        if self.xenc is None:
+            self.xenc = xenc.new_zeros((self.slots, *xenc.shape[1:]))
+            self.cps_emb = None if cps_emb is None else cps_emb.new_zeros((self.slots, *cps_emb.shape[1:]))
+        self.xenc[slots] = xenc
+        if cps_emb is not None: self.cps_emb[slots] = cps_emb
+        m.decoder.prime_cross_attention(self.xenc, self.xenc_positions, rows=slots)
+        self.toks[slots] = 0
+        self.toks[slots,0] = self.eot
+        self.positions[slots] = 0
+
+    def decode_step(self, active, kv_len):
+        m = self.model
+        cur = self.toks.gather(1, self.positions)
+        nxt = m.generate_next(cur, self.positions, self.cps_emb, self.xenc, self.xenc_positions, self.T, self.top_k,
+                              kv_len=kv_len, top_p=self.top_p, min_p=self.min_p, noise=self._noise())[:,0]
+        self.positions += active.unsqueeze(1)
+        self.toks[self.rows, self.positions[:,0]] = torch.where(active, nxt, cur[:,0])
+        return active & ((nxt == self.eot) | (self.positions[:,0] >= self.N-1))
+
+    def result(self, slot):
+        n = self.positions[slot,0].item()
+        if self.toks[slot,n] == self.eot: return self.toks[slot,:n].clone()
+        return self.toks[slot,:n+1].clone()
+
+# %% ../nbs/8. Continuous batching.ipynb 5
+class S2AScheduler(DecodeScheduler):
+    """Continuous batching for `SADelARTransformer`. `submit(stoks, speaker)` (where `speaker` is a single
+    speaker embedding) returns a future with the acoustic tokens (like `SADelARTransformer.generate_batch`)."""
+    def __init__(self, s2a, T=0.7, top_k=None, top_p=None, min_p=None):
+        super().__init__(s2a, T=T, top_k=top_k, top_p=top_p, min_p=min_p)
+        self.toks = torch.full((self.slots, s2a.quantizers, s2a.ctx_n), s2a.codes+1, dtype=torch.long, device=self.dev)
+        self.Ns = torch.zeros(self.slots, dtype=torch.long, device=self.dev)
+        self.quantizer_ids = torch.arange(s2a.quantizers, device=self.dev)
+        self.xenc = None
+
+    def prefill(self, slots, args, kwargs):
+        m = self.model
+        stoks = [x[0] for x in args]
+        Ns = [min(kw.get('N') or len(x) * 3, m.decoder.max_seq_len-1) for x,kw in zip(stoks, kwargs)]
+        stoks = torch.stack([F.pad(x.to(self.dev), (1, m.stoks_len - len(x)-1), value=m.stoks_codes-1) for x in stoks])
+        speakers = torch.stack([x[1].to(self.dev) for x in args]).to(m.dtype)
+        with record_function("encode"):
+            xenc, self.xenc_positions, _ = m.run_encoder(stoks, speakers)
+        if self.xenc is None:
+            self.xenc = xenc.new_zeros((self.slots, *xenc.shape[1:]))
+        self.xenc[slots] = xenc
+        m.decoder.prime_cross_attention(self.xenc, self.xenc_positions, rows=slots)
+        self.toks[slots] = m.codes+1
+        self.Ns[slots] = torch.tensor(Ns, device=self.dev)
+        self.positions[slots] = 0
+
+    def decode_step(self, active, kv_len):
+        m = self.model
+        pos = self.positions[:,0]
+        cur = self.toks[self.rows,:,pos].unsqueeze(-1)
+        nxt = m.generate_next(cur, self.positions, None, self.xenc, self.xenc_positions, self.T, self.top_k,
+                              kv_len=kv_len, top_p=self.top_p, min_p=self.min_p, noise=self._noise())[:,:,0]
+        # the delay pattern: at position i only the first i+1 quantizers have started
+        write = (self.quantizer_ids <= pos.unsqueeze(1)) & active.unsqueeze(1)
+        self.toks[self.rows,:,pos+1] = torch.where(write, nxt, self.toks[self.rows,:,pos+1])
+        self.positions += active.unsqueeze(1)
+        return active & (self.positions[:,0] >= self.Ns - 1)
+
+    def result(self, slot):
+        return self.model._frames(self.toks[slot], self.Ns[slot].item())
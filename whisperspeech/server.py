@@ -0,0 +1,515 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/I. Server.ipynb.
+
+# %% auto 0
+__all__ = ['TTSServer', 'main']
+
+# %% ../nbs/I. Server.ipynb 1
+import asyncio
+import base64
+import concurrent.futures
+import hashlib
+import io
+import itertools
+import json
+import struct
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from types import SimpleNamespace
+from urllib.parse import urlsplit, parse_qsl
+
+import torch
+from fastcore.script import call_parse
+
+from whisperspeech import audio_out, sampling
+
+# %% ../nbs/I. Server.ipynb 3
+class _HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status, self.message = status, message
+
+class _Cancelled(Exception): pass
+
+_reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+            431: 'Request Header Fields Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+def _server_timing(timings):
+    return ', '.join(f'{k};dur={v*1000:.1f}' for k,v in timings.items())
+
+class _Timer:
+    "Accumulates the time spent getting the items of the wrapped iterators."
+    def __init__(self): self.seconds = 0.0
+    def wrap(self, it):
+        it = iter(it)
+        while True:
+            start = time.perf_counter()
+            try: x = next(it)
+            except StopIteration: return
+            finally: self.seconds += time.perf_counter() - start
+            yield x
+
+# %% ../nbs/I. Server.ipynb 4
+class _Job:
+    "A queued request and the bounded buffer its encoded audio goes back to the client through."
+    def __init__(self, params, loop, max_buffered, send_timeout):
+        self.params = params
+        self.loop = loop
+        self.out = asyncio.Queue(max_buffered)
+        self.send_timeout = send_timeout
+        self.submitted = time.perf_counter()
+        self.timings = {}
+        self.cancelled = False
+
+    def send(self, kind, value=None):
+        "Called from the model thread, blocks while the buffer is full."
+        if self.cancelled: raise _Cancelled()
+        fut = asyncio.run_coroutine_threadsafe(self.out.put((kind, value)), self.loop)
+        try:
+            fut.result(self.send_timeout)
+        except concurrent.futures.TimeoutError: # not the builtin `TimeoutError` before Python 3.11
+            fut.cancel()
+            self.cancelled = True
+            raise _Cancelled() from None
+
+    def cancel(self):
+        "Called from the event loop when the client is gone, frees a model thread waiting in `send`."
+        self.cancelled = True
+        while not self.out.empty(): self.out.get_nowait()
+
+class _Sink:
+    "A (non-seekable) file-like object that sends everything written to it to the client of `job`."
+    def __init__(self, job): self.job = job
+    def write(self, data):
+        self.job.send('data', bytes(data))
+        return len(data)
+
+# %% ../nbs/I. Server.ipynb 5
+def _unmask(data, mask):
+    n = len(data)
+    mask = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(data, 'little') ^ int.from_bytes(mask, 'little')).to_bytes(n, 'little')
+
+class _WebSocket:
+    "The server side of an RFC 6455 WebSocket connection (no extensions)."
+    GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+    def __init__(self, reader, writer, max_size=1 << 20):
+        self.reader, self.writer, self.max_size = reader, writer, max_size
+        self.closed = False
+
+    @classmethod
+    def accept_key(cls, key):
+        return base64.b64encode(hashlib.sha1((key + cls.GUID).encode()).digest()).decode()
+
+    async def receive(self):
+        "Returns the next text (`str`) or binary (`bytes`) message or None when the connection was closed."
+        parts, opcode = [], None
+        try:
+            while True:
+                b0, b1 = await self.reader.readexactly(2)
+                op, n = b0 & 0x0F, b1 & 0x7F
+                if n == 126: n = struct.unpack('>H', await self.reader.readexactly(2))[0]
+                elif n == 127: n = struct.unpack('>Q', await self.reader.readexactly(8))[0]
+                if n + sum(len(x) for x in parts) > self.max_size:
+                    await self.close(1009)
+                    return None
+                mask = await self.reader.readexactly(4) if b1 & 0x80 else None
+                data = await self.reader.readexactly(n)
+                if mask: data = _unmask(data, mask)
+                if op == 0x8:
+                    await self.close()
+                    return None
+                if op == 0x9: await self._send_frame(0xA, data)
+                if op >= 0x8: continue
+                if op: opcode = op
+                parts.append(data)
+                if b0 & 0x80:
+                    data = b''.join(parts)
+                    return data.decode() if opcode == 0x1 else data
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self.closed = True
+            return None
+
+    async def send(self, data):
+        "Sends a text (`str`) or binary message."
+        if isinstance(data, str): await self._send_frame(0x1, data.encode())
+        else: await self._send_frame(0x2, data)
+
+    async def send_json(self, msg): await self.send(json.dumps(msg))
+
+    async def _send_frame(self, op, data):
+        n = len(data)
+        if n < 126: head = struct.pack('>BB', 0x80 | op, n)
+        elif n < 1 << 16: head = struct.pack('>BBH', 0x80 | op, 126, n)
+        else: head = struct.pack('>BBQ', 0x80 | op, 127, n)
+        self.writer.write(head + data)
+        await self.writer.drain()
+
+    async def close(self, code=1000):
+        if self.closed: return
+        self.closed = True
+        try: await self._send_frame(0x8, struct.pack('>H', code))
+        except ConnectionError: pass
+
+# %% ../nbs/I. Server.ipynb 7
+class TTSServer:
+    """Serves `pipe` (a `Pipeline`) over HTTP and WebSockets, see above for the protocol.
+
+    Batched requests are grouped for `batch_wait` seconds into batches of up to `max_batch_size` (by default the
+    `max_batch_size` of the pipeline). Every request buffers up to `max_buffered` chunks of encoded audio."""
+    def __init__(self, pipe, host='127.0.0.1', port=8080, max_queue=32, max_batch_size=None, batch_wait=0.01,
+                 max_buffered=16, send_timeout=30.0, min_frames=24, allow_speaker_files=False):
+        self.pipe = pipe
+        self.host, self.port = host, port
+        self.max_queue = max_queue
+        self.max_batch_size = max_batch_size or pipe.max_batch_size
+        self.batch_wait = batch_wait
+        self.max_buffered = max_buffered
+        self.send_timeout = send_timeout
+        self.min_frames = min_frames
+        self.allow_speaker_files = allow_speaker_files
+        self.counters = dict(requests=0, rejected=0, errors=0, cancelled=0, completed=0, batches=0, audio_seconds=0.0)
+        self.latency = {} # stage: [requests, total seconds]
+        self.server = None
+
+    async def start(self):
+        "Starts listening (with `port=0` a free port is picked and stored in `port`)."
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(self.max_queue)
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix='whisperspeech-server')
+        self.server = await asyncio.start_server(self._handle, self.host, self.port, limit=1 << 16)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.batcher = asyncio.create_task(self._batcher())
+        return self
+
+    async def stop(self):
+        self.server.close()
+        self.batcher.cancel()
+        await self.server.wait_closed()
+        self.executor.shutdown(wait=True)
+
+    async def serve_forever(self):
+        if self.server is None: await self.start()
+        await self.server.serve_forever()
+
+    def stats(self):
+        return dict(**self.counters, queued=self.queue.qsize(), max_queue=self.max_queue,
+                    latency_ms={k: 1000 * s / n for k,(n,s) in self.latency.items()})
+
+    def _parse_params(self, params, stream=False):
+        "Validates the request parameters, raises `_HTTPError(400)` for the invalid ones."
+        def get(name, conv, default=None):
+            v = params.get(name, default)
+            if v is None or v == '': return default
+            try: return conv(v)
+            except (TypeError, ValueError): raise _HTTPError(400, f"invalid {name}: {v!r}") from None
+        def boolean(v): return v if isinstance(v, bool) else str(v).lower() in ('1', 'true', 'yes')
+        text = params.get('text')
+        if not isinstance(text, str) or not text.strip(): raise _HTTPError(400, "missing text")
+        text = text.replace("\n", " ")
+        limit = self.pipe.t2s.ttoks_len - 2
+        if len(text.encode('utf-8')) > limit: raise _HTTPError(400, f"the text is longer than {limit} bytes")
+        fmt = get('format', str, 'wav').lower()
+        if fmt not in audio_out.content_types: raise _HTTPError(400, f"unsupported format: {fmt}")
+        sample_rate = get('sample_rate', int)
+        if sample_rate is not None and not 4000 <= sample_rate <= 192000: raise _HTTPError(400, f"invalid sample_rate: {sample_rate}")
+        speaker = params.get('speaker')
+        if isinstance(speaker, str) and not self.allow_speaker_files: raise _HTTPError(400, "speaker files are not allowed")
+        if isinstance(speaker, list):
+            try: speaker = torch.tensor(speaker, dtype=torch.float32)
+            except (TypeError, ValueError): raise _HTTPError(400, "invalid speaker embedding") from None
+            if speaker.shape != self.pipe.default_speaker.shape: raise _HTTPError(400, "invalid speaker embedding size")
+        elif speaker is not None and not isinstance(speaker, str): raise _HTTPError(400, "invalid speaker")
+        return dict(text=text, lang=get('lang', str, 'en'), cps=get('cps', float, 15), seed=get('seed', int),
+                    speaker=speaker, format=fmt, sample_rate=sample_rate, stream=get('stream', boolean, stream),
+                    id=params.get('id'))
+
+    def _submit(self, params):
+        "Queues a request, raises `_HTTPError(503)` if the queue is full."
+        job = _Job(params, self.loop, self.max_buffered, self.send_timeout)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.counters['rejected'] += 1
+            raise _HTTPError(503, "too many requests in the queue") from None
+        self.counters['requests'] += 1
+        return job
+
+    async def _batcher(self):
+        held = None
+        while True:
+            job, held = held or await self.queue.get(), None
+            if job.cancelled: continue
+            if job.params['stream']:
+                await self._run([job], self._run_stream, job)
+                continue
+            batch, deadline = [job], self.loop.time() + self.batch_wait
+            while len(batch) < self.max_batch_size:
+                try:
+                    nxt = self.queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - self.loop.time()
+                    if timeout <= 0: break
+                    try: nxt = await asyncio.wait_for(self.queue.get(), timeout)
+                    except asyncio.TimeoutError: break
+                if nxt.cancelled: continue
+                if nxt.params['stream']:
+                    held = nxt
+                    break
+                batch.append(nxt)
+            self.counters['batches'] += 1
+            await self._run(batch, self._run_batch, batch)
+
+    async def _run(self, jobs, fun, *args):
+        "Runs `fun` in the model thread. An unexpected error only fails the `jobs` and not the server."
+        try: await self.loop.run_in_executor(self.executor, fun, *args)
+        except Exception as e: await self.loop.run_in_executor(self.executor, self._fail, jobs, e)
+
+    @contextmanager
+    def _stage(self, jobs, name):
+        "Measures the time of a stage (waiting for the device to finish) for all the `jobs`."
+        start = time.perf_counter()
+        yield
+        if self.pipe.device.type == 'cuda': torch.cuda.synchronize()
+        self._record(jobs, name, time.perf_counter() - start)
+
+    def _record(self, jobs, name, seconds):
+        for job in jobs: job.timings[name] = seconds
+        n, total = self.latency.get(name, (0, 0.0))
+        self.latency[name] = (n + len(jobs), total + seconds * len(jobs))
+
+    def _speaker(self, speaker):
+        return self.pipe.get_speaker_emb(speaker).to(self.pipe.s2a.device)
+
+    def _deliver(self, job, chunks):
+        "Encodes the audio `chunks` and sends them to the client, the compressed formats are sent once they are complete."
+        p = job.params
+        stream = p['format'] in ('wav', 'pcm')
+        f = _Sink(job) if stream else io.BytesIO()
+        with audio_out.open_writer(f, p['format'], p['sample_rate']) as w:
+            for chunk in chunks: w.write(chunk)
+        if not stream:
+            data = f.getvalue()
+            for i in range(0, len(data), 1 << 16): job.send('data', data[i:i + (1 << 16)])
+        return w.seconds
+
+    def _finish(self, job, run):
+        "Runs `run()` (which sends the audio) and reports the outcome to the client."
+        try:
+            seconds = run()
+            job.send('end', dict(job.timings))
+            self.counters['completed'] += 1
+            self.counters['audio_seconds'] += seconds
+        except _Cancelled:
+            self.counters['cancelled'] += 1
+        except Exception as e:
+            self._fail([job], e)
+
+    def _fail(self, jobs, e):
+        traceback.print_exception(type(e), e, e.__traceback__)
+        for job in jobs:
+            self.counters['errors'] += 1
+            try: job.send('error', f"{type(e).__name__}: {e}")
+            except _Cancelled: pass
+
+    @torch.no_grad()
+    def _run_batch(self, jobs):
+        pipe = self.pipe
+        start = time.perf_counter()
+        for job in jobs: self._record([job], 'queue', start - job.submitted)
+        ps = [job.params for job in jobs]
+        try:
+            # the same seeds as `Pipeline.generate_atoks_batch`
+            t2s_seeds, s2a_seeds = zip(*[sampling.split_seed(p['seed'], 2) for p in ps])
+            speakers = torch.stack([self._speaker(p['speaker']) for p in ps])
+            with self._stage(jobs, 't2s'):
+                stoks = pipe.t2s.generate_batch([p['text'] for p in ps], cpss=[p['cps'] for p in ps], langs=[p['lang'] for p in ps],
+                                                seed=list(t2s_seeds), show_progress_bar=False)
+            with self._stage(jobs, 's2a'):
+                atoks = pipe.s2a.generate_batch(stoks, speakers, seed=list(s2a_seeds), show_progress_bar=False)
+            with self._stage(jobs, 'vocoder'):
+                audios = pipe.vocoder.decode_batch(atoks)
+        except Exception as e:
+            self._fail(jobs, e)
+            return
+        for job, audio in zip(jobs, audios):
+            def run(job=job, audio=audio):
+                job.send('start', dict(job.timings))
+                return self._deliver(job, [audio])
+            self._finish(job, run)
+
+    @torch.no_grad()
+    def _run_stream(self, job):
+        pipe, p = self.pipe, job.params
+        self._record([job], 'queue', time.perf_counter() - job.submitted)
+        def run():
+            t2s_seed, s2a_seed = sampling.split_seed(p['seed'], 2)
+            speaker = self._speaker(p['speaker'])
+            with self._stage([job], 't2s'):
+                stoks = pipe.t2s.generate(p['text'], cps=p['cps'], lang=p['lang'], seed=t2s_seed, show_progress_bar=False)
+            s2a, total = _Timer(), _Timer()
+            atoks = s2a.wrap(pipe.s2a.generate_chunks(stoks, speaker.unsqueeze(0), chunk=8, seed=s2a_seed, show_progress_bar=False))
+            chunks = total.wrap(pipe.vocoder.decode_stream(atoks, min_frames=self.min_frames))
+            first = next(chunks, None)
+            self._record([job], 'first_audio', time.perf_counter() - job.submitted)
+            job.send('start', dict(job.timings))
+            seconds = self._deliver(job, itertools.chain([] if first is None else [first], chunks))
+            self._record([job], 's2a', s2a.seconds)
+            self._record([job], 'vocoder', total.seconds - s2a.seconds)
+            return seconds
+        self._finish(job, run)
+
+    async def _handle(self, reader, writer):
+        try:
+            method, path, query, headers, body = await self._read_request(reader)
+            if path == '/ws' and headers.get('upgrade', '').lower() == 'websocket':
+                await self._websocket(headers, reader, writer)
+            elif path == '/health':
+                await self._respond(writer, 200, dict(status='ok', queued=self.queue.qsize(), max_queue=self.max_queue))
+            elif path == '/stats':
+                await self._respond(writer, 200, self.stats())
+            elif path == '/tts':
+                if method == 'GET': params = query
+                elif method == 'POST':
+                    try: params = {**query, **json.loads(body or b'{}')}
+                    except ValueError: raise _HTTPError(400, "the body is not valid JSON") from None
+                else: raise _HTTPError(405, f"{method} is not supported")
+                await self._http_tts(writer, params)
+            else:
+                raise _HTTPError(404, f"{path} not found")
+        except _HTTPError as e:
+            try: await self._respond(writer, e.status, dict(error=e.message))
+            except ConnectionError: pass
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader, max_body=1 << 20):
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.LimitOverrunError:
+            raise _HTTPError(431, "the request headers are too large") from None
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, _ = lines[0].split(' ', 2)
+        except ValueError:
+            raise _HTTPError(400, "invalid request line") from None
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                k, v = line.split(':', 1)
+                headers[k.strip().lower()] = v.strip()
+        n = int(headers.get('content-length', 0) or 0)
+        if n > max_body: raise _HTTPError(413, "the request body is too large")
+        body = await reader.readexactly(n) if n else b''
+        url = urlsplit(target)
+        return method.upper(), url.path, dict(parse_qsl(url.query)), headers, body
+
+    async def _respond(self, writer, status, body, headers=()):
+        "Sends a complete (JSON) response."
+        if not isinstance(body, bytes): body = json.dumps(body).encode()
+        head = [f'HTTP/1.1 {status} {_reasons.get(status, "")}', 'Content-Type: application/json',
+                f'Content-Length: {len(body)}', 'Connection: close', *headers]
+        if status == 503: head.append('Retry-After: 1')
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + body)
+        await writer.drain()
+
+    async def _http_tts(self, writer, params):
+        job = self._submit(self._parse_params(params))
+        p = job.params
+        try:
+            kind, value = await job.out.get()
+            if kind == 'error': raise _HTTPError(500, value)
+            head = ['HTTP/1.1 200 OK', f'Content-Type: {audio_out.content_types[p["format"]]}', 'Transfer-Encoding: chunked',
+                    f'Server-Timing: {_server_timing(value)}', 'Trailer: Server-Timing', 'Connection: close']
+            writer.write(('\r\n'.join(head) + '\r\n\r\n').encode())
+            while True:
+                kind, value = await job.out.get()
+                if kind == 'data':
+                    writer.write(b'%x\r\n%s\r\n' % (len(value), value))
+                    await writer.drain() # backpressure: wait for the client to read
+                elif kind == 'end':
+                    writer.write(f'0\r\nServer-Timing: {_server_timing(value)}\r\n\r\n'.encode())
+                    await writer.drain()
+                    break
+                else: # an error after the headers were sent, close without the final chunk
+                    break
+        finally:
+            job.cancel()
+
+    async def _websocket(self, headers, reader, writer):
+        key = headers.get('sec-websocket-key')
+        if not key: raise _HTTPError(400, "missing Sec-WebSocket-Key")
+        writer.write(('HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                      f'Sec-WebSocket-Accept: {_WebSocket.accept_key(key)}\r\n\r\n').encode())
+        await writer.drain()
+        ws = _WebSocket(reader, writer)
+        while (msg := await ws.receive()) is not None:
+            try:
+                params = json.loads(msg) if isinstance(msg, str) else None
+                if not isinstance(params, dict): raise _HTTPError(400, "requests have to be JSON objects")
+                job = self._submit(self._parse_params(params, stream=True))
+            except ValueError:
+                await ws.send_json(dict(type='error', status=400, error="the request is not valid JSON"))
+                continue
+            except _HTTPError as e:
+                await ws.send_json(dict(type='error', status=e.status, error=e.message, id=params.get('id') if isinstance(params, dict) else None))
+                continue
+            p = job.params
+            try:
+                while True:
+                    kind, value = await job.out.get()
+                    if kind == 'data':
+                        await ws.send(value)
+                        continue
+                    msg = dict(type=kind, id=p['id'])
+                    if kind == 'start': msg.update(format=p['format'], sample_rate=p['sample_rate'] or 24000, timings=value)
+                    elif kind == 'end': msg.update(timings=value)
+                    else: msg.update(status=500, error=value)
+                    await ws.send_json(msg)
+                    if kind != 'start': break
+            finally:
+                job.cancel()
+        await ws.close()
+
+# %% ../nbs/I. Server.ipynb 8
+def _micro_pipeline(vocoder=None, device='cpu', max_batch_size=4):
+    """A `Pipeline` with tiny randomly initialized T2S and S2A models (`_make_model('micro')`) for testing the server.
+
+    The models are made for short texts (at most 78 bytes) and `vocoder` defaults to the real `Vocoder`."""
+    from whisperspeech import t2s_up_wds_mlang_enclm, s2a_delar_mup_wds_mlang
+    from whisperspeech.a2wav import Vocoder
+    from whisperspeech.pipeline import Pipeline
+    ds = SimpleNamespace(stoks_len=150, ttoks_len=80, stoks_codes=513)
+    t2s = t2s_up_wds_mlang_enclm._make_model('micro', dataset=ds, stoks_width=64)
+    s2a = s2a_delar_mup_wds_mlang._make_model('micro', stoks_codes=513, stoks_width=64, stoks_len=ds.stoks_len,
+                                              ctx_n=3*ds.stoks_len, spk_width=192)
+    for m in (t2s, s2a):
+        m.to(device).eval().optimize(max_batch_size=max_batch_size, dtype=torch.float32, torch_compile=False)
+    if vocoder is None: vocoder = Vocoder(device=device)
+    return Pipeline.from_models(t2s, s2a, vocoder, max_batch_size=max_batch_size)
+
+# %% ../nbs/I. Server.ipynb 9
+@call_parse
+def main(
+    host:str='127.0.0.1', # the address to listen on
+    port:int=8080, # the port to listen on
+    t2s_ref:str=None, # the T2S model (see `Pipeline`)
+    s2a_ref:str=None, # the S2A model (see `Pipeline`)
+    device:str=None, # the device to run the models on
+    max_batch_size:int=4, # the batch size for the non-streaming requests
+    max_queue:int=32, # the number of waiting requests before the server answers with 503
+    torch_compile:bool=False, # use torch.compile
+    micro:bool=False, # serve tiny randomly initialized models instead of `t2s_ref` and `s2a_ref` (for testing)
+):
+    "Run the WhisperSpeech HTTP and WebSocket server"
+    if micro:
+        pipe = _micro_pipeline(device=device or 'cpu', max_batch_size=max_batch_size)
+    else:
+        from whisperspeech.pipeline import Pipeline
+        pipe = Pipeline(t2s_ref=t2s_ref, s2a_ref=s2a_ref, device=device, max_batch_size=max_batch_size, torch_compile=torch_compile)
+    print(f"Listening on http://{host}:{port}")
+    asyncio.run(TTSServer(pipe, host, port, max_queue=max_queue).serve_forever())
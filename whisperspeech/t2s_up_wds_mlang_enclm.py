@@ -8,6 +8,7 @@ import dataclasses
 import random
 import math
 import itertools
+import time
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -21,7 +22,10 @@ from pathlib import Path
 
 # %% ../nbs/5B. Multi-lang text to semantic token modeling.ipynb 2
 from whisperspeech.modules import *
+from whisperspeech.caches import LRUCache
 from whisperspeech import languages
+from whisperspeech import sampling
+from whisperspeech.metrics import StageTimer
 
 # %% ../nbs/5B. Multi-lang text to semantic token modeling.ipynb 6
 import re
@@ -239,6 +243,12 @@ class TSARTransformer(nn.Module):
             width=width, n_head=n_head, ffn_mult=ffn_mult,
         )
         self.tokenizer = None
+        self.encoder_cache = None
+        self.output_cache = None
+        self.converted_for_eval = False
+        self.speculative_stats = None
+        self.stop_stats = None
+        self.stage_timer = None
         
         self.apply(self.init_transformer)
 
@@ -295,7 +305,7 @@ class TSARTransformer(nn.Module):
 
         return xenc, positions, cps_emb
     
-    def forward(self, in_ttoks, out_ttoks, languages, cpss, in_stoks, in_stoks_positions, out_stoks=None, loss=True, offset=None, xenc=None, xenc_positions=None, cps_emb=None):
+    def forward(self, in_ttoks, out_ttoks, languages, cpss, in_stoks, in_stoks_positions, out_stoks=None, loss=True, offset=None, xenc=None, xenc_positions=None, cps_emb=None, kv_len=None):
         if xenc is None:
             xenc, cps_emb = self.run_encoder(in_ttoks, languages, cpss)
 
@@ -303,7 +313,7 @@ class TSARTransformer(nn.Module):
             x = (self.embeddings.embedding(in_stoks) + 
                  self.embeddings.positional_embedding[in_stoks_positions] +
                  cps_emb).to(xenc[0].dtype)
-            x = self.decoder(x, in_stoks_positions, xenc, xenc_positions)
+            x = self.decoder(x, in_stoks_positions, xenc, xenc_positions, kv_len=kv_len)
             logits = self.embeddings.embedding.unembed(x)
             logits = logits * self.tunables.output_mult / (self.width / self.base_width)
 
@@ -322,7 +332,7 @@ class TSARTransformer(nn.Module):
     #
     @classmethod
     def load_model(cls, ref="collabora/whisperspeech:t2s-small-en+pl.model",
-                   repo_id=None, filename=None, local_filename=None):
+                   repo_id=None, filename=None, local_filename=None, device=None, dtype=None):
         if repo_id is None and filename is None and local_filename is None:
             if ":" in ref:
                 repo_id, filename = ref.split(":", 1)
@@ -330,10 +340,21 @@ class TSARTransformer(nn.Module):
                 local_filename = ref
         if not local_filename:
             local_filename = hf_hub_download(repo_id=repo_id, filename=filename)
-        spec = torch.load(local_filename)
-        model = cls(**spec['config'], tunables=Tunables(**spec['tunables']))
-        model.load_state_dict(spec['state_dict'])
+        if str(local_filename).endswith('.safetensors'):
+            tensors, meta = read_safetensors(local_filename, device or 'cpu')
+            with torch.device('meta'):
+                model = cls(**meta['config'], tunables=Tunables(**meta['tunables']))
+                if meta.get('converted_for_eval'): model.convert_for_eval()
+            assign_tensors(model, tensors, dtype)
+            model.eval()
+            return model
+        spec = load_spec(local_filename)
+        with skip_init():
+            model = cls(**spec['config'], tunables=Tunables(**spec['tunables']))
+        load_weights(model, spec['state_dict'])
+        if dtype is not None: model.switch_dtypes(dtype)
         model.eval()
+        if device is not None: model.to(device)
         return model
 
     def load_checkpoint(self, local_filename):
@@ -345,6 +366,11 @@ class TSARTransformer(nn.Module):
         return self
 
     def save_model(self, fname):
+        if str(fname).endswith('.safetensors'):
+            write_safetensors(self, fname, config = self.__stored_args__,
+                              tunables = dataclasses.asdict(self.tunables),
+                              converted_for_eval = self.converted_for_eval)
+            return
         torch.save(dict(config = self.__stored_args__,
                         tunables = dataclasses.asdict(self.tunables),
                         state_dict = self.state_dict()), fname)
@@ -363,7 +389,10 @@ class TSARTransformer(nn.Module):
             for bn,b in m.named_buffers(recurse=False):
                 setattr(m,bn,b.to(dtype))
 
-    def optimize(self, max_batch_size=1, dtype=torch.float16, torch_compile=True):
+    def convert_for_eval(self):
+        """Merges the attention projections and the embedding matrices for inference.
+
+        Models saved to `.safetensors` after this step load in the converted form."""
         for emb in [self.embeddings.embedding, self.embeddings.embedding]:
             emb.convert_for_eval()
         for l in self.encoder.layers:
@@ -371,40 +400,90 @@ class TSARTransformer(nn.Module):
         for l in self.decoder.layers:
             l.attn.convert_for_eval()
             l.cross_attn.convert_for_eval()
-            l.setup_kv_cache(max_batch_size, self.stoks_len, self.ttoks_len)
+        self.converted_for_eval = True
+
+    def optimize(self, max_batch_size=1, dtype=torch.float16, torch_compile=True, quantize=None, max_seq_len=None):
+        """Prepares the model for fast inference.
+
+        `max_seq_len` shortens the KV cache (and the longest possible output) to save memory, by default the cache
+        holds the full context. See `BaseDecoder.setup_kv_cache` for the details.
+
+        `quantize='int8'` replaces the attention projections and the MLPs with dynamically quantized int8
+        layers. This only works on the CPU and the rest of the model runs in float32 (`dtype` is ignored)."""
+        if not self.converted_for_eval: self.convert_for_eval()
+        self.decoder.setup_kv_cache(max_batch_size, max_seq_len or self.stoks_len, self.ttoks_len)
+        if quantize is not None:
+            assert quantize == 'int8', f"unsupported quantization: {quantize}"
+            assert self.device.type == 'cpu', "int8 quantization is only supported on the CPU"
+            dtype = torch.float32
         self.switch_dtypes(dtype)
+        if quantize: quantize_linears(self)
         if torch_compile:
-            self.generate_next = torch.compile(self.generate_next, mode="reduce-overhead", fullgraph=True)
+            # every KV cache bucket gets its own static graph
+            self.generate_next = torch.compile(self.generate_next, mode="reduce-overhead", fullgraph=True, dynamic=False)
 
     @property
     def device(self):
         return next(self.parameters()).device
-        
-    # from https://github.com/pytorch-labs/gpt-fast/blob/main/generate.py
-    def multinomial_sample_one_no_sync(self, probs_sort): # Does multinomial sampling without a cuda synchronization
-        q = torch.empty_like(probs_sort).exponential_(1)
-        return torch.argmax(probs_sort / q, dim=-1, keepdim=True).to(dtype=torch.int)
 
-    def logits_to_probs(self, logits, T=1.0, top_k=None):
-        logits = logits / max(T, 1e-5)
+    def setup_caches(self, max_items=256, max_bytes=256*2**20, output_items=0):
+        """Enables an LRU cache of the text encoder outputs (at most `max_items` entries taking `max_bytes`)
+        and, with `output_items > 0`, a cache of whole outputs that is used for deterministic decoding (`T=0`)."""
+        self.encoder_cache = LRUCache(max_items, max_bytes)
+        self.output_cache = LRUCache(output_items) if output_items else None
+
+    def cache_stats(self):
+        return {name:cache.stats() for name,cache in [('encoder', self.encoder_cache), ('output', self.output_cache)] if cache is not None}
+
+    def encode(self, ttoks, langs, cpss):
+        """Same as `run_encoder` but reuses the cached outputs for rows seen before (see `setup_caches`)."""
+        if self.encoder_cache is None: return self.run_encoder(ttoks, langs, cpss)
+        keys = [(t.numpy().tobytes(), l.numpy().tobytes(), float(c)) for t,l,c in zip(ttoks.cpu(), langs.cpu(), cpss.cpu())]
+        cached = [self.encoder_cache.get(k) for k in keys]
+        missing = {} # run the encoder once for every new key, even if it is repeated in the batch
+        for i,(k,x) in enumerate(zip(keys, cached)):
+            if x is None: missing.setdefault(k, i)
+        if missing:
+            rows = list(missing.values())
+            xenc, positions, cps_emb = self.run_encoder(ttoks[rows], langs[rows], cpss[rows])
+            for j,k in enumerate(missing):
+                # clone to avoid keeping the whole batch alive
+                missing[k] = (xenc[j:j+1].clone(), None if cps_emb is None else cps_emb[j:j+1].clone())
+                self.encoder_cache.put(k, missing[k])
+            cached = [missing[k] if x is None else x for k,x in zip(keys, cached)]
+        # `torch.cat` copies, so the cached tensors never reach the caller
+        xenc = torch.cat([x for x,_ in cached])
+        cps_emb = None if cached[0][1] is None else torch.cat([x for _,x in cached])
+        return xenc, torch.arange(0, ttoks.shape[1], device=ttoks.device), cps_emb
+
+    def _output_key(self, kind, txt, lang, cps, N, sampling_key=()):
+        if self.output_cache is None or sampling_key is None or isinstance(lang, torch.Tensor): return None
+        return (kind, repr(txt), repr(lang), cps, N) + sampling_key
+
+    def _sampling_key(self, T, top_k, top_p, min_p, seed):
+        "The sampling settings for the output cache key or None if the output is not reproducible."
+        if sampling.is_greedy(T): return ()
+        if isinstance(seed, int) and all(x is None or isinstance(x, (int, float)) for x in (T, top_k, top_p, min_p)):
+            return (T, top_k, top_p, min_p, seed)
+        return None
+        
+    def multinomial_sample_one_no_sync(self, probs_sort, generator=None): # Does multinomial sampling without a cuda synchronization
+        return sampling.sample_probs(probs_sort, generator)
 
-        logits[self.embeddings.embedding.codes:] = -torch.inf
-        if top_k is not None:
-            v, _ = torch.topk(logits, min(top_k, logits.size(-1)))
-            pivot = v.select(-1, -1).unsqueeze(-1)
-            logits = torch.where(logits < pivot, -float("Inf"), logits)
+    def logits_to_probs(self, logits, T=1.0, top_k=None, top_p=None, min_p=None):
+        return sampling.logits_to_probs(logits, T, top_k, top_p, min_p, vocab=self.embeddings.embedding.codes)
 
-        probs = torch.nn.functional.softmax(logits, dim=-1)
-        return probs
+    def sample(self, logits, T=1.0, top_k=None, top_p=None, min_p=None, noise=None):
+        # the special tokens at the end of the vocabulary are never sampled
+        return sampling.sample(logits[:,-1], T, top_k, top_p, min_p, vocab=self.embeddings.embedding.codes, noise=noise)
 
-    def sample(self, logits, T=1.0, top_k=None):
-        probs = self.logits_to_probs(logits[0,-1], T, top_k)
-        idx_next = self.multinomial_sample_one_no_sync(probs)
-        return idx_next
+    def _noise(self, gens):
+        "The sampling noise for one decoding step (drawn outside of the compiled `generate_next`), None without generators."
+        return sampling.uniform_noise(gens, (self.embeddings.embedding.codes,), self.device)
 
-    def generate_one(self, toks, toks_positions, cps_emb, xenc, xenc_positions, T, top_k):
-        probs, _ = self(None, None, None, None, toks, toks_positions, loss=None, xenc=xenc, xenc_positions=xenc_positions, cps_emb=cps_emb)
-        return self.sample(probs, T, top_k)
+    def generate_one(self, toks, toks_positions, cps_emb, xenc, xenc_positions, T, top_k, kv_len=None, top_p=None, min_p=None, noise=None):
+        probs, _ = self(None, None, None, None, toks, toks_positions, loss=None, xenc=xenc, xenc_positions=xenc_positions, cps_emb=cps_emb, kv_len=kv_len)
+        return self.sample(probs, T, top_k, top_p, min_p, noise)
 
     def generate_next(self, *args, **kwargs):
         return self.generate_one(*args, **kwargs)
@@ -418,11 +497,30 @@ class TSARTransformer(nn.Module):
         langs = torch.tensor([languages.to_id(lang)], device=dev)
         return ttoks, cpss, langs
     
+    def generate(self, txt, cps=15, lang="en", N=None, T=0.7, top_k=None, top_p=None, min_p=None, seed=None, step=None, show_progress_bar=True):
+        key = self._output_key('single', txt, lang, cps, N, self._sampling_key(T, top_k, top_p, min_p, seed))
+        # the cache keeps its own copies so the callers can modify the outputs
+        if key is not None and (out := self.output_cache.get(key)) is not None: return out.clone()
+        chunks = self.generate_chunks(txt, cps=cps, lang=lang, N=N, T=T, top_k=top_k, top_p=top_p, min_p=min_p, seed=seed, step=step, show_progress_bar=show_progress_bar)
+        out = torch.cat(list(chunks))
+        if key is not None: self.output_cache.put(key, out.clone())
+        return out
+
     @torch.no_grad()
-    def generate(self, txt, cps=15, lang="en", N=None, T=0.7, top_k=None, step=None, show_progress_bar=True):
+    def generate_chunks(self, txt, cps=15, lang="en", N=None, T=0.7, top_k=None, top_p=None, min_p=None, seed=None, chunk=None, step=None, show_progress_bar=True):
+        """Yields the semantic tokens in chunks of `chunk` tokens while they are being generated.
+
+        The output is cut at the first end-of-sequence token. With `chunk=None` a single chunk is returned
+        at the end (that's what `generate` uses). `seed` (an int or a `torch.Generator`) makes sampling reproducible.
+
+        The end-of-sequence check does not wait for the device (see `sampling.StopFlags`) so decoding may run
+        a few steps past the end. Those steps are counted in `stop_stats`. The time spent in the encoder and in the
+        decoding loop is measured in `stage_timer` (see `metrics.StageTimer`)."""
         self.ensure_tokenizer()
-        N = N or self.stoks_len
+        N = min(N or self.stoks_len, self.decoder.max_seq_len)
         dev = self.device
+        timer = self.stage_timer = StageTimer(dev)
+        gens = sampling.row_generators(seed, 1, dev)
         ttoks = []
         langs = []
         if isinstance(lang, list):
@@ -452,43 +550,243 @@ class TSARTransformer(nn.Module):
         toks[:,0] = self.stoks_codes-1
         toks_positions = torch.arange(N, device=dev)
         with record_function("encode"):
-            xenc, xenc_positions, cps_emb = self.run_encoder(ttoks, langs, cpss)
+            xenc, xenc_positions, cps_emb = self.encode(ttoks, langs, cpss)
+            self.decoder.prime_cross_attention(xenc, xenc_positions)
             toks_positions = torch.arange(N+1, device=dev)
+        timer.mark('encode')
         # contrary to S2A this model works without prefill and is actually a tiny bit faster
         # with record_function("prefill"):
         #     toks[0,1] = self.generate_one(toks[:,:1], toks_positions[:1], cps_emb, xenc, xenc_positions, T, top_k)
+        emitted = 0
+        eot = self.stoks_codes-1
+        stop = sampling.StopFlags(1, dev)
         with torch.backends.cuda.sdp_kernel(enable_flash=False, enable_mem_efficient=False, enable_math=True):
             for i in it:
-                toks[0,i+1] = self.generate_next(toks[:,i:i+1], toks_positions[i:i+1], cps_emb, xenc, xenc_positions, T, top_k)
-                if i % 25 == 0 and toks[0,i+1] == self.stoks_codes-1: return toks[0,:i+1]
+                toks[0,i+1] = self.generate_next(toks[:,i:i+1], toks_positions[i:i+1], cps_emb, xenc, xenc_positions, T, top_k,
+                                                 kv_len=self.decoder.kv_bucket(i+1), top_p=top_p, min_p=min_p, noise=self._noise(gens))[0,0]
+                stop.update(toks[:,i+1] == eot)
+                done = stop.poll()
+                if done is not None and done[0]:
+                    # the end-of-sequence token could have been sampled a few steps ago
+                    start = max(emitted, 1)
+                    end = start + int((toks[0,start:i+2] == eot).nonzero()[0,0])
+                    self.stop_stats = stop.stats()
+                    timer.steps = stop.steps
+                    timer.mark('decode')
+                    yield toks[0,emitted:end]
+                    return
 
                 # for profiling, debugging or early exit
                 if step is not None: step()
-        return toks[0,:]
+
+                if chunk and i + 2 - emitted >= chunk:
+                    start = max(emitted, 1) # the first token is the start-of-sequence token
+                    ends = (toks[0,start:i+2] == self.stoks_codes-1).nonzero()
+                    timer.steps = stop.steps
+                    timer.mark('decode')
+                    if len(ends):
+                        self.stop_stats = stop.stats()
+                        yield toks[0,emitted:start+ends[0,0]]
+                        return
+                    yield toks[0,emitted:i+2]
+                    timer.skip() # the time between the chunks belongs to the consumer
+                    emitted = i + 2
+        self.stop_stats = stop.stats()
+        timer.steps = stop.steps
+        timer.mark('decode')
+        yield toks[0,emitted:]
     
+    def prep_batch_item(self, txt, lang="en"):
+        """Tokenizes a text (or a list of texts in different languages) and returns padded text tokens
+        with the matching per-token language ids."""
+        if isinstance(lang, list):
+            assert isinstance(txt, list), "lang and txt have to be both lists or strings"
+            ttoks, langs = [], []
+            for txt_, lang_ in zip(txt, lang):
+                tt = self.tokenizer.encode(txt_)
+                ttoks += tt
+                langs += [languages.to_id(lang_)] * len(tt)
+            lang0 = lang[0]
+        else:
+            ttoks = self.tokenizer.encode(txt)
+            langs = [languages.to_id(lang)] * len(ttoks)
+            lang0 = lang
+        ttoks = F.pad(torch.tensor(ttoks, dtype=torch.long), (1, self.ttoks_len - len(ttoks) - 1), value=self.tokenizer.eot)
+        langs = F.pad(torch.tensor(langs, dtype=torch.long), (1, self.ttoks_len - len(langs) - 1), value=languages.to_id(lang0))
+        return ttoks, langs
+
     @torch.no_grad()
-    def generate_batch(self, txts, N=None, T=1.1, top_k=7, show_progress_bar=True):
+    def generate_batch(self, txts, cpss=15, langs="en", N=None, T=0.7, top_k=None, top_p=None, min_p=None, seed=None, step=None, show_progress_bar=True):
+        """Generates semantic tokens for a list of texts in a single decoding loop.
+
+        `cpss` and `langs` can be given per text or shared by all of them. The batch cannot be larger than
+        the `max_batch_size` passed to `optimize` (a `ValueError` is raised otherwise). Returns a list of token
+        tensors, each one cut at its own end-of-sequence token. Once half of the rows have finished they are
+        retired from the batch so the remaining ones decode faster (`stop_stats` counts the steps spent on
+        finished rows).
+
+        Every row samples with its own generator so it does not depend on the rest of the batch. `seed` is a list
+        with a seed per text or a single int (text `i` gets `seed + i`), see `sampling.row_seeds`."""
+        bs = len(txts)
+        self.decoder.check_batch_size(bs)
+        if not isinstance(cpss, (list, tuple)): cpss = [cpss] * bs
+        if not isinstance(langs, (list, tuple)): langs = [langs] * bs
+        seeds = sampling.row_seeds(seed, bs)
+        keys = [self._output_key('batch', *args, N, self._sampling_key(T, top_k, top_p, min_p, s))
+                for args, s in zip(zip(txts, langs, cpss), seeds)]
+        if all(k is None for k in keys):
+            return self._generate_batch(txts, cpss, langs, N, T, top_k, top_p, min_p, seeds, step, show_progress_bar)
+        # reproducible decoding, only generate the texts we have not seen before
+        outs = [None if k is None else self.output_cache.get(k) for k in keys]
+        outs = [None if x is None else x.clone() for x in outs]
+        missing = [i for i,x in enumerate(outs) if x is None]
+        if missing:
+            new = self._generate_batch([txts[i] for i in missing], [cpss[i] for i in missing], [langs[i] for i in missing],
+                                       N, T, top_k, top_p, min_p, [seeds[i] for i in missing], step, show_progress_bar)
+            for i,x in zip(missing, new):
+                outs[i] = x
+                if keys[i] is not None: self.output_cache.put(keys[i], x.clone())
+        return outs
+
+    def _generate_batch(self, txts, cpss, langs, N, T, top_k, top_p, min_p, seeds, step, show_progress_bar):
         self.ensure_tokenizer()
-        N = self.stoks_len
+        N = min(N or self.stoks_len, self.decoder.max_seq_len)
         dev = self.device
-        ttoks = []
-        for txt in txts:
-            ttoks_ = torch.tensor(self.tokenizer.encode(txt), device=dev)
-            ttoks_ = F.pad(ttoks_, (0, self.ttoks_len - len(ttoks_)), value=self.tokenizer.eot).unsqueeze(0)
-            ttoks.append(ttoks_)
-        ttoks = torch.cat(ttoks, dim=0)
-        toks = torch.zeros((len(ttoks),N), dtype=torch.long, device=dev)
-        it = range(N)
+        timer = self.stage_timer = StageTimer(dev)
+        bs = len(txts)
+        gens = sampling.row_generators(seeds, bs, dev)
+        ttoks, langs = zip(*[self.prep_batch_item(txt, lang) for txt, lang in zip(txts, langs)])
+        ttoks = torch.stack(ttoks).to(dev)
+        langs = torch.stack(langs).to(dev)
+        cpss = torch.tensor(cpss, device=dev)
+        it = range(0,N-1)
         if show_progress_bar: it = progress_bar(it)
-        for i in it:
-            p, _ = self(ttoks, toks[:,:i], loss=None)
-            last_p = p[:,-1]
-            if top_k:
-                last_p[last_p < torch.topk(last_p, top_k).values[:,-1,None]] = -torch.inf
-            tok = torch.multinomial((last_p / float(T)).softmax(-1), 1)
-            toks[:,i] = tok[:,0]
-            if (toks[:,i] == self.stoks_codes-1).all(): return toks[:,:i]
-        return toks
+
+        eot = self.stoks_codes-1
+        toks = torch.zeros((bs,N), dtype=torch.long, device=dev)
+        toks[:,0] = eot
+        stop = sampling.StopFlags(bs, dev)
+        rows = torch.arange(bs, device=dev) # the `toks` rows that are still being decoded
+        with record_function("encode"):
+            xenc, xenc_positions, cps_emb = self.encode(ttoks, langs, cpss)
+            self.decoder.prime_cross_attention(xenc, xenc_positions)
+            toks_positions = torch.arange(N+1, device=dev)
+        timer.mark('encode')
+        i = -1 # with N <= 1 there is nothing to decode
+        with torch.backends.cuda.sdp_kernel(enable_flash=False, enable_mem_efficient=False, enable_math=True):
+            for i in it:
+                nxt = self.generate_next(toks[rows,i:i+1], toks_positions[i:i+1], cps_emb, xenc, xenc_positions, T, top_k,
+                                         kv_len=self.decoder.kv_bucket(i+1), top_p=top_p, min_p=min_p, noise=self._noise(gens))[:,0]
+                toks[rows,i+1] = nxt
+                stop.update(nxt == eot)
+                done = stop.poll()
+                if done is not None and done.all(): break
+                # finished rows keep decoding (and get trimmed below) until they make up half of the batch,
+                # retiring them in halves limits the number of different batch sizes (and recompilations)
+                if done is not None and 2 * int(done.sum()) >= len(done):
+                    with record_function("retire"):
+                        keep = (~done).nonzero()[:,0].tolist()
+                        rows, xenc = rows[keep], xenc[keep]
+                        if cps_emb is not None: cps_emb = cps_emb[keep]
+                        T, top_k, top_p, min_p = [sampling.select_rows(x, keep) for x in (T, top_k, top_p, min_p)]
+                        if gens is not None: gens = sampling.select_rows(gens, keep)
+                        stop.select(keep)
+                        self.decoder.select_rows(keep, i+1)
+                        self.decoder.prime_cross_attention(xenc, xenc_positions)
+
+                # for profiling, debugging or early exit
+                if step is not None: step()
+        self.stop_stats = stop.stats()
+        toks = toks[:,:i+2]
+        is_eot = toks == eot
+        is_eot[:,0] = False
+        lens = torch.where(is_eot.any(-1), is_eot.to(torch.int).argmax(-1), toks.shape[-1]).tolist()
+        timer.steps = stop.steps
+        timer.mark('decode')
+        return [toks[j,:n] for j,n in enumerate(lens)]
+
+    def _decode(self, toks, start, enc):
+        "Returns the logits for the tokens at positions `start`, `start+1`, ... (all the earlier ones have to be in the KV cache)."
+        xenc, xenc_positions, cps_emb = enc
+        n = start + toks.shape[-1]
+        positions = torch.arange(start, n, device=toks.device)
+        logits, _ = self(None, None, None, None, toks, positions, loss=None, xenc=xenc, xenc_positions=xenc_positions,
+                         cps_emb=cps_emb, kv_len=self.decoder.kv_bucket(n))
+        return logits
+
+    @torch.no_grad()
+    def generate_speculative(self, txt, draft, k=4, cps=15, lang="en", N=None, T=0.7, top_k=None, top_p=None, min_p=None, seed=None, step=None):
+        """Generates semantic tokens with speculative decoding.
+
+        The (smaller) `draft` model proposes `k` tokens and this model verifies all of them in a single forward pass.
+        Draft tokens are accepted with the rejection sampling rule so the output has the same distribution as
+        `generate_batch` (and is identical for `T=0`). Both models have to be `optimize`d and use the same semantic
+        tokens. The acceptance rate and the speed of the last call are stored in `speculative_stats`."""
+        assert draft.stoks_codes == self.stoks_codes, "the draft model has to use the same semantic tokens"
+        self.ensure_tokenizer(); draft.ensure_tokenizer()
+        start_time = time.perf_counter()
+        N = min(N or self.stoks_len, self.decoder.max_seq_len, draft.decoder.max_seq_len)
+        dev = self.device
+        gen = sampling.make_generator(seed, dev)
+        eot = self.stoks_codes-1
+        encs = []
+        for m in (self, draft):
+            ttoks, langs = m.prep_batch_item(txt, lang)
+            with record_function("encode"):
+                xenc, xenc_positions, cps_emb = m.encode(ttoks[None].to(dev), langs[None].to(dev), torch.tensor([cps], device=dev))
+                m.decoder.prime_cross_attention(xenc, xenc_positions)
+            encs.append((xenc, xenc_positions, cps_emb))
+
+        toks = torch.zeros((1,N), dtype=torch.long, device=dev)
+        toks[0,0] = eot
+        n = 0 # the last known token
+        draft_n = 0 # the first position missing from the draft KV cache
+        proposed, accepted = 0, 0
+        while n < N-1:
+            kk = min(k, N-2-n)
+            with record_function("draft"):
+                qs = []
+                for j in range(kk):
+                    logits = draft._decode(toks[:,draft_n:n+j+1], draft_n, encs[1])
+                    q = draft.logits_to_probs(logits[:,-1], T, top_k, top_p, min_p)
+                    toks[0,n+j+1] = draft.multinomial_sample_one_no_sync(q, gen)[0,0]
+                    qs.append(q[0])
+                    draft_n = n+j+1
+            with record_function("verify"):
+                p = self.logits_to_probs(self._decode(toks[:,n:n+kk+1], n, encs[0])[0], T, top_k, top_p, min_p)
+                m = 0
+                if kk:
+                    q = torch.stack(qs)
+                    drafted = toks[0,n+1:n+kk+1,None]
+                    ratio = p[:kk].gather(-1, drafted)[:,0] / q.gather(-1, drafted)[:,0]
+                    u = torch.rand(kk, generator=gen, device=dev if gen is None else gen.device).to(dev)
+                    m = int((u < ratio).cumprod(0).sum())
+                if m < kk:
+                    # the first rejected token is resampled from the part of `p` the draft model does not cover
+                    residual = (p[m] - q[m]).clamp(min=0)
+                    if residual.sum() <= 0: residual = p[m]
+                    nxt = self.multinomial_sample_one_no_sync(residual / residual.sum(), gen)
+                else:
+                    nxt = self.multinomial_sample_one_no_sync(p[kk], gen)
+                toks[0,n+m+1] = nxt[0]
+            proposed += kk
+            accepted += m
+            # the rejected tokens in the draft KV cache are overwritten in the next round
+            draft_n = min(draft_n, n+m+1)
+            n += m+1
+            if (toks[0,n-m:n+1] == eot).any(): break
+
+            # for profiling, debugging or early exit
+            if step is not None: step()
+
+        out = toks[0,:n+1]
+        ends = (out[1:] == eot).nonzero()
+        if len(ends): out = out[:1+ends[0,0]]
+        seconds = time.perf_counter() - start_time
+        self.speculative_stats = dict(k=k, proposed=proposed, accepted=accepted,
+                                      acceptance_rate=accepted / max(proposed, 1),
+                                      tokens=len(out)-1, seconds=seconds, tokens_per_s=(len(out)-1) / seconds)
+        return out
 
 # %% ../nbs/5B. Multi-lang text to semantic token modeling.ipynb 18
 def _make_model(size:str, tunables:Tunables=Tunables(), dataset=None, **kwargs):
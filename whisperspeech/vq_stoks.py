@@ -16,11 +16,8 @@ import json
 from fastprogress import progress_bar, master_bar
 import fastprogress
 import numpy as np
-import pylab as plt
-import pandas as pd
 import random
 
-import whisper
 from huggingface_hub import hf_hub_download
 from fastcore.basics import store_attr
 
@@ -28,8 +25,6 @@ from torch import nn
 import torch.optim as optim
 import torch.nn.functional as F
 from torch.utils.data.dataloader import DataLoader
-import webdataset as wds
-from . import utils
 
 from vector_quantize_pytorch import ResidualVQ
 
@@ -70,6 +65,7 @@ def merge_in(dataset_fun):
 
 # %% ../nbs/2B. Whisper quantization (semantic token) model.ipynb 10
 def derived_dataset(kind, key='audio'):
+    import webdataset as wds
     def deriver(url):
         url = str(Path(url).parent/(Path(url).name.replace(key, kind) + ".gz"))
         return wds.WebDataset(
@@ -90,6 +86,7 @@ def add_masks(samples):
         yield s
 
 def tokenize_text(samples, ttoks_size=200, model="base.en", language="en"):
+    import whisper
     multilingual = not model.endswith(".en")
     tokenizer = whisper.tokenizer.get_tokenizer(multilingual, language=language, task="transcribe")
     for s in samples:
@@ -111,7 +108,8 @@ def load_dataset(
         language:str=None,
         validation:bool=False,    
     ):
-    from . import wh_transcribe
+    import webdataset as wds
+    from . import wh_transcribe, utils
     shards = utils.shard_glob(shard_spec)
     
     if not language and model.endswith('en'): language = 'en'
@@ -145,7 +143,6 @@ def load_dataset(
     return ds
 
 # %% ../nbs/2B. Whisper quantization (semantic token) model.ipynb 28
-from whisperspeech.train import *
 from whisperspeech.modules import *
 
 # %% ../nbs/2B. Whisper quantization (semantic token) model.ipynb 29
@@ -309,6 +306,7 @@ class RQBottleneckTransformer(nn.Module):
     #
     @torch.no_grad()
     def extract_teacher(self, samples, input_toks, output_toks):
+        import whisper
         embs = self.whmodel[0].encoder(whisper.log_mel_spectrogram(samples))
         teacher_logits = self.whmodel[0].decoder(input_toks, embs)
         # set teacher logits to 0 for padding positions so KLDivLoss ignores them
@@ -365,7 +363,7 @@ class RQBottleneckTransformer(nn.Module):
     #
     @classmethod
     def load_model(cls, ref="collabora/spear-tts-pytorch:whisper-vq-stoks-medium-en+pl.model",
-                   repo_id=None, filename=None, local_filename=None):
+                   repo_id=None, filename=None, local_filename=None, device=None):
         if repo_id is None and filename is None and local_filename is None:
             if ":" in ref:
                 repo_id, filename = ref.split(":", 1)
@@ -373,6 +371,13 @@ class RQBottleneckTransformer(nn.Module):
                 local_filename = ref
         if not local_filename:
             local_filename = hf_hub_download(repo_id=repo_id, filename=filename)
+        if str(local_filename).endswith('.safetensors'):
+            tensors, meta = read_safetensors(local_filename, device or 'cpu')
+            with torch.device('meta'):
+                vqmodel = cls(**meta['config'], tunables=Tunables(**Tunables.upgrade(meta.get('tunables', {}))))
+            assign_tensors(vqmodel, tensors)
+            vqmodel.eval()
+            return vqmodel
         spec = torch.load(local_filename) 
         vqmodel = cls(**spec['config'], tunables=Tunables(**Tunables.upgrade(spec.get('tunables', {}))))
         vqmodel.load_state_dict(spec['state_dict'])
@@ -388,11 +393,17 @@ class RQBottleneckTransformer(nn.Module):
         return self
     
     def save_model(self, fname, store_parameters=True):
+        if str(fname).endswith('.safetensors'):
+            assert store_parameters, "safetensors files always store the parameters"
+            write_safetensors(self, fname, config = self.__stored_args__,
+                              tunables = dataclasses.asdict(self.tunables))
+            return
         torch.save(dict(config = self.__stored_args__,
                         tunables = dataclasses.asdict(self.tunables),
                         state_dict = self.state_dict() if store_parameters else None), fname)
         
     def ensure_whisper(self, device):
+        import whisper
         # the list wrapper is a hack to make sure the whole of Whisper is not sucked into self.parameters()
         if self.whmodel is None: self.whmodel = [whisper.load_model(self.whisper_model_name, device=device)]
         self.decoding_options = whisper.DecodingOptions()
@@ -424,6 +435,7 @@ class RQBottleneckTransformer(nn.Module):
         return self.ln_post(self.out_blocks(x))
 
     def encode_audio(self, audio):
+        import whisper
         if isinstance(audio, str):
             x, sr = torchaudio.load(audio)
             x = torchaudio.transforms.Resample(sr, 16000)(x)[0]
@@ -431,6 +443,7 @@ class RQBottleneckTransformer(nn.Module):
         return self.encode_mel(whisper.log_mel_spectrogram(audio).to(self.device))
     
     def encode_mel(self, mel):
+        import whisper
         assert len(mel.shape) == 3, "invalid mel spectrogram shape, expect (batch,chn,time)"
         self.ensure_whisper(self.device)
         n = mel.shape[-1]